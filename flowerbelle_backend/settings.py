@@ -167,4 +167,11 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
-}
\ No newline at end of file
+}
+
+# Forecasting jobs
+# Worker processes for bulk forecast jobs (defaults to all available cores)
+FORECAST_JOB_WORKERS = int(os.getenv('FORECAST_JOB_WORKERS', os.cpu_count() or 1))
+FORECAST_JOB_CHUNK_SIZE = int(os.getenv('FORECAST_JOB_CHUNK_SIZE', 50))
+# Jobs that have not started or reported progress for this long are marked failed
+FORECAST_JOB_STALE_MINUTES = int(os.getenv('FORECAST_JOB_STALE_MINUTES', 30))
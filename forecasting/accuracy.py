@@ -0,0 +1,136 @@
+"""
+Forecast accuracy backfill
+Writes out forecast run days that have passed, fills in their actual demand
+from realized sales, computes forecast errors in bulk and keeps the accuracy
+summaries current
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import ForecastAccuracySummary, ProductForecast
+from .runs import materialize_realized_forecasts
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def load_daily_sales(product_ids, start_date, end_date):
+    """Completed sales per (product, day) over a date range, from the daily rollup"""
+    from pos.models import ProductSalesDaily
+
+    sales_data = ProductSalesDaily.objects.filter(
+        product_id__in=product_ids,
+        business_date__gte=start_date,
+        business_date__lte=end_date
+    ).values_list('product_id', 'business_date', 'quantity')
+
+    return {(product_id, date): quantity for product_id, date, quantity in sales_data}
+
+
+def compute_forecast_errors(predicted, actual):
+    """
+    Vectorized forecast error and absolute percentage error
+    APE is NaN where actual demand is zero (it is undefined there)
+    """
+    predicted = np.asarray(predicted, dtype=np.int64)
+    actual = np.asarray(actual, dtype=np.int64)
+    errors = actual - predicted
+
+    ape = np.full(len(actual), np.nan)
+    sold = actual > 0
+    ape[sold] = np.abs(errors[sold]) / actual[sold] * 100
+    return errors, ape
+
+
+def backfill_actual_demand(until=None, recompute=False, batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Record actual demand and errors for every forecast dated before `until` (today by default)
+    and refresh the accuracy summaries of the affected models
+    Returns: number of forecasts updated
+    """
+    until = until or timezone.now().date()
+    materialize_realized_forecasts(until)
+
+    pending = ProductForecast.objects.filter(forecast_date__lt=until)
+    if not recompute:
+        pending = pending.filter(actual_demand__isnull=True)
+
+    updated = 0
+    model_ids = set()
+    last_id = 0
+    while True:
+        rows = list(
+            pending.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'product_id', 'forecast_date', 'predicted_demand', 'forecast_model_id'
+            )[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        ids, product_ids, dates, predicted, forecast_model_ids = zip(*rows)
+        model_ids.update(forecast_model_ids)
+        sales = load_daily_sales(set(product_ids), min(dates), max(dates))
+        actual = [sales.get(key, 0) for key in zip(product_ids, dates)]
+        errors, ape = compute_forecast_errors(predicted, actual)
+
+        now = timezone.now()
+        forecasts = [
+            ProductForecast(
+                id=ids[i],
+                actual_demand=actual[i],
+                forecast_error=int(errors[i]),
+                absolute_percentage_error=None if np.isnan(ape[i]) else float(ape[i]),
+                updated_at=now
+            )
+            for i in range(len(rows))
+        ]
+
+        with transaction.atomic():
+            ProductForecast.objects.bulk_update(
+                forecasts,
+                ['actual_demand', 'forecast_error', 'absolute_percentage_error', 'updated_at'],
+                batch_size=1000
+            )
+        updated += len(forecasts)
+
+    if model_ids:
+        refresh_accuracy_summaries(model_ids)
+
+    return updated
+
+
+@transaction.atomic
+def refresh_accuracy_summaries(model_ids=None):
+    """
+    Rebuild accuracy summaries from one conditional aggregate grouped by model and category
+    Refreshes every model when no ids are given
+    """
+    forecasts = ProductForecast.objects.filter(actual_demand__isnull=False)
+    summaries = ForecastAccuracySummary.objects.all()
+    if model_ids is not None:
+        forecasts = forecasts.filter(forecast_model_id__in=model_ids)
+        summaries = summaries.filter(forecast_model_id__in=model_ids)
+
+    totals = forecasts.values('forecast_model_id', 'product__category_id').annotate(
+        total=Count('id'),
+        accurate=Count('id', filter=Q(absolute_percentage_error__lte=20)),
+        error_sum=Sum('forecast_error'),
+        percentage_error_sum=Sum('absolute_percentage_error'),
+        percentage_error_count=Count('absolute_percentage_error')
+    ).order_by()
+
+    summaries.delete()
+    return ForecastAccuracySummary.objects.bulk_create([
+        ForecastAccuracySummary(
+            forecast_model_id=row['forecast_model_id'],
+            category_id=row['product__category_id'],
+            total_forecasts=row['total'],
+            accurate_forecasts=row['accurate'],
+            error_sum=row['error_sum'] or 0,
+            percentage_error_sum=row['percentage_error_sum'] or 0,
+            percentage_error_count=row['percentage_error_count']
+        )
+        for row in totals
+    ])
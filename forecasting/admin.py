@@ -1,17 +1,38 @@
 from django.contrib import admin
 from .models import (
-    ForecastModel, ProductForecast, CategoryForecast,
-    SeasonalPattern, StockRecommendation
+    ForecastModel, ForecastRun, ProductForecast, CategoryForecast,
+    SeasonalPattern, StockRecommendation, ForecastJob, ForecastAccuracySummary,
+    ProductForecastSummary, BacktestRun, BacktestResult, ReorderLevelProposal
 )
+from .inventory_policy import apply_reorder_proposals
 
 
 @admin.register(ForecastModel)
 class ForecastModelAdmin(admin.ModelAdmin):
-    list_display = ('name', 'version', 'model_type', 'status', 'is_active', 
+    list_display = ('name', 'product', 'slot', 'version', 'model_type', 'status', 'is_active', 
                    'accuracy', 'r2_score', 'trained_at')
-    list_filter = ('model_type', 'status', 'is_active', 'trained_at')
-    search_fields = ('name', 'version')
-    readonly_fields = ('trained_at', 'last_used')
+    list_filter = ('model_type', 'slot', 'status', 'is_active', 'trained_at')
+    search_fields = ('name', 'version', 'product__name', 'product__sku')
+    raw_id_fields = ('product',)
+    readonly_fields = ('trained_at', 'last_used', 'retrain_reason')
+
+
+@admin.register(ForecastRun)
+class ForecastRunAdmin(admin.ModelAdmin):
+    list_display = ('product', 'forecast_model', 'start_date', 'end_date', 'materialized_through', 'updated_at')
+    list_filter = ('start_date',)
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product', 'forecast_model')
+    exclude = ('predictions', 'lower', 'upper', 'seasonal_factors', 'peak_days')
+    readonly_fields = ('daily_forecasts', 'created_at', 'updated_at')
+    
+    @admin.display(description='Daily forecasts')
+    def daily_forecasts(self, obj):
+        return ', '.join(
+            f"{day['forecast_date']:%m-%d}: {day['predicted_demand']} "
+            f"({day['confidence_lower']}-{day['confidence_upper']})"
+            for day in obj.daily()
+        ) if obj.pk else ''
 
 
 @admin.register(ProductForecast)
@@ -26,7 +47,8 @@ class ProductForecastAdmin(admin.ModelAdmin):
 
 @admin.register(CategoryForecast)
 class CategoryForecastAdmin(admin.ModelAdmin):
-    list_display = ('category', 'forecast_date', 'predicted_demand', 'actual_demand')
+    list_display = ('category', 'forecast_date', 'predicted_demand', 'confidence_lower',
+                   'confidence_upper', 'product_count', 'actual_demand')
     list_filter = ('forecast_date', 'category')
     date_hierarchy = 'forecast_date'
 
@@ -35,7 +57,7 @@ class CategoryForecastAdmin(admin.ModelAdmin):
 class SeasonalPatternAdmin(admin.ModelAdmin):
     list_display = ('name', 'season_type', 'start_month', 'start_day',
                    'end_month', 'end_day', 'demand_multiplier', 'is_active')
-    list_filter = ('season_type', 'is_active')
+    list_filter = ('season_type', 'is_active', 'is_detected')
     search_fields = ('name', 'description')
     filter_horizontal = ('categories',)
 
@@ -46,4 +68,59 @@ class StockRecommendationAdmin(admin.ModelAdmin):
                    'status', 'created_at')
     list_filter = ('priority', 'status', 'created_at')
     search_fields = ('product__name', 'product__sku', 'reason')
-    readonly_fields = ('created_at', 'acknowledged_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'acknowledged_at')
+
+
+@admin.register(ForecastJob)
+class ForecastJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'total_products', 'processed_products',
+                   'forecasts_generated', 'created_by', 'created_at', 'completed_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('created_at', 'started_at', 'completed_at')
+
+
+@admin.register(ForecastAccuracySummary)
+class ForecastAccuracySummaryAdmin(admin.ModelAdmin):
+    list_display = ('forecast_model', 'category', 'total_forecasts',
+                   'accurate_forecasts', 'accuracy_rate', 'refreshed_at')
+    list_filter = ('category',)
+    readonly_fields = ('refreshed_at',)
+
+
+@admin.register(ProductForecastSummary)
+class ProductForecastSummaryAdmin(admin.ModelAdmin):
+    list_display = ('product', 'as_of', 'forecast_7_days', 'forecast_30_days',
+                   'priority', 'trend', 'seasonal_impact', 'refreshed_at')
+    list_filter = ('priority', 'trend', 'seasonal_impact')
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('refreshed_at',)
+
+
+@admin.register(BacktestRun)
+class BacktestRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'total_products', 'created_by', 'created_at', 'completed_at')
+    list_filter = ('status', 'created_at')
+    readonly_fields = ('parameters', 'summary', 'error_message', 'created_at', 'started_at', 'completed_at')
+
+
+@admin.register(BacktestResult)
+class BacktestResultAdmin(admin.ModelAdmin):
+    list_display = ('run', 'product', 'model_type', 'mae', 'rmse', 'mape', 'fit_seconds', 'predict_seconds')
+    list_filter = ('model_type', 'run')
+    search_fields = ('product__name', 'product__sku')
+
+
+@admin.register(ReorderLevelProposal)
+class ReorderLevelProposalAdmin(admin.ModelAdmin):
+    list_display = ('product', 'current_reorder_level', 'proposed_reorder_level', 'shelf_life_days',
+                   'stockout_rate', 'spoilage_rate', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('product',)
+    readonly_fields = ('created_at', 'applied_at')
+    actions = ('apply_proposals',)
+    
+    @admin.action(description='Apply selected reorder levels')
+    def apply_proposals(self, request, queryset):
+        applied = apply_reorder_proposals(queryset)
+        self.message_user(request, f"Updated reorder levels for {applied} products")
@@ -0,0 +1,69 @@
+"""
+Bottom-up category forecasts
+Sums the current product forecasts of each category per day. Product
+forecast errors are treated as independent, so each product's distance to
+its bounds adds in quadrature and the category interval is narrower than
+the sum of the product intervals.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from inventory.models import Product
+from .models import CategoryForecast
+from .runs import load_forecast_grid
+
+
+def refresh_category_forecasts(category_ids, start_date=None):
+    """
+    Rebuild the forecasts of the given categories from their products' forecast
+    runs dated `start_date` (tomorrow by default) onward, with two reads and one
+    upsert. When runs overlap on a day, the most recently written one counts.
+    Returns: category forecasts written
+    """
+    start_date = start_date or timezone.now().date() + timedelta(days=1)
+    category_ids = list(category_ids)
+    if not category_ids:
+        return []
+
+    products = list(Product.objects.filter(category_id__in=category_ids).values_list('id', 'category_id'))
+    if not products:
+        return []
+    product_ids, categories = zip(*products)
+    product_ids, grid = load_forecast_grid(product_ids, start_date)
+    if not grid['covered'].any():
+        return []
+
+    # Days a product has no forecast for are all zeros and add nothing
+    predicted = grid['predicted_demand'].astype(float)
+    lower = grid['confidence_lower'].astype(float)
+    upper = grid['confidence_upper'].astype(float)
+
+    # Category x product membership turns the per-product grid into category sums
+    category_index = {category_id: i for i, category_id in enumerate(category_ids)}
+    membership = np.zeros((len(category_ids), len(product_ids)))
+    membership[[category_index[category_id] for category_id in categories], np.arange(len(product_ids))] = 1
+
+    total = membership @ predicted
+    lower_variance = membership @ (predicted - lower) ** 2
+    upper_variance = membership @ (upper - predicted) ** 2
+    product_count = (membership @ grid['covered']).astype(int)
+
+    conf_lower = np.maximum(0, np.floor(total - np.sqrt(lower_variance)))
+    conf_upper = np.ceil(total + np.sqrt(upper_variance))
+
+    forecasts = [
+        CategoryForecast(
+            category_id=category_id,
+            forecast_model=None,
+            forecast_date=start_date + timedelta(days=int(d)),
+            predicted_demand=int(total[i, d]),
+            confidence_lower=int(conf_lower[i, d]),
+            confidence_upper=int(conf_upper[i, d]),
+            product_count=int(product_count[i, d])
+        )
+        for category_id, i in category_index.items()
+        for d in np.flatnonzero(product_count[i])
+    ]
+    return CategoryForecast.bulk_upsert(forecasts)
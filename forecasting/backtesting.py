@@ -0,0 +1,124 @@
+"""
+Rolling-origin backtests
+Replays every selected product's history through each registered model
+type across a process pool, scoring forecasts against what actually sold
+and timing fit and predict so models can be chosen on accuracy and cost
+"""
+import traceback
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import Product
+from .jobs import _run_tasks, get_worker_count
+from .ml_utils import BACKTESTERS, backtest_product_chunk, load_sales_histories
+from .models import BacktestResult, BacktestRun
+
+BACKTEST_ORIGINS = 4
+BACKTEST_HORIZON = 7
+BACKTEST_TRAINING_DAYS = 90
+
+
+def summarize_results(results):
+    """Mean errors over scored products and total wall-time per model type"""
+    summary = {}
+    for model_type in sorted({r['model_type'] for r in results}):
+        rows = [r for r in results if r['model_type'] == model_type]
+
+        def mean(metric):
+            values = [r[metric] for r in rows if r[metric] is not None]
+            return float(np.mean(values)) if values else None
+
+        summary[model_type] = {
+            'products': sum(r['mae'] is not None for r in rows),
+            'mae': mean('mae'),
+            'rmse': mean('rmse'),
+            'mape': mean('mape'),
+            'fit_seconds': sum(r['fit_seconds'] for r in rows),
+            'predict_seconds': sum(r['predict_seconds'] for r in rows),
+        }
+    return summary
+
+
+def run_backtest(origins=BACKTEST_ORIGINS, horizon=BACKTEST_HORIZON,
+                 training_days=BACKTEST_TRAINING_DAYS, model_types=None,
+                 product_ids=None, category_id=None, workers=None, user=None):
+    """
+    Backtest every model type on the selected active products. Origins are
+    `horizon` days apart and end where the last full horizon fits in the history.
+    Returns: the completed BacktestRun
+    """
+    model_types = list(model_types or BACKTESTERS)
+    chunk_size = getattr(settings, 'FORECAST_JOB_CHUNK_SIZE', 50)
+    workers = workers or get_worker_count()
+
+    run = BacktestRun.objects.create(
+        parameters={
+            'origins': origins,
+            'horizon': horizon,
+            'training_days': training_days,
+            'model_types': model_types,
+            'product_ids': product_ids,
+            'category_id': category_id,
+        },
+        created_by=user
+    )
+
+    try:
+        products = Product.objects.filter(is_active=True)
+        if product_ids:
+            products = products.filter(id__in=product_ids)
+        elif category_id:
+            products = products.filter(category_id=category_id)
+        ids = list(products.order_by('id').values_list('id', flat=True))
+
+        run.status = 'RUNNING'
+        run.started_at = timezone.now()
+        run.total_products = len(ids)
+        run.save(update_fields=['status', 'started_at', 'total_products'])
+
+        # History up to yesterday, today has not closed yet
+        history_days = training_days + (origins - 1) * horizon + horizon
+        history_start, quantities, _ = load_sales_histories(ids, days=history_days)
+        quantities = quantities[:, :-1]
+        last_origin = quantities.shape[1] - horizon
+        origin_days = [last_origin - k * horizon for k in reversed(range(origins))]
+
+        tasks = [
+            {
+                'history_start': history_start,
+                'quantities': quantities[offset:offset + chunk_size],
+                'product_ids': ids[offset:offset + chunk_size],
+                'origins': origin_days,
+                'horizon': horizon,
+                'training_days': training_days,
+                'model_types': model_types,
+            }
+            for offset in range(0, len(ids), chunk_size)
+        ]
+
+        results = []
+        for chunk in _run_tasks(tasks, workers, worker=backtest_product_chunk):
+            results.extend(chunk)
+
+        with transaction.atomic():
+            BacktestResult.objects.bulk_create([
+                BacktestResult(run=run, **result) for result in results
+            ], batch_size=1000)
+            run.summary = summarize_results(results)
+            run.status = 'COMPLETED'
+            run.completed_at = timezone.now()
+            run.save(update_fields=['summary', 'status', 'completed_at'])
+
+    except Exception as e:
+        traceback.print_exc()
+        BacktestRun.objects.filter(pk=run.pk).update(
+            status='FAILED',
+            error_message=str(e),
+            completed_at=timezone.now()
+        )
+        run.refresh_from_db()
+
+    return run
@@ -0,0 +1,192 @@
+"""
+Forecasting pipeline benchmarks
+Builds synthetic sales histories at several catalog sizes and history
+lengths and measures each forecasting stage: wall time, peak Python memory
+(tracemalloc) and database queries. Everything is written inside a
+transaction that is rolled back, so benchmarks can run against any database.
+Results are saved as JSON baselines and compared on later runs so that
+regressions show up before a deploy.
+"""
+import contextlib
+import io
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from inventory.models import Category, Product
+from pos.models import ProductSalesDaily
+from .ml_utils import load_sales_histories, predict_demand, prepare_training_data, train_linear_regression_model
+
+# (products, days of history)
+BENCHMARK_SCALES = ((50, 90), (50, 365), (500, 90), (500, 365), (5000, 90), (5000, 365))
+# Per-product stages are timed on this many products of each catalog
+BENCHMARK_SAMPLE = 20
+# Allowed slowdown against the baseline before a stage counts as a regression
+BENCHMARK_TOLERANCE = 0.25
+SYNTHETIC_BATCH_SIZE = 500
+
+
+def create_synthetic_catalog(products, days, rng):
+    """
+    Products with Poisson daily sales around a weekly cycle, written to the daily rollup
+    Returns: the created products, in id order
+    """
+    category = Category.objects.create(name=f'Benchmark {timezone.now():%Y%m%d%H%M%S%f}')
+    Product.objects.bulk_create([
+        Product(
+            sku=f'BENCH-{category.id}-{i:05d}',
+            name=f'Benchmark product {i}',
+            category=category,
+            unit_price=100,
+            cost_price=50,
+            current_stock=100,
+            reorder_level=10
+        )
+        for i in range(products)
+    ], batch_size=SYNTHETIC_BATCH_SIZE)
+    created = list(Product.objects.filter(category=category).order_by('id'))
+
+    today = timezone.now().date()
+    dates = [today - timedelta(days=day) for day in range(days, -1, -1)]
+    weekly = 1 + 0.5 * np.sin(2 * np.pi * np.arange(len(dates)) / 7)
+
+    for offset in range(0, len(created), SYNTHETIC_BATCH_SIZE):
+        batch = created[offset:offset + SYNTHETIC_BATCH_SIZE]
+        base = rng.uniform(1, 8, size=(len(batch), 1))
+        quantities = rng.poisson(base * weekly)
+        ProductSalesDaily.objects.bulk_create([
+            ProductSalesDaily(
+                product_id=product.id,
+                business_date=dates[day],
+                quantity=int(quantities[i, day]),
+                revenue=int(quantities[i, day]) * 100,
+                cost=int(quantities[i, day]) * 50
+            )
+            for i, product in enumerate(batch)
+            for day in np.flatnonzero(quantities[i])
+        ], batch_size=5000)
+
+    return created
+
+
+def measure(stage, calls):
+    """
+    Time `calls` (zero-argument callables) with their query count, then rerun
+    the first one under tracemalloc for its peak memory
+    Returns: result row for the stage
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for call in calls:
+                call()
+            seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        try:
+            calls[0]()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'stage': stage,
+        'calls': len(calls),
+        'seconds': seconds,
+        'ms_per_call': seconds * 1000 / len(calls),
+        'peak_kib': peak / 1024,
+        'queries_per_call': len(queries) / len(calls),
+    }
+
+
+def benchmark_scale(products, days, sample=BENCHMARK_SAMPLE, seed=0):
+    """Measure every stage on one synthetic catalog, rolled back afterwards"""
+    from .views import GenerateForecastView
+
+    rng = np.random.default_rng(seed)
+    rows = []
+    with transaction.atomic():
+        catalog = create_synthetic_catalog(products, days, rng)
+        product_ids = [product.id for product in catalog]
+        sampled = catalog[:sample]
+        forecast_date = timezone.now().date() + timedelta(days=1)
+
+        rows.append(measure('load_sales_histories', [
+            lambda: load_sales_histories(product_ids, days)
+        ]))
+        rows.append(measure('prepare_training_data', [
+            lambda product=product: prepare_training_data(product, days) for product in sampled
+        ]))
+        rows.append(measure('train_linear_regression_model', [
+            lambda product=product: train_linear_regression_model(product, days) for product in sampled
+        ]))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            model, scaler, _, _ = train_linear_regression_model(sampled[0], days)
+        _, histories, _ = load_sales_histories([p.id for p in sampled], days)
+        rows.append(measure('predict_demand', [
+            lambda i=i, product=product: predict_demand(
+                model, scaler, product, forecast_date, histories[i].tolist()
+            )
+            for i, product in enumerate(sampled)
+        ]))
+
+        # Through the API view, the first call per product also trains and registers its model
+        user = get_user_model().objects.create_user(
+            username=f'benchmark-{catalog[0].category_id}',
+            email=f'benchmark-{catalog[0].category_id}@example.com',
+            password=None,
+            role='OWNER'
+        )
+        factory = APIRequestFactory()
+        view = GenerateForecastView.as_view()
+
+        def generate(product):
+            request = factory.post('/api/forecasting/generate/', {
+                'product_id': product.id, 'forecast_days': 30, 'training_days': days
+            }, format='json')
+            force_authenticate(request, user=user)
+            return view(request)
+
+        rows.append(measure('generate_forecast_view', [
+            lambda product=product: generate(product) for product in sampled
+        ]))
+
+        transaction.set_rollback(True)
+
+    for row in rows:
+        row.update(products=products, days=days)
+    return rows
+
+
+def run_benchmarks(scales=BENCHMARK_SCALES, sample=BENCHMARK_SAMPLE, seed=0):
+    """Benchmark every (products, days) scale, returns one row per scale and stage"""
+    results = []
+    for products, days in scales:
+        results.extend(benchmark_scale(products, days, sample=sample, seed=seed))
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=BENCHMARK_TOLERANCE):
+    """
+    Stages that got slower by more than `tolerance`, or now run more queries,
+    than the matching baseline row. Rows without a baseline are skipped.
+    """
+    previous = {(row['products'], row['days'], row['stage']): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row['products'], row['days'], row['stage']))
+        if before is None:
+            continue
+        slower = row['ms_per_call'] > before['ms_per_call'] * (1 + tolerance)
+        more_queries = row['queries_per_call'] > before['queries_per_call']
+        if slower or more_queries:
+            regressions.append({**row, 'baseline': before})
+    return regressions
@@ -0,0 +1,105 @@
+"""
+Intraday demand forecasting
+Expected transactions and units per hour of the day, for staffing and for
+pre-making arrangements. Every weekday gets an hour-of-day profile from the
+last weeks of the hourly sales rollup, weighted toward recent weeks, fitted
+with one query and a few array operations so it can be refreshed hourly.
+Where the daily forecast expects a busier day than the weekday usually is,
+as on peak days, the profile is scaled up to match.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+
+from pos.models import SalesHourly
+from .runs import load_forecast_grid
+
+HOURLY_PROFILE_WEEKS = 8
+HOURLY_HALF_LIFE_WEEKS = 4
+HOURLY_CACHE_KEY = 'forecasting:hourly:{date}'
+HOURLY_CACHE_TIMEOUT = 60 * 60
+
+
+def load_hourly_history(until, weeks=HOURLY_PROFILE_WEEKS):
+    """
+    Hourly sales for the `weeks` weeks before `until`
+    Returns: start_date, transactions and quantities as (days x 24) matrices
+    """
+    start_date = until - timedelta(weeks=weeks)
+    transactions = np.zeros((weeks * 7, 24))
+    quantities = np.zeros((weeks * 7, 24))
+
+    rows = list(SalesHourly.objects.filter(
+        business_date__gte=start_date,
+        business_date__lt=until
+    ).values_list('business_date', 'hour', 'transactions', 'quantity'))
+
+    if rows:
+        dates, hours, counts, units = zip(*rows)
+        days = [(business_date - start_date).days for business_date in dates]
+        transactions[days, hours] = counts
+        quantities[days, hours] = units
+
+    return start_date, transactions, quantities
+
+
+def fit_hourly_profiles(start_date, transactions, quantities, half_life_weeks=HOURLY_HALF_LIFE_WEEKS):
+    """
+    Recency-weighted mean of every weekday's hours. Days without a single
+    sale (closed, or before the history starts) are left out.
+    Returns: (7 x 24) expected transactions and quantities, Monday first
+    """
+    days = transactions.shape[0]
+    weekday = (start_date.weekday() + np.arange(days)) % 7
+    age_weeks = (days - 1 - np.arange(days)) / 7
+    weights = 0.5 ** (age_weeks / half_life_weeks) * (transactions.sum(axis=1) > 0)
+
+    # (days x 7) weights, one column per weekday
+    membership = (weekday[:, None] == np.arange(7)) * weights[:, None]
+    total_weight = np.maximum(membership.sum(axis=0), 1e-9)[:, None]
+    return membership.T @ transactions / total_weight, membership.T @ quantities / total_weight
+
+
+def forecast_hourly_demand(forecast_date, weeks=HOURLY_PROFILE_WEEKS):
+    """
+    Expected load per hour on `forecast_date`, cached for an hour
+    Returns: dict with the day's scale against its usual weekday and a row per hour
+    """
+    key = HOURLY_CACHE_KEY.format(date=forecast_date.isoformat())
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    today = timezone.now().date()
+    start_date, transactions, quantities = load_hourly_history(min(today, forecast_date), weeks)
+    profile_transactions, profile_quantities = fit_hourly_profiles(start_date, transactions, quantities)
+
+    weekday = forecast_date.weekday()
+    hourly_transactions = profile_transactions[weekday]
+    hourly_quantities = profile_quantities[weekday]
+
+    # Daily product forecasts that add up to more than a usual day scale the hours up
+    _, grid = load_forecast_grid(None, forecast_date, 1, fields=('predicted_demand',))
+    forecast_total = grid['predicted_demand'][grid['covered']].sum()
+    usual_total = hourly_quantities.sum()
+    scale = max(forecast_total / usual_total, 1.0) if usual_total > 0 else 1.0
+
+    result = {
+        'date': forecast_date,
+        'scale': round(float(scale), 3),
+        'expected_transactions': round(float(hourly_transactions.sum() * scale), 1),
+        'expected_quantity': round(float(hourly_quantities.sum() * scale), 1),
+        'peak_hour': int(hourly_transactions.argmax()) if hourly_transactions.any() else None,
+        'hours': [
+            {
+                'hour': hour,
+                'expected_transactions': round(float(hourly_transactions[hour] * scale), 2),
+                'expected_quantity': round(float(hourly_quantities[hour] * scale), 2),
+            }
+            for hour in range(24)
+        ]
+    }
+    cache.set(key, result, HOURLY_CACHE_TIMEOUT)
+    return result
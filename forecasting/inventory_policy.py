@@ -0,0 +1,259 @@
+"""
+Monte Carlo reorder level tuning
+Simulates thousands of demand paths per product, drawn from the current
+forecast plus resampled forecast residuals, and replays a reorder policy
+for a grid of candidate reorder levels at once. Stock is tracked by days of
+shelf life left, so perishable flowers spoil on the shelf when ordered too
+early. The level with the lowest expected cost of lost sales and spoiled
+stock is proposed for every product.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from inventory.models import InventoryMovement, Product
+from .ml_utils import load_sales_histories
+from .models import ProductForecast, ReorderLevelProposal
+from .runs import load_forecast_grid
+
+SIMULATION_PATHS = 1000
+SIMULATION_HORIZON = 30
+# Suppliers deliver the day after an order is placed
+LEAD_TIME_DAYS = 1
+# Each order covers this many days of average demand
+ORDER_COVER_DAYS = 3
+# Candidate reorder levels, in days of average demand
+CANDIDATE_COVER_DAYS = (0, 0.5, 1, 1.5, 2, 3, 4, 5, 7, 10)
+# Realized forecast errors drawn from, products with fewer fall back to Poisson noise
+RESIDUAL_DAYS = 90
+MIN_RESIDUALS = 14
+# Products simulated together, bounds the (products, paths, levels, shelf life) stock array
+SIMULATION_CHUNK_SIZE = 20
+
+
+def simulate_reorder_levels(mean_demand, residuals, residual_counts, initial_stock, initial_life,
+                            shelf_life, levels, order_quantity, paths=SIMULATION_PATHS,
+                            lead_time=LEAD_TIME_DAYS, rng=None):
+    """
+    Replay a reorder-point policy over random demand paths for every product and candidate level
+    mean_demand: (products, days) forecast demand
+    residuals: (products, R) forecast errors, the first residual_counts[i] of row i are valid
+    initial_stock, initial_life: stock on hand and its days of shelf life left (0 spoils
+        tonight), per product
+    shelf_life: days a delivery can be sold on, at least 1, per product
+    levels: (products, K) candidate reorder levels
+    order_quantity: units ordered when stock on hand and on order falls to the level, per product
+    Returns: dict of (products, K) arrays
+    """
+    rng = rng or np.random.default_rng()
+    n, horizon = mean_demand.shape
+    k = levels.shape[1]
+
+    # Demand paths: forecast plus a resampled residual, or Poisson noise without enough history
+    draws = rng.integers(0, np.maximum(residual_counts, 1)[:, None, None], size=(n, paths, horizon))
+    noise = np.take_along_axis(residuals[:, None, :], draws.reshape(n, 1, -1), axis=2).reshape(n, paths, horizon)
+    demand = np.where(
+        (residual_counts >= MIN_RESIDUALS)[:, None, None],
+        np.rint(mean_demand[:, None, :] + noise),
+        rng.poisson(np.maximum(mean_demand, 0)[:, None, :], size=(n, paths, horizon))
+    ).clip(min=0).astype(np.int32)
+
+    # Stock by days of shelf life left, deliveries come in at their product's shelf life
+    fresh = shelf_life - 1
+    buckets = int(max(fresh.max(), initial_life.max())) + 1
+    rows = np.arange(n)
+    stock = np.zeros((n, paths, k, buckets), dtype=np.int32)
+    stock[rows, :, :, initial_life] = initial_stock[:, None, None]
+    pipeline = np.zeros((n, paths, k, lead_time), dtype=np.int32)
+
+    lost = np.zeros((n, paths, k), dtype=np.int64)
+    stockout_days = np.zeros((n, paths, k), dtype=np.int64)
+    spoiled = np.zeros((n, paths, k), dtype=np.int64)
+    received = np.zeros((n, paths, k), dtype=np.int64)
+    levels = levels[:, None, :]
+    order_quantity = order_quantity[:, None, None].astype(np.int32)
+
+    for day in range(horizon):
+        # Morning delivery
+        stock[rows, :, :, fresh] += pipeline[..., 0]
+        received += pipeline[..., 0]
+        pipeline = np.roll(pipeline, -1, axis=-1)
+        pipeline[..., -1] = 0
+
+        # Sell the stock closest to spoiling first
+        wanted = demand[:, :, day][:, :, None, None]
+        on_hand = stock.sum(axis=-1)
+        before = np.cumsum(stock, axis=-1) - stock
+        stock -= np.clip(wanted - before, 0, stock)
+        unmet = np.maximum(wanted[..., 0] - on_hand, 0)
+        lost += unmet
+        stockout_days += unmet > 0
+
+        # Evening: stock with no shelf life left is thrown away, the rest ages a day
+        spoiled += stock[..., 0]
+        stock = np.roll(stock, -1, axis=-1)
+        stock[..., -1] = 0
+
+        # Reorder when stock on hand plus on order is at or below the level
+        position = stock.sum(axis=-1) + pipeline.sum(axis=-1)
+        pipeline[..., -1] += np.where(position <= levels, order_quantity, 0)
+
+    total_demand = demand.sum(axis=2)[:, :, None]
+    supply = received + initial_stock[:, None, None]
+    return {
+        'stockout_rate': stockout_days.mean(axis=1) / horizon,
+        'fill_rate': 1 - lost.sum(axis=1) / np.maximum(total_demand.sum(axis=1), 1),
+        'spoilage_rate': spoiled.sum(axis=1) / np.maximum(supply.sum(axis=1), 1),
+        'lost_units': lost.mean(axis=1),
+        'spoiled_units': spoiled.mean(axis=1),
+    }
+
+
+def load_shelf_lives(products, today, horizon):
+    """
+    Shelf life of a delivery and of the stock on hand, in days, from each product's
+    expiry date and its latest stock-in. Products without an expiry date outlast the horizon.
+    """
+    received = dict(InventoryMovement.objects.filter(
+        product_id__in=[product['id'] for product in products],
+        movement_type='STOCK_IN'
+    ).values('product_id').annotate(last=Max('created_at')).values_list('product_id', 'last').order_by())
+
+    keeps = horizon + 1
+    shelf_life = np.full(len(products), keeps)
+    initial_life = np.full(len(products), keeps)
+    for i, product in enumerate(products):
+        if product['expiry_date'] is None:
+            continue
+        last_received = received.get(product['id'], product['created_at'])
+        shelf_life[i] = (product['expiry_date'] - timezone.localdate(last_received)).days + 1
+        initial_life[i] = (product['expiry_date'] - today).days
+    return np.clip(shelf_life, 1, keeps), initial_life
+
+
+def load_residuals(product_ids, today):
+    """Recent realized forecast errors per product, as a padded matrix and counts"""
+    errors = {}
+    for product_id, error in ProductForecast.objects.filter(
+        product_id__in=product_ids,
+        forecast_error__isnull=False,
+        forecast_date__gte=today - timedelta(days=RESIDUAL_DAYS)
+    ).values_list('product_id', 'forecast_error'):
+        errors.setdefault(product_id, []).append(error)
+
+    counts = np.array([len(errors.get(product_id, [])) for product_id in product_ids])
+    residuals = np.zeros((len(product_ids), max(counts.max(initial=0), 1)))
+    for i, product_id in enumerate(product_ids):
+        residuals[i, :counts[i]] = errors.get(product_id, [])
+    return residuals, counts
+
+
+def propose_reorder_levels(product_ids=None, category_id=None, paths=SIMULATION_PATHS,
+                           horizon=SIMULATION_HORIZON, seed=None):
+    """
+    Simulate the selected active products and replace their pending proposals.
+    Demand is the current forecast, or the last four weeks' average where there is none.
+    Products that have not sold in that time are skipped.
+    Returns: proposals created
+    """
+    today = timezone.now().date()
+    products = Product.objects.filter(is_active=True)
+    if product_ids:
+        products = products.filter(id__in=product_ids)
+    elif category_id:
+        products = products.filter(category_id=category_id)
+    products = list(products.order_by('id').values(
+        'id', 'current_stock', 'reorder_level', 'expiry_date', 'created_at', 'unit_price', 'cost_price'
+    ))
+    ids = [product['id'] for product in products]
+    if not ids:
+        return []
+
+    # Today has not closed yet, the fallback averages the four weeks before it
+    _, grid = load_forecast_grid(ids, today + timedelta(days=1), horizon, fields=('predicted_demand',))
+    _, history, _ = load_sales_histories(ids, days=28)
+    recent = history[:, :-1].mean(axis=1)
+    mean_demand = np.where(grid['covered'], grid['predicted_demand'], recent[:, None]).astype(float)
+    average = mean_demand.mean(axis=1)
+
+    selling = np.flatnonzero(average > 0)
+    products = [products[i] for i in selling]
+    mean_demand, average = mean_demand[selling], average[selling]
+    ids = [product['id'] for product in products]
+    if not ids:
+        return []
+
+    shelf_life, initial_life = load_shelf_lives(products, today, horizon)
+    residuals, residual_counts = load_residuals(ids, today)
+    current_level = np.array([product['reorder_level'] or 0 for product in products])
+    initial_stock = np.array([product['current_stock'] or 0 for product in products])
+    # Stock past its expiry date cannot be sold
+    initial_stock = np.where(initial_life < 0, 0, initial_stock)
+    # Stock lasting past the horizon never spoils in it, capped like shelf_life to bound the buckets
+    initial_life = np.clip(initial_life, 0, horizon + 1)
+
+    # Candidate levels in days of demand, plus today's level to compare against
+    levels = np.concatenate([
+        np.rint(average[:, None] * np.array(CANDIDATE_COVER_DAYS)[None, :]),
+        current_level[:, None]
+    ], axis=1).astype(np.int32)
+    levels.sort(axis=1)
+    order_quantity = np.maximum(np.ceil(average * ORDER_COVER_DAYS), 1)
+    margin = np.array([float(p['unit_price'] - p['cost_price']) for p in products]).clip(min=0)
+    unit_cost = np.array([float(p['cost_price']) for p in products])
+
+    rng = np.random.default_rng(seed)
+    proposals = []
+    for offset in range(0, len(ids), SIMULATION_CHUNK_SIZE):
+        chunk = slice(offset, offset + SIMULATION_CHUNK_SIZE)
+        results = simulate_reorder_levels(
+            mean_demand[chunk], residuals[chunk], residual_counts[chunk],
+            initial_stock[chunk], initial_life[chunk], shelf_life[chunk],
+            levels[chunk], order_quantity[chunk], paths=paths, rng=rng
+        )
+
+        # Lost margin against spoiled cost, ties go to the lower level
+        cost = results['lost_units'] * margin[chunk, None] + results['spoiled_units'] * unit_cost[chunk, None]
+        best = cost.argmin(axis=1)
+        current = (levels[chunk] == current_level[chunk, None]).argmax(axis=1)
+
+        for j, product in enumerate(products[chunk]):
+            i = offset + j
+            proposals.append(ReorderLevelProposal(
+                product_id=product['id'],
+                current_reorder_level=int(current_level[i]),
+                proposed_reorder_level=int(levels[i, best[j]]),
+                shelf_life_days=int(shelf_life[i]) if product['expiry_date'] else None,
+                current_stockout_rate=float(results['stockout_rate'][j, current[j]]),
+                current_spoilage_rate=float(results['spoilage_rate'][j, current[j]]),
+                stockout_rate=float(results['stockout_rate'][j, best[j]]),
+                spoilage_rate=float(results['spoilage_rate'][j, best[j]]),
+                paths=paths,
+                horizon_days=horizon
+            ))
+
+    with transaction.atomic():
+        ReorderLevelProposal.objects.filter(product_id__in=ids, status='PENDING').delete()
+        return ReorderLevelProposal.objects.bulk_create(proposals, batch_size=1000)
+
+
+@transaction.atomic
+def apply_reorder_proposals(proposals):
+    """
+    Copy pending proposed levels onto their products in bulk
+    Returns: number of products updated
+    """
+    proposals = list(proposals.filter(status='PENDING').select_related('product'))
+    products = []
+    for proposal in proposals:
+        proposal.product.reorder_level = proposal.proposed_reorder_level
+        products.append(proposal.product)
+        proposal.status = 'APPLIED'
+        proposal.applied_at = timezone.now()
+
+    Product.objects.bulk_update(products, ['reorder_level'], batch_size=1000)
+    ReorderLevelProposal.objects.bulk_update(proposals, ['status', 'applied_at'], batch_size=1000)
+    return len(products)
@@ -0,0 +1,308 @@
+"""
+Bulk forecast job runner
+Fans the selected products out across a process pool in chunks and
+writes the results back in bulk. Jobs run on a thread of the process that
+queued them, so a worker restart kills them silently; jobs that stop
+reporting progress are marked failed by fail_stale_jobs, for the polled job
+by the job detail view and for all of them by fail_stale_forecast_jobs.
+"""
+import multiprocessing
+import os
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventory.models import Product
+from .aggregation import refresh_category_forecasts
+from .models import ForecastJob, ForecastModel, ForecastRun
+from .ml_utils import load_sales_histories, forecast_product_chunk
+from .recommendations import generate_recommendations
+from .registry import retire_models
+from .seasonality import get_seasonal_calendar
+from .summaries import refresh_forecast_summaries
+
+
+def get_worker_count():
+    """Number of worker processes used for bulk forecasting"""
+    return getattr(settings, 'FORECAST_JOB_WORKERS', None) or os.cpu_count() or 1
+
+
+def select_job_products(parameters):
+    """Active products selected by a job's parameters"""
+    products = Product.objects.filter(is_active=True)
+
+    if parameters.get('product_ids'):
+        products = products.filter(id__in=parameters['product_ids'])
+    elif parameters.get('category_id'):
+        products = products.filter(category_id=parameters['category_id'])
+
+    return products.order_by('id')
+
+
+def _stale_minutes(minutes):
+    if minutes is None:
+        minutes = getattr(settings, 'FORECAST_JOB_STALE_MINUTES', 30)
+    return minutes
+
+
+def is_job_stale(job, minutes=None):
+    """Whether an unfinished job has not started or reported progress within `minutes`"""
+    cutoff = timezone.now() - timedelta(minutes=_stale_minutes(minutes))
+    last_seen = job.heartbeat_at or job.started_at or job.created_at
+    return job.status in ('PENDING', 'RUNNING') and last_seen < cutoff
+
+
+def fail_stale_jobs(minutes=None, jobs=None):
+    """
+    Mark jobs failed that were never picked up, or stopped reporting progress,
+    within `minutes` (defaults to FORECAST_JOB_STALE_MINUTES)
+    jobs: queryset to check, every job by default
+    Returns: number of jobs failed
+    """
+    minutes = _stale_minutes(minutes)
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    jobs = ForecastJob.objects.all() if jobs is None else jobs
+    return jobs.alias(
+        last_seen=Coalesce('heartbeat_at', 'started_at', 'created_at')
+    ).filter(
+        Q(status='PENDING') | Q(status='RUNNING'),
+        last_seen__lt=cutoff
+    ).update(
+        status='FAILED',
+        error_message=f'No progress for {minutes} minutes, the worker running the job stopped',
+        completed_at=timezone.now()
+    )
+
+
+def start_forecast_job(job):
+    """Run the job on a background thread once the creating transaction commits"""
+    def launch():
+        threading.Thread(
+            target=_run_in_background,
+            args=(job.id,),
+            daemon=True
+        ).start()
+
+    transaction.on_commit(launch)
+
+
+def _run_in_background(job_id):
+    try:
+        run_forecast_job(job_id)
+    finally:
+        # Threads get their own connection, release it when the job ends
+        connection.close()
+
+
+def run_forecast_job(job_id, workers=None):
+    """Forecast every product selected by the job and record progress"""
+    job = ForecastJob.objects.get(pk=job_id)
+    parameters = job.parameters
+    forecast_days = parameters.get('forecast_days', 30)
+    training_days = parameters.get('training_days', 90)
+    model_type = parameters.get('model_type', 'LINEAR_REGRESSION')
+    chunk_size = getattr(settings, 'FORECAST_JOB_CHUNK_SIZE', 50)
+    workers = workers or get_worker_count()
+
+    try:
+        products = list(
+            select_job_products(parameters).values('id', 'name', 'current_stock', 'category_id')
+        )
+
+        job.status = 'RUNNING'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.total_products = len(products)
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'total_products'])
+
+        history_start, quantities, sale_days = load_sales_histories(
+            [p['id'] for p in products],
+            days=training_days
+        )
+        forecast_start = timezone.now().date() + timedelta(days=1)
+        calendar = get_seasonal_calendar()
+        seasonality = {
+            product['id']: calendar.lookup(product['category_id'], forecast_start, forecast_days)
+            for product in products
+        }
+
+        tasks = []
+        for offset in range(0, len(products), chunk_size):
+            tasks.append({
+                'history_start': history_start,
+                'forecast_start': forecast_start,
+                'forecast_days': forecast_days,
+                'training_days': training_days,
+                'model_type': model_type,
+                'items': [
+                    {
+                        'product_id': product['id'],
+                        'current_stock': product['current_stock'],
+                        'quantities': quantities[offset + i],
+                        'sale_days': int(sale_days[offset + i]),
+                        'seasonal_factors': seasonality[product['id']][1],
+                    }
+                    for i, product in enumerate(products[offset:offset + chunk_size])
+                ]
+            })
+
+        products_by_id = {p['id']: p for p in products}
+
+        for results in _run_tasks(tasks, workers):
+            _save_chunk_results(
+                job, results, products_by_id, seasonality,
+                forecast_start, history_start, training_days
+            )
+
+        refresh_category_forecasts({p['category_id'] for p in products if p['category_id']}, forecast_start)
+
+        if parameters.get('generate_recommendations'):
+            job.recommendations_generated = generate_recommendations([p['id'] for p in products])
+
+        job.status = 'COMPLETED'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'completed_at', 'recommendations_generated'])
+
+    except Exception as e:
+        traceback.print_exc()
+        ForecastJob.objects.filter(pk=job.pk).update(
+            status='FAILED',
+            error_message=str(e),
+            completed_at=timezone.now()
+        )
+
+    job.refresh_from_db()
+    return job
+
+
+def _run_tasks(tasks, workers, worker=forecast_product_chunk):
+    """Yield chunk results as they finish, in-process when only one worker is available"""
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield worker(task)
+        return
+
+    # Spawned workers do not inherit the parent's open database connections
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        futures = [executor.submit(worker, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+@transaction.atomic
+def _save_chunk_results(job, results, products_by_id, seasonality,
+                        forecast_start, history_start, training_days):
+    """Persist one chunk of worker results with bulk inserts"""
+    successful = [r for r in results if 'predictions' in r]
+
+    for result in results:
+        if 'error' in result:
+            job.errors.append({
+                'product': products_by_id[result['product_id']]['name'],
+                'error': result['error']
+            })
+
+    # Refit each product's champion in place when it is of the fitted type, replace it otherwise
+    product_ids = [r['product_id'] for r in successful]
+    forecast_models = {
+        forecast_model.product_id: forecast_model
+        for forecast_model in ForecastModel.objects.filter(
+            product_id__in=product_ids, slot='CHAMPION', is_active=True
+        )
+    }
+    replaced = [
+        r['product_id'] for r in successful
+        if r['product_id'] in forecast_models
+        and forecast_models[r['product_id']].model_type != r['model_type']
+    ]
+    retire_models(replaced)
+    for product_id in replaced:
+        del forecast_models[product_id]
+
+    # Reused models take this run's fit, so stored weights and metrics match the forecasts
+    refitted = []
+    for r in successful:
+        forecast_model = forecast_models.get(r['product_id'])
+        if forecast_model is None:
+            continue
+        # A refit starts a new least-squares solution, any online-update state no longer applies
+        parameters = {k: v for k, v in forecast_model.parameters.items() if k != 'rls'}
+        forecast_model.parameters = {**parameters, 'training_days': training_days, **r['parameters']}
+        for metric in ('r2_score', 'mse', 'rmse', 'mae', 'accuracy'):
+            setattr(forecast_model, metric, r['metrics'][metric])
+        forecast_model.training_start_date = history_start
+        forecast_model.training_end_date = history_start + timedelta(days=training_days)
+        forecast_model.training_samples = r['training_info']['training_samples']
+        refitted.append(forecast_model)
+    ForecastModel.objects.bulk_update(refitted, [
+        'parameters', 'r2_score', 'mse', 'rmse', 'mae', 'accuracy',
+        'training_start_date', 'training_end_date', 'training_samples'
+    ])
+
+    retrain_reasons = job.parameters.get('retrain_reasons', {})
+    version = f"v{timezone.now().strftime('%Y%m%d%H%M%S')}"
+    new_models = [
+        ForecastModel(
+            name=f"{products_by_id[r['product_id']]['name']} Forecast Model",
+            product_id=r['product_id'],
+            slot='CHAMPION',
+            model_type=r['model_type'],
+            version=version,
+            status='ACTIVE',
+            parameters={
+                'training_days': training_days,
+                **r['parameters']
+            },
+            r2_score=r['metrics']['r2_score'],
+            mse=r['metrics']['mse'],
+            rmse=r['metrics']['rmse'],
+            mae=r['metrics']['mae'],
+            accuracy=r['metrics']['accuracy'],
+            training_start_date=history_start,
+            training_end_date=history_start + timedelta(days=training_days),
+            training_samples=r['training_info']['training_samples'],
+            trained_by=job.created_by,
+            is_active=True,
+            retrain_reason=retrain_reasons.get(str(r['product_id']), '')
+        )
+        for r in successful
+        if r['product_id'] not in forecast_models
+    ]
+    for forecast_model in ForecastModel.objects.bulk_create(new_models):
+        forecast_models[forecast_model.product_id] = forecast_model
+
+    # One packed run per product holds the whole horizon
+    runs = []
+    for result in successful:
+        is_peak, seasonal_factors = seasonality[result['product_id']]
+        predictions, conf_lower, conf_upper = np.array(result['predictions'], dtype=np.int64).reshape(-1, 3).T
+        runs.append(ForecastRun.pack(
+            predictions, conf_lower, conf_upper, is_peak, seasonal_factors,
+            product_id=result['product_id'],
+            forecast_model=forecast_models[result['product_id']],
+            start_date=forecast_start
+        ))
+
+    ForecastRun.bulk_upsert(runs)
+    refresh_forecast_summaries([r['product_id'] for r in results])
+
+    ForecastModel.objects.filter(
+        pk__in=[m.pk for m in forecast_models.values()]
+    ).update(last_used=timezone.now())
+
+    ForecastJob.objects.filter(pk=job.pk).update(
+        processed_products=F('processed_products') + len(results),
+        forecasts_generated=F('forecasts_generated') + sum(run.days for run in runs),
+        errors=job.errors,
+        heartbeat_at=timezone.now()
+    )
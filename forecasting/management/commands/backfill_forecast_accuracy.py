@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from forecasting.accuracy import backfill_actual_demand
+
+
+class Command(BaseCommand):
+    help = 'Fill in actual demand and forecast errors for past forecast dates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Only backfill forecasts dated before this day (YYYY-MM-DD, defaults to today)')
+        parser.add_argument('--recompute', action='store_true',
+                            help='Recompute forecasts that already have actual demand')
+
+    def handle(self, *args, **options):
+        updated = backfill_actual_demand(
+            until=options['until'],
+            recompute=options['recompute']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Backfilled actual demand for {updated} forecasts"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.backtesting import (
+    BACKTEST_HORIZON, BACKTEST_ORIGINS, BACKTEST_TRAINING_DAYS, run_backtest
+)
+from forecasting.ml_utils import BACKTESTERS
+
+
+class Command(BaseCommand):
+    help = 'Rolling-origin backtest of every forecasting model type, reporting accuracy and fit/predict time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--origins', type=int, default=BACKTEST_ORIGINS,
+                            help='Number of forecast origins, one horizon apart')
+        parser.add_argument('--horizon', type=int, default=BACKTEST_HORIZON,
+                            help='Days forecast from each origin')
+        parser.add_argument('--training-days', type=int, default=BACKTEST_TRAINING_DAYS)
+        parser.add_argument('--model-type', action='append', dest='model_types',
+                            choices=list(BACKTESTERS), help='Only backtest this model type (repeatable)')
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Only backtest this product (repeatable)')
+        parser.add_argument('--category', type=int, help='Only backtest products in this category')
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to CPU count)')
+
+    def handle(self, *args, **options):
+        run = run_backtest(
+            origins=options['origins'],
+            horizon=options['horizon'],
+            training_days=options['training_days'],
+            model_types=options['model_types'],
+            product_ids=options['products'],
+            category_id=options['category'],
+            workers=options['workers']
+        )
+
+        if run.status != 'COMPLETED':
+            self.stderr.write(self.style.ERROR(f"Backtest #{run.id} failed: {run.error_message}"))
+            return
+
+        def number(value, digits=2):
+            return '-' if value is None else f"{value:.{digits}f}"
+
+        self.stdout.write(f"{'Model':<20}{'Products':>9}{'MAE':>9}{'RMSE':>9}{'MAPE %':>9}{'Fit s':>9}{'Predict s':>11}")
+        for model_type, row in run.summary.items():
+            self.stdout.write(
+                f"{model_type:<20}{row['products']:>9}{number(row['mae']):>9}{number(row['rmse']):>9}"
+                f"{number(row['mape'], 1):>9}{number(row['fit_seconds'], 3):>9}{number(row['predict_seconds'], 3):>11}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Backtest #{run.id} scored {run.total_products} products"))
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from forecasting.benchmarks import (
+    BENCHMARK_SAMPLE, BENCHMARK_SCALES, BENCHMARK_TOLERANCE, compare_to_baseline, run_benchmarks
+)
+
+
+def scale(value):
+    products, _, days = value.partition('x')
+    return int(products), int(days)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the forecasting pipeline on synthetic catalogs: wall time, peak memory and queries per stage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=scale, action='append', dest='scales',
+                            help='PRODUCTSxDAYS to benchmark, e.g. 500x365 (repeatable, defaults to every scale)')
+        parser.add_argument('--sample', type=int, default=BENCHMARK_SAMPLE,
+                            help='Products per catalog that per-product stages are timed on')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--save', metavar='PATH', help='Write the results as a baseline')
+        parser.add_argument('--compare', metavar='PATH', help='Fail on regressions against this baseline')
+        parser.add_argument('--tolerance', type=float, default=BENCHMARK_TOLERANCE,
+                            help='Allowed slowdown per call before a stage counts as a regression')
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(
+            scales=options['scales'] or BENCHMARK_SCALES,
+            sample=options['sample'],
+            seed=options['seed']
+        )
+
+        self.stdout.write(f"{'Products':>9}{'Days':>6}  {'Stage':<32}{'Calls':>6}{'ms/call':>11}{'Peak KiB':>11}{'Queries':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['products']:>9}{row['days']:>6}  {row['stage']:<32}{row['calls']:>6}"
+                f"{row['ms_per_call']:>11.2f}{row['peak_kib']:>11.1f}{row['queries_per_call']:>9.1f}"
+            )
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} results to {options['save']}"))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                regressions = compare_to_baseline(results, json.load(f), options['tolerance'])
+
+            for row in regressions:
+                before = row['baseline']
+                self.stderr.write(self.style.ERROR(
+                    f"{row['products']}x{row['days']} {row['stage']}: "
+                    f"{before['ms_per_call']:.2f} -> {row['ms_per_call']:.2f} ms/call, "
+                    f"{before['queries_per_call']:.1f} -> {row['queries_per_call']:.1f} queries"
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} forecasting stages regressed against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
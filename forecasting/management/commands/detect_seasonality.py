@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.seasonal_detection import detect_category_seasonality, PEAK_RATIO
+
+
+class Command(BaseCommand):
+    help = 'Propose seasonal patterns for every category from its sales history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=730, help='Sales history to scan')
+        parser.add_argument('--threshold', type=float, default=PEAK_RATIO,
+                            help='Demand ratio above which a day counts as peak')
+
+    def handle(self, *args, **options):
+        report = detect_category_seasonality(days=options['days'], threshold=options['threshold'])
+
+        for row in report:
+            self.stdout.write(
+                f"{row['category']}: {row['history_days']} days, "
+                f"weekly ACF {row['weekly_autocorrelation']:.2f}, "
+                f"{row['patterns_proposed']} pattern(s) proposed"
+            )
+
+        proposed = sum(row['patterns_proposed'] for row in report)
+        self.stdout.write(self.style.SUCCESS(
+            f"Proposed {proposed} inactive seasonal patterns, review and activate them in the admin"
+        ))
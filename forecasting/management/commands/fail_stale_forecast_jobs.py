@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Mark forecast jobs failed that were never started or stopped reporting progress'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int,
+                            help='Minutes without progress (defaults to FORECAST_JOB_STALE_MINUTES)')
+
+    def handle(self, *args, **options):
+        failed = fail_stale_jobs(options['minutes'])
+        self.stdout.write(self.style.SUCCESS(f"Marked {failed} stale forecast jobs failed"))
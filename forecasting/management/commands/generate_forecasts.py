@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.jobs import run_forecast_job, get_worker_count
+from forecasting.models import ForecastJob, ForecastModel
+
+
+class Command(BaseCommand):
+    help = 'Generate demand forecasts for the whole catalog (or one category) using all cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Forecast horizon in days')
+        parser.add_argument('--training-days', type=int, default=90, help='Sales history used for training')
+        parser.add_argument('--model-type', default='LINEAR_REGRESSION',
+                            choices=[choice[0] for choice in ForecastModel.MODEL_TYPES] + ['AUTO'],
+                            help='Model to fit (AUTO uses Croston for intermittent sellers)')
+        parser.add_argument('--category', type=int, help='Only forecast products in this category')
+        parser.add_argument('--workers', type=int, help='Worker processes (defaults to FORECAST_JOB_WORKERS)')
+
+    def handle(self, *args, **options):
+        job = ForecastJob.objects.create(parameters={
+            'category_id': options['category'],
+            'product_ids': None,
+            'forecast_days': options['days'],
+            'training_days': options['training_days'],
+            'model_type': options['model_type'],
+            'generate_recommendations': True
+        })
+
+        workers = options['workers'] or get_worker_count()
+        self.stdout.write(f"Running forecast job #{job.id} on {workers} worker(s)...")
+
+        job = run_forecast_job(job.id, workers=workers)
+
+        if job.status == 'FAILED':
+            self.stdout.write(self.style.ERROR(f"Forecast job #{job.id} failed: {job.error_message}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast job #{job.id} completed: {job.processed_products}/{job.total_products} products, "
+            f"{job.forecasts_generated} forecasts, {len(job.errors)} errors"
+        ))
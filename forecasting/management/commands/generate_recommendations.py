@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.recommendations import generate_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Refresh pending stock recommendations for the whole catalog from the latest forecasts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Only refresh this product (repeatable)')
+
+    def handle(self, *args, **options):
+        changed = generate_recommendations(options['products'])
+        self.stdout.write(self.style.SUCCESS(f"Created or updated {changed} stock recommendations"))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from forecasting.accuracy import backfill_actual_demand
+from forecasting.retraining import DRIFT_THRESHOLD, DRIFT_WINDOW_DAYS, retrain_drifted_models
+
+
+class Command(BaseCommand):
+    help = 'Retrain only the forecast models whose realized error has drifted past their training error'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=DRIFT_WINDOW_DAYS,
+                            help='Days of backfilled actuals to judge each model on')
+        parser.add_argument('--threshold', type=float, default=DRIFT_THRESHOLD,
+                            help='Retrain when realized MAE exceeds this multiple of training MAE')
+        parser.add_argument('--forecast-days', type=int, default=30)
+        parser.add_argument('--training-days', type=int, default=90)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted models without retraining them')
+
+    def handle(self, *args, **options):
+        # Drift is measured on realized demand, bring actuals up to date first
+        backfill_actual_demand()
+
+        drifted, jobs = retrain_drifted_models(
+            window_days=options['window'],
+            threshold=options['threshold'],
+            forecast_days=options['forecast_days'],
+            training_days=options['training_days'],
+            dry_run=options['dry_run']
+        )
+
+        for drift in drifted:
+            self.stdout.write(f"{drift['model'].name}: {drift['reason']}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifted)} models have drifted"))
+            return
+
+        retrained = sum(job.processed_products - len(job.errors) for job in jobs)
+        self.stdout.write(self.style.SUCCESS(
+            f"Retrained {retrained} of {len(drifted)} drifted models"
+        ))
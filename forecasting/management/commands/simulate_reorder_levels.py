@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forecasting.inventory_policy import (
+    SIMULATION_HORIZON, SIMULATION_PATHS, apply_reorder_proposals, propose_reorder_levels
+)
+from forecasting.models import ReorderLevelProposal
+
+
+class Command(BaseCommand):
+    help = 'Simulate demand paths to propose reorder levels that balance stockouts against spoilage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', type=int, default=SIMULATION_PATHS,
+                            help='Demand paths simulated per product')
+        parser.add_argument('--horizon', type=int, default=SIMULATION_HORIZON,
+                            help='Days simulated')
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help='Only simulate this product (repeatable)')
+        parser.add_argument('--category', type=int, help='Only simulate products in this category')
+        parser.add_argument('--seed', type=int, help='Random seed, for repeatable proposals')
+        parser.add_argument('--apply', action='store_true',
+                            help='Set the proposed reorder levels on the products')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        proposals = propose_reorder_levels(
+            product_ids=options['products'],
+            category_id=options['category'],
+            paths=options['paths'],
+            horizon=options['horizon'],
+            seed=options['seed']
+        )
+        elapsed = time.perf_counter() - started
+
+        changed = [p for p in proposals if p.proposed_reorder_level != p.current_reorder_level]
+        for proposal in changed:
+            self.stdout.write(
+                f"{proposal.product_id:>6}  {proposal.current_reorder_level:>5} -> {proposal.proposed_reorder_level:<5}"
+                f"  stockouts {proposal.current_stockout_rate:.1%} -> {proposal.stockout_rate:.1%}"
+                f"  spoilage {proposal.current_spoilage_rate:.1%} -> {proposal.spoilage_rate:.1%}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Simulated {len(proposals)} products x {options['paths']} paths in {elapsed:.2f}s, "
+            f"{len(changed)} reorder levels to change"
+        ))
+
+        if options['apply']:
+            applied = apply_reorder_proposals(
+                ReorderLevelProposal.objects.filter(pk__in=[p.pk for p in changed])
+            )
+            self.stdout.write(self.style.SUCCESS(f"Applied {applied} reorder levels"))
@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from forecasting.online import update_models_online
+
+
+class Command(BaseCommand):
+    help = 'Fold closed business days into the active linear forecast models (recursive least squares)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help='Last business day to fold in (YYYY-MM-DD, defaults to yesterday)')
+
+    def handle(self, *args, **options):
+        updated = update_models_online(until=options['until'])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} forecast models online"))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0003_forecastjob'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastAccuracySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_forecasts', models.IntegerField(default=0)),
+                ('accurate_forecasts', models.IntegerField(default=0, help_text='Within 20% of actual demand')),
+                ('error_sum', models.BigIntegerField(default=0)),
+                ('percentage_error_sum', models.FloatField(default=0)),
+                ('percentage_error_count', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_accuracy_summaries', to='inventory.category')),
+                ('forecast_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accuracy_summaries', to='forecasting.forecastmodel')),
+            ],
+            options={
+                'verbose_name': 'Forecast Accuracy Summary',
+                'verbose_name_plural': 'Forecast Accuracy Summaries',
+                'db_table': 'forecast_accuracy_summaries',
+                'unique_together': {('forecast_model', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0004_forecastaccuracysummary'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductForecastSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('forecast_7_days', models.IntegerField(default=0)),
+                ('forecast_30_days', models.IntegerField(default=0)),
+                ('average_daily_demand', models.FloatField(default=0)),
+                ('recommended_order', models.IntegerField(default=0)),
+                ('priority', models.CharField(choices=[('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('URGENT', 'Urgent')], default='LOW', max_length=20)),
+                ('trend', models.CharField(choices=[('increasing', 'Increasing'), ('decreasing', 'Decreasing'), ('stable', 'Stable'), ('unknown', 'Unknown')], default='unknown', max_length=20)),
+                ('seasonal_impact', models.CharField(choices=[('high', 'High'), ('normal', 'Normal')], default='normal', max_length=20)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_summary', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Product Forecast Summary',
+                'verbose_name_plural': 'Product Forecast Summaries',
+                'db_table': 'product_forecast_summaries',
+            },
+        ),
+    ]
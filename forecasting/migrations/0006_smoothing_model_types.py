@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0005_productforecastsummary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='forecastmodel',
+            name='model_type',
+            field=models.CharField(choices=[('LINEAR_REGRESSION', 'Linear Regression'), ('HOLT_WINTERS', 'Holt-Winters Exponential Smoothing'), ('CROSTON', 'Croston (SBA) Intermittent Demand')], default='LINEAR_REGRESSION', max_length=50),
+        ),
+    ]
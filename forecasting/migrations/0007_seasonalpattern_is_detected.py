@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0006_smoothing_model_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seasonalpattern',
+            name='is_detected',
+            field=models.BooleanField(default=False, help_text='Proposed by seasonality detection'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0007_seasonalpattern_is_detected'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='categoryforecast',
+            unique_together={('category', 'forecast_date')},
+        ),
+        migrations.AddField(
+            model_name='categoryforecast',
+            name='product_count',
+            field=models.IntegerField(default=0, help_text='Products whose forecasts were summed'),
+        ),
+        migrations.AddField(
+            model_name='categoryforecast',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='categoryforecast',
+            name='forecast_model',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='category_forecasts', to='forecasting.forecastmodel'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0008_category_forecast_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastmodel',
+            name='retrain_reason',
+            field=models.CharField(blank=True, help_text='Why this model replaced the previous one', max_length=255),
+        ),
+    ]
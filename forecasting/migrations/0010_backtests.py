@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0009_forecastmodel_retrain_reason'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BacktestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('parameters', models.JSONField(default=dict)),
+                ('total_products', models.IntegerField(default=0)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='backtest_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Backtest Run',
+                'verbose_name_plural': 'Backtest Runs',
+                'db_table': 'forecast_backtest_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BacktestResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_type', models.CharField(choices=[('LINEAR_REGRESSION', 'Linear Regression'), ('HOLT_WINTERS', 'Holt-Winters Exponential Smoothing'), ('CROSTON', 'Croston (SBA) Intermittent Demand')], max_length=50)),
+                ('mae', models.FloatField(blank=True, null=True)),
+                ('rmse', models.FloatField(blank=True, null=True)),
+                ('mape', models.FloatField(blank=True, null=True)),
+                ('observations', models.IntegerField(default=0, help_text='Forecast days scored across all origins')),
+                ('fit_seconds', models.FloatField(default=0)),
+                ('predict_seconds', models.FloatField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='backtest_results', to='inventory.product')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='forecasting.backtestrun')),
+            ],
+            options={
+                'verbose_name': 'Backtest Result',
+                'verbose_name_plural': 'Backtest Results',
+                'db_table': 'forecast_backtest_results',
+                'unique_together': {('run', 'product', 'model_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_products(apps, schema_editor):
+    """Move product ids out of parameters and keep one active model per product"""
+    ForecastModel = apps.get_model('forecasting', 'ForecastModel')
+    Product = apps.get_model('inventory', 'Product')
+
+    product_ids = set(Product.objects.values_list('id', flat=True))
+    models_to_update = []
+    for forecast_model in ForecastModel.objects.filter(parameters__has_key='product_id'):
+        product_id = forecast_model.parameters.pop('product_id')
+        if product_id in product_ids:
+            forecast_model.product_id = product_id
+        models_to_update.append(forecast_model)
+    ForecastModel.objects.bulk_update(models_to_update, ['product', 'parameters'], batch_size=500)
+
+    # Products could have several active models, the most recently trained one becomes champion
+    seen = set()
+    retired = []
+    for forecast_model in ForecastModel.objects.filter(
+        is_active=True, product__isnull=False
+    ).order_by('product_id', '-trained_at', '-id'):
+        if forecast_model.product_id in seen:
+            retired.append(forecast_model.id)
+        seen.add(forecast_model.product_id)
+    ForecastModel.objects.filter(id__in=retired).update(is_active=False, status='DEPRECATED')
+
+
+def restore_parameters(apps, schema_editor):
+    ForecastModel = apps.get_model('forecasting', 'ForecastModel')
+
+    models_to_update = []
+    for forecast_model in ForecastModel.objects.filter(product__isnull=False):
+        forecast_model.parameters['product_id'] = forecast_model.product_id
+        models_to_update.append(forecast_model)
+    ForecastModel.objects.bulk_update(models_to_update, ['parameters'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0010_backtests'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecastmodel',
+            name='product',
+            field=models.ForeignKey(blank=True, help_text='Product this model forecasts', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='forecast_models', to='inventory.product'),
+        ),
+        migrations.AddField(
+            model_name='forecastmodel',
+            name='slot',
+            field=models.CharField(choices=[('CHAMPION', 'Champion'), ('CHALLENGER', 'Challenger')], default='CHAMPION', help_text='Champion serves forecasts, a challenger is under evaluation', max_length=20),
+        ),
+        migrations.RunPython(assign_products, restore_parameters),
+    ]
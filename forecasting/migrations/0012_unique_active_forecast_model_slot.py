@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0011_forecast_model_registry'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='forecastmodel',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('product', 'slot'), name='unique_active_forecast_model_slot'),
+        ),
+    ]
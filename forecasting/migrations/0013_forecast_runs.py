@@ -0,0 +1,97 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:11
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def pack_upcoming_forecasts(apps, schema_editor):
+    """One run per product and model from the forecast rows dated today onward"""
+    ProductForecast = apps.get_model('forecasting', 'ProductForecast')
+    ForecastRun = apps.get_model('forecasting', 'ForecastRun')
+    StockRecommendation = apps.get_model('forecasting', 'StockRecommendation')
+
+    today = timezone.localdate()
+    groups = {}
+    for forecast in ProductForecast.objects.filter(forecast_date__gte=today).order_by('forecast_date'):
+        groups.setdefault((forecast.product_id, forecast.forecast_model_id), []).append(forecast)
+
+    run_ids = {}
+    for (product_id, forecast_model_id), forecasts in groups.items():
+        start_date, end_date = forecasts[0].forecast_date, forecasts[-1].forecast_date
+        days = (end_date - start_date).days + 1
+        predicted, lower, upper = (np.zeros(days, dtype='<i4') for _ in range(3))
+        factors = np.ones(days, dtype='<f4')
+        peak = np.zeros(days, dtype=bool)
+        for forecast in forecasts:
+            d = (forecast.forecast_date - start_date).days
+            predicted[d] = forecast.predicted_demand
+            lower[d] = forecast.confidence_lower
+            upper[d] = forecast.confidence_upper
+            factors[d] = forecast.seasonal_factor
+            peak[d] = forecast.is_peak_season
+
+        run = ForecastRun.objects.create(
+            product_id=product_id,
+            forecast_model_id=forecast_model_id,
+            start_date=start_date,
+            end_date=end_date,
+            predictions=predicted.tobytes(),
+            lower=lower.tobytes(),
+            upper=upper.tobytes(),
+            seasonal_factors=factors.tobytes(),
+            peak_days=np.packbits(peak).tobytes(),
+            confidence_level=forecasts[0].confidence_level
+        )
+        for forecast in forecasts:
+            run_ids[forecast.id] = run.id
+
+    recommendations = list(StockRecommendation.objects.filter(forecast_id__in=run_ids))
+    for recommendation in recommendations:
+        recommendation.forecast_run_id = run_ids[recommendation.forecast_id]
+    StockRecommendation.objects.bulk_update(recommendations, ['forecast_run'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0012_unique_active_forecast_model_slot'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField(help_text='First forecast day')),
+                ('end_date', models.DateField(help_text='Last day this run is current for')),
+                ('predictions', models.BinaryField()),
+                ('lower', models.BinaryField()),
+                ('upper', models.BinaryField()),
+                ('seasonal_factors', models.BinaryField()),
+                ('peak_days', models.BinaryField()),
+                ('confidence_level', models.FloatField(default=95.0, help_text='Confidence level (e.g., 95%)')),
+                ('materialized_through', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('forecast_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runs', to='forecasting.forecastmodel')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_runs', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Forecast Run',
+                'verbose_name_plural': 'Forecast Runs',
+                'db_table': 'forecast_runs',
+                'ordering': ['-start_date'],
+                'indexes': [models.Index(fields=['product', 'end_date'], name='forecast_ru_product_4b8867_idx')],
+                'unique_together': {('product', 'forecast_model', 'start_date')},
+            },
+        ),
+        migrations.AddField(
+            model_name='stockrecommendation',
+            name='forecast_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forecasting.forecastrun'),
+        ),
+        migrations.RunPython(pack_upcoming_forecasts, migrations.RunPython.noop),
+    ]
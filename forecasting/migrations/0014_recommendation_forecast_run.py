@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def delete_upcoming_forecasts(apps, schema_editor):
+    """Upcoming days now live in forecast runs, only realized days stay as rows"""
+    ProductForecast = apps.get_model('forecasting', 'ProductForecast')
+    ProductForecast.objects.filter(forecast_date__gte=timezone.localdate()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0013_forecast_runs'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='stockrecommendation',
+            name='forecast',
+        ),
+        migrations.RenameField(
+            model_name='stockrecommendation',
+            old_name='forecast_run',
+            new_name='forecast',
+        ),
+        migrations.AlterField(
+            model_name='stockrecommendation',
+            name='forecast',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recommendations', to='forecasting.forecastrun'),
+        ),
+        migrations.RunPython(delete_upcoming_forecasts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:17
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecasting', '0014_recommendation_forecast_run'),
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderLevelProposal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_reorder_level', models.IntegerField()),
+                ('proposed_reorder_level', models.IntegerField(validators=[django.core.validators.MinValueValidator(0)])),
+                ('shelf_life_days', models.IntegerField(blank=True, help_text='Empty for products that do not expire', null=True)),
+                ('current_stockout_rate', models.FloatField()),
+                ('current_spoilage_rate', models.FloatField()),
+                ('stockout_rate', models.FloatField()),
+                ('spoilage_rate', models.FloatField()),
+                ('paths', models.IntegerField(help_text='Demand paths simulated')),
+                ('horizon_days', models.IntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPLIED', 'Applied'), ('DISMISSED', 'Dismissed')], default='PENDING', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('applied_at', models.DateTimeField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_proposals', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Reorder Level Proposal',
+                'verbose_name_plural': 'Reorder Level Proposals',
+                'db_table': 'reorder_level_proposals',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', 'status'], name='reorder_lev_product_fd8538_idx')],
+            },
+        ),
+    ]
@@ -10,6 +10,12 @@ from django.db.models import Sum, Count
 from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import StandardScaler
 import pickle
+import time
+
+from .smoothing import (
+    fit_holt_winters, holt_winters_forecast, fit_croston, croston_forecast,
+    integer_forecast, evaluate_one_step, is_intermittent
+)
 
 
 def get_transaction_model():
@@ -26,86 +32,110 @@ def get_transaction_model():
         )
 
 
+FEATURE_COLUMNS = [
+    'day_of_week', 'day_of_month', 'month', 'is_weekend',
+    'lag_1', 'lag_7', 'rolling_mean_7', 'rolling_mean_14'
+]
+
+
+def build_feature_matrix(start_date, quantities):
+    """
+    Build the training features from a zero-filled daily sales series
+    starting at start_date
+    Returns: X (features), y (targets), dates
+    """
+    df = pd.DataFrame({
+        'date': pd.date_range(start=start_date, periods=len(quantities), freq='D'),
+        'quantity': np.asarray(quantities, dtype=float)
+    })
+    
+    # Create features
+    df['day_of_week'] = df['date'].dt.dayofweek
+    df['day_of_month'] = df['date'].dt.day
+    df['month'] = df['date'].dt.month
+    df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+    
+    # Create lag features (previous days' sales)
+    df['lag_1'] = df['quantity'].shift(1).fillna(0)
+    df['lag_7'] = df['quantity'].shift(7).fillna(0)
+    df['rolling_mean_7'] = df['quantity'].rolling(window=7, min_periods=1).mean()
+    df['rolling_mean_14'] = df['quantity'].rolling(window=14, min_periods=1).mean()
+    
+    # Remove NaN values
+    df = df.fillna(0)
+    
+    return df[FEATURE_COLUMNS].values, df['quantity'].values, df['date'].values
+
+
+def lag_feature_matrix(start_date, quantities):
+    """
+    The features of build_feature_matrix for many products at once, in NumPy
+    quantities: (products, days) zero-filled daily sales starting at start_date
+    Returns: (products, days, len(FEATURE_COLUMNS)) array
+    """
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+    n_products, n_days = quantities.shape
+    cumulative = np.cumsum(quantities, axis=1)
+    
+    def shifted(lag):
+        lagged = np.zeros_like(quantities)
+        lagged[:, lag:] = quantities[:, :max(n_days - lag, 0)]
+        return lagged
+    
+    def rolling_mean(window):
+        # Includes the day itself and averages over the days available so far
+        before = np.zeros_like(cumulative)
+        before[:, window:] = cumulative[:, :max(n_days - window, 0)]
+        return (cumulative - before) / np.minimum(np.arange(1, n_days + 1), window)
+    
+    calendar = np.broadcast_to(calendar_features(start_date, n_days), (n_products, n_days, 4))
+    lags = np.stack([shifted(1), shifted(7), rolling_mean(7), rolling_mean(14)], axis=2)
+    return np.concatenate([calendar, lags], axis=2)
+
+
+def load_sales_histories(product_ids, days=90):
+    """
+    Load zero-filled daily sales for many products from the daily sales rollup
+    Returns: start_date, quantities (products x days matrix), sale_days per product
+    """
+    from pos.models import ProductSalesDaily
+    
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+    
+    product_ids = list(product_ids)
+    row_index = {product_id: i for i, product_id in enumerate(product_ids)}
+    quantities = np.zeros((len(product_ids), days + 1))
+    
+    if product_ids:
+        sales_data = ProductSalesDaily.objects.filter(
+            product_id__in=product_ids,
+            business_date__gte=start_date,
+            business_date__lte=end_date
+        ).values_list('product_id', 'business_date', 'quantity')
+        
+        for product_id, date, total_quantity in sales_data:
+            quantities[row_index[product_id], (date - start_date).days] = total_quantity
+    
+    sale_days = np.count_nonzero(quantities, axis=1)
+    return start_date, quantities, sale_days
+
+
 def prepare_training_data(product, days=90):
     """
     Prepare training data from product sales history
     Returns: X (features), y (targets), dates
     """
     try:
-        SalesTransaction = get_transaction_model()
-        
-        end_date = timezone.now().date()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get daily sales data from TransactionItem
-        # We need to import TransactionItem to access the items
-        from pos.models import TransactionItem
+        get_transaction_model()
         
-        # Query TransactionItem and aggregate by date
-        from django.db.models.functions import TruncDate
+        start_date, quantities, sale_days = load_sales_histories([product.id], days)
         
-        sales_data = TransactionItem.objects.filter(
-            product=product,
-            transaction__created_at__date__gte=start_date,
-            transaction__created_at__date__lte=end_date,
-            transaction__status='COMPLETED'  # Only count completed transactions
-        ).annotate(
-            date=TruncDate('transaction__created_at')
-        ).values('date').annotate(
-            total_quantity=Sum('quantity')
-        ).order_by('date')
-        
-        # Convert to list
-        sales_list = list(sales_data)
-        
-        if len(sales_list) < 14:  # Need at least 2 weeks of data
-            print(f"⚠️ Insufficient sales data: only {len(sales_list)} days found")
+        if sale_days[0] < 14:  # Need at least 2 weeks of data
+            print(f"⚠️ Insufficient sales data: only {sale_days[0]} days found")
             return None, None, None
         
-        # Create DataFrame with proper error handling
-        dates = []
-        quantities = []
-        
-        for record in sales_list:
-            dates.append(record['date'])
-            quantities.append(record['total_quantity'])
-        
-        # Create pandas DataFrame safely
-        df = pd.DataFrame({
-            'date': dates,
-            'quantity': quantities
-        })
-        
-        # Fill missing dates with 0
-        date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.set_index('date').reindex(date_range, fill_value=0).reset_index()
-        df.columns = ['date', 'quantity']
-        
-        # Create features
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['day_of_month'] = df['date'].dt.day
-        df['month'] = df['date'].dt.month
-        df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
-        
-        # Create lag features (previous days' sales)
-        df['lag_1'] = df['quantity'].shift(1).fillna(0)
-        df['lag_7'] = df['quantity'].shift(7).fillna(0)
-        df['rolling_mean_7'] = df['quantity'].rolling(window=7, min_periods=1).mean()
-        df['rolling_mean_14'] = df['quantity'].rolling(window=14, min_periods=1).mean()
-        
-        # Remove NaN values
-        df = df.fillna(0)
-        
-        # Prepare features and target
-        feature_columns = [
-            'day_of_week', 'day_of_month', 'month', 'is_weekend',
-            'lag_1', 'lag_7', 'rolling_mean_7', 'rolling_mean_14'
-        ]
-        
-        X = df[feature_columns].values
-        y = df['quantity'].values
-        dates = df['date'].values
+        X, y, dates = build_feature_matrix(start_date, quantities[0])
         
         print(f"✅ Prepared {len(X)} samples for training")
         return X, y, dates
@@ -121,6 +151,58 @@ def prepare_training_data(product, days=90):
         return None, None, None
 
 
+def fit_linear_regression(X, y, days=90):
+    """
+    Fit and evaluate a linear regression model on a prepared feature matrix
+    Returns: model, scaler, metrics, training_info
+    """
+    # Split into train/test
+    split_index = int(len(X) * 0.8)
+    X_train, X_test = X[:split_index], X[split_index:]
+    y_train, y_test = y[:split_index], y[split_index:]
+    
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    # Train model
+    model = LinearRegression()
+    model.fit(X_train_scaled, y_train)
+    
+    # Evaluate
+    y_pred = model.predict(X_test_scaled)
+    
+    # Calculate metrics
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    
+    # Calculate accuracy (within 20% of actual)
+    percentage_errors = np.abs((y_test - y_pred) / (y_test + 1)) * 100
+    accuracy = np.mean(percentage_errors <= 20) * 100
+    
+    metrics = {
+        'mse': float(mse),
+        'rmse': float(rmse),
+        'mae': float(mae),
+        'r2_score': float(r2),
+        'accuracy': float(accuracy)
+    }
+    
+    training_info = {
+        'training_samples': len(X_train),
+        'test_samples': len(X_test),
+        'features_used': len(FEATURE_COLUMNS),
+        'training_period_days': days
+    }
+    
+    return model, scaler, metrics, training_info
+
+
 def train_linear_regression_model(product, days=90):
     """
     Train a linear regression model for demand forecasting
@@ -134,51 +216,9 @@ def train_linear_regression_model(product, days=90):
             print(f"⚠️ Cannot train model: insufficient data")
             return None, None, None, None
         
-        # Split into train/test
-        split_index = int(len(X) * 0.8)
-        X_train, X_test = X[:split_index], X[split_index:]
-        y_train, y_test = y[:split_index], y[split_index:]
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # Train model
-        model = LinearRegression()
-        model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred = model.predict(X_test_scaled)
-        
-        # Calculate metrics
-        from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-        
-        mse = mean_squared_error(y_test, y_pred)
-        rmse = np.sqrt(mse)
-        mae = mean_absolute_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
-        
-        # Calculate accuracy (within 20% of actual)
-        percentage_errors = np.abs((y_test - y_pred) / (y_test + 1)) * 100
-        accuracy = np.mean(percentage_errors <= 20) * 100
-        
-        metrics = {
-            'mse': float(mse),
-            'rmse': float(rmse),
-            'mae': float(mae),
-            'r2_score': float(r2),
-            'accuracy': float(accuracy)
-        }
-        
-        training_info = {
-            'training_samples': len(X_train),
-            'test_samples': len(X_test),
-            'features_used': 8,
-            'training_period_days': days
-        }
+        model, scaler, metrics, training_info = fit_linear_regression(X, y, days)
         
-        print(f"✅ Model trained successfully - Accuracy: {accuracy:.2f}%")
+        print(f"✅ Model trained successfully - Accuracy: {metrics['accuracy']:.2f}%")
         return model, scaler, metrics, training_info
         
     except Exception as e:
@@ -244,25 +284,373 @@ def predict_demand(model, scaler, product, forecast_date, historical_data=None):
         return fallback, (int(fallback * 0.8), int(fallback * 1.2))
 
 
+def fold_scaler(model, scaler):
+    """
+    Fold the feature scaler into the regression coefficients so a
+    prediction is a single dot product on raw features
+    Returns: weights, bias
+    """
+    weights = np.asarray(model.coef_, dtype=float) / scaler.scale_
+    bias = float(model.intercept_) - float(np.dot(weights, scaler.mean_))
+    return weights, bias
+
+
+def calendar_features(start_date, days):
+    """Calendar feature columns (day_of_week, day_of_month, month, is_weekend) for a horizon"""
+    dates = [start_date + timedelta(days=i) for i in range(days)]
+    day_of_week = np.array([d.weekday() for d in dates], dtype=float)
+    
+    return np.column_stack([
+        day_of_week,
+        [d.day for d in dates],
+        [d.month for d in dates],
+        day_of_week >= 5
+    ]).astype(float)
+
+
+def forecast_horizon(weights, bias, histories, start_date, days, seasonal_factors=None):
+    """
+    Recursive multi-horizon forecast for one or many products at once.
+    
+    Mirrors calling predict_demand day by day and feeding each prediction
+    back as history, but keeps the last 14 days per product in a ring
+    buffer with running window sums, so each step is one dot product
+    across the whole batch.
+    
+    weights: (8,) or (products, 8) raw-feature coefficients from fold_scaler
+    bias: scalar or (products,)
+    histories: (products, days_of_history) daily sales, oldest first
+    seasonal_factors: optional (days,) or (products, days) multipliers
+        applied before a prediction is fed back into the lags
+    Returns: predictions, confidence_lower, confidence_upper as (products, days) int arrays
+    """
+    histories = np.atleast_2d(np.asarray(histories, dtype=float))
+    n_products, history_length = histories.shape
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), (n_products, len(FEATURE_COLUMNS)))
+    bias = np.broadcast_to(np.asarray(bias, dtype=float), (n_products,))
+    
+    # Ring buffer holding the last 14 days, oldest at `oldest`
+    window = 14
+    buffer = np.zeros((n_products, window))
+    recent = histories[:, -window:]
+    buffer[:, window - recent.shape[1]:] = recent
+    oldest = 0
+    
+    # Running window sums; as in predict_demand, a window longer than the
+    # available history contributes zero
+    sum_7 = buffer[:, -7:].sum(axis=1)
+    sum_14 = buffer.sum(axis=1)
+    has_lag_7 = history_length >= 7
+    has_window_14 = history_length >= 14
+    
+    if seasonal_factors is not None:
+        seasonal_factors = np.broadcast_to(np.asarray(seasonal_factors, dtype=float), (n_products, days))
+    
+    # Calendar contribution for every step, computed up front
+    calendar_part = weights[:, :4] @ calendar_features(start_date, days).T + bias[:, None]
+    w_lag_1, w_lag_7, w_mean_7, w_mean_14 = weights[:, 4:].T
+    
+    predictions = np.zeros((n_products, days), dtype=int)
+    conf_lower = np.zeros((n_products, days), dtype=int)
+    conf_upper = np.zeros((n_products, days), dtype=int)
+    
+    for step in range(days):
+        lag_1 = buffer[:, (oldest - 1) % window]
+        lag_7 = buffer[:, (oldest - 7) % window] if has_lag_7 else 0
+        mean_7 = sum_7 / 7 if has_lag_7 else 0
+        mean_14 = sum_14 / 14 if has_window_14 else 0
+        
+        raw = (calendar_part[:, step] + w_lag_1 * lag_1 + w_lag_7 * lag_7
+               + w_mean_7 * mean_7 + w_mean_14 * mean_14)
+        
+        # Non-negative integer demand with a ±20% confidence interval
+        prediction = np.maximum(0, np.trunc(raw))
+        lower = np.trunc(prediction * 0.8)
+        upper = np.trunc(prediction * 1.2)
+        
+        if seasonal_factors is not None:
+            factors = seasonal_factors[:, step]
+            prediction = np.trunc(prediction * factors)
+            lower = np.trunc(lower * factors)
+            upper = np.trunc(upper * factors)
+        
+        predictions[:, step] = prediction
+        conf_lower[:, step] = lower
+        conf_upper[:, step] = upper
+        
+        # Slide the windows forward with the new prediction
+        sum_14 += prediction - buffer[:, oldest]
+        sum_7 += prediction - buffer[:, (oldest + 7) % window]
+        buffer[:, oldest] = prediction
+        oldest = (oldest + 1) % window
+        has_lag_7 = has_lag_7 or history_length + step + 1 >= 7
+        has_window_14 = has_window_14 or history_length + step + 1 >= 14
+    
+    return predictions, conf_lower, conf_upper
+
+
+# Days with sales each model type needs before it is trained
+MIN_SALE_DAYS = {
+    'LINEAR_REGRESSION': 14,
+    'HOLT_WINTERS': 7,
+    'CROSTON': 2,
+}
+
+
+def resolve_model_type(model_type, quantities):
+    """AUTO picks Croston for intermittent sellers and linear regression otherwise"""
+    if model_type != 'AUTO':
+        return model_type
+    return 'CROSTON' if is_intermittent(quantities)[0] else 'LINEAR_REGRESSION'
+
+
+def _forecast_linear_regression(items, task):
+    """Fit one regression per product, then forecast the whole batch in one vectorized pass"""
+    results = []
+    fitted = []
+    
+    for item in items:
+        try:
+            X, y, _ = build_feature_matrix(task['history_start'], item['quantities'])
+            model, scaler, metrics, training_info = fit_linear_regression(
+                X, y, task['training_days']
+            )
+            weights, bias = fold_scaler(model, scaler)
+            fitted.append((item, weights, bias, metrics, training_info))
+            
+        except Exception as e:
+            results.append({'product_id': item['product_id'], 'error': str(e)})
+    
+    if not fitted:
+        return results
+    
+    predictions, conf_lower, conf_upper = forecast_horizon(
+        np.array([f[1] for f in fitted]),
+        np.array([f[2] for f in fitted]),
+        np.array([f[0]['quantities'] for f in fitted]),
+        task['forecast_start'],
+        task['forecast_days'],
+        seasonal_factors=np.array([f[0]['seasonal_factors'] for f in fitted])
+    )
+    
+    for i, (item, weights, bias, metrics, training_info) in enumerate(fitted):
+        results.append({
+            'product_id': item['product_id'],
+            'model_type': 'LINEAR_REGRESSION',
+            'predictions': list(zip(
+                predictions[i].tolist(), conf_lower[i].tolist(), conf_upper[i].tolist()
+            )),
+            'metrics': metrics,
+            'training_info': training_info,
+            'parameters': {'weights': weights.tolist(), 'bias': bias}
+        })
+    
+    return results
+
+
+def _forecast_smoothing(model_type, fit, forecast, parameter_names):
+    """Chunk forecaster for a batch-fitted smoothing model"""
+    def forecast_chunk(items, task):
+        quantities = np.array([item['quantities'] for item in items])
+        
+        try:
+            state, fitted = fit(quantities)
+        except Exception as e:
+            return [{'product_id': item['product_id'], 'error': str(e)} for item in items]
+        
+        predictions, conf_lower, conf_upper = integer_forecast(
+            forecast(state, task['forecast_days']),
+            np.array([item['seasonal_factors'] for item in items])
+        )
+        metrics = evaluate_one_step(quantities, fitted)
+        
+        return [
+            {
+                'product_id': item['product_id'],
+                'model_type': model_type,
+                'predictions': list(zip(
+                    predictions[i].tolist(), conf_lower[i].tolist(), conf_upper[i].tolist()
+                )),
+                'metrics': metrics[i],
+                'training_info': {
+                    'training_samples': quantities.shape[1],
+                    'test_samples': quantities.shape[1] - int(quantities.shape[1] * 0.8),
+                    'features_used': 0,
+                    'training_period_days': task['training_days']
+                },
+                'parameters': {
+                    name: float(np.broadcast_to(state[name], len(items))[i])
+                    for name in parameter_names
+                }
+            }
+            for i, item in enumerate(items)
+        ]
+    
+    return forecast_chunk
+
+
+# Chunk forecaster for each model type
+FORECASTERS = {
+    'LINEAR_REGRESSION': _forecast_linear_regression,
+    'HOLT_WINTERS': _forecast_smoothing(
+        'HOLT_WINTERS', fit_holt_winters, holt_winters_forecast, ('alpha', 'beta', 'gamma')
+    ),
+    'CROSTON': _forecast_smoothing(
+        'CROSTON', fit_croston, croston_forecast, ('alpha',)
+    ),
+}
+
+
+def forecast_product_chunk(task):
+    """
+    Train and forecast a chunk of products from preloaded sales histories.
+    Runs inside worker processes, so it must not touch the database.
+    Returns: list of per-product result dicts
+    """
+    results = []
+    batches = {}
+    
+    for item in task['items']:
+        model_type = resolve_model_type(task.get('model_type', 'LINEAR_REGRESSION'), item['quantities'])
+        
+        if item['sale_days'] < MIN_SALE_DAYS[model_type]:
+            results.append({
+                'product_id': item['product_id'],
+                'error': 'Insufficient data for forecasting'
+            })
+            continue
+        
+        batches.setdefault(model_type, []).append(item)
+    
+    # Each model type forecasts its products in one batch
+    for model_type, items in batches.items():
+        results.extend(FORECASTERS[model_type](items, task))
+    
+    return results
+
+
+# ========== BACKTESTING ==========
+
+def _fit_linear_batch(history_start, quantities, training_days):
+    """Fold-scaled regression weights per product, NaN where a fit fails"""
+    weights = np.full((len(quantities), len(FEATURE_COLUMNS)), np.nan)
+    bias = np.full(len(quantities), np.nan)
+
+    for i, series in enumerate(quantities):
+        try:
+            X, y, _ = build_feature_matrix(history_start, series)
+            model, scaler, _, _ = fit_linear_regression(X, y, training_days)
+            weights[i], bias[i] = fold_scaler(model, scaler)
+        except Exception:
+            continue
+
+    return {'weights': weights, 'bias': bias}
+
+
+def _predict_linear_batch(state, quantities, forecast_start, days):
+    fitted = ~np.isnan(state['bias'])
+    predictions = np.full((len(quantities), days), np.nan)
+    if fitted.any():
+        predictions[fitted] = forecast_horizon(
+            state['weights'][fitted], state['bias'][fitted], quantities[fitted], forecast_start, days
+        )[0]
+    return predictions
+
+
+def _smoothing_backtester(fit, forecast):
+    def fit_batch(history_start, quantities, training_days):
+        return fit(quantities)[0]
+
+    def predict_batch(state, quantities, forecast_start, days):
+        return integer_forecast(forecast(state, days))[0].astype(float)
+
+    return fit_batch, predict_batch
+
+
+# (fit, predict) pairs over the same primitives the forecasters use, timed separately in backtests
+BACKTESTERS = {
+    'LINEAR_REGRESSION': (_fit_linear_batch, _predict_linear_batch),
+    'HOLT_WINTERS': _smoothing_backtester(fit_holt_winters, holt_winters_forecast),
+    'CROSTON': _smoothing_backtester(fit_croston, croston_forecast),
+}
+
+
+def backtest_product_chunk(task):
+    """
+    Rolling-origin evaluation of every requested model type on a chunk of products.
+    At each origin a model is fitted on the preceding `training_days` and scored
+    on the following `horizon` days. Runs inside worker processes, no database.
+    Returns: list of per-product, per-model-type metric dicts
+    """
+    quantities = np.asarray(task['quantities'], dtype=float)
+    training_days = task['training_days']
+    horizon = task['horizon']
+    n_products = len(quantities)
+
+    results = []
+    for model_type in task['model_types']:
+        fit, predict = BACKTESTERS[model_type]
+        errors, actuals = [], []
+        fit_seconds = predict_seconds = 0.0
+
+        for origin in task['origins']:
+            window = quantities[:, origin - training_days:origin]
+            window_start = task['history_start'] + timedelta(days=origin - training_days)
+            forecast_start = task['history_start'] + timedelta(days=origin)
+
+            started = time.perf_counter()
+            state = fit(window_start, window, training_days)
+            fitted = time.perf_counter()
+            predictions = predict(state, window, forecast_start, horizon)
+            fit_seconds += fitted - started
+            predict_seconds += time.perf_counter() - fitted
+
+            actual = quantities[:, origin:origin + horizon]
+            errors.append(predictions - actual)
+            actuals.append(actual)
+
+        errors = np.concatenate(errors, axis=1)
+        actuals = np.concatenate(actuals, axis=1)
+        sold = actuals > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ape = np.where(sold, np.abs(errors) / actuals * 100, np.nan)
+
+        for i, product_id in enumerate(task['product_ids']):
+            failed = np.isnan(errors[i]).all()
+            results.append({
+                'product_id': product_id,
+                'model_type': model_type,
+                'mae': None if failed else float(np.nanmean(np.abs(errors[i]))),
+                'rmse': None if failed else float(np.sqrt(np.nanmean(errors[i] ** 2))),
+                'mape': None if failed or not sold[i].any() else float(np.nanmean(ape[i])),
+                'observations': int(np.count_nonzero(~np.isnan(errors[i]))),
+                # Batches are timed as a whole, each product carries an equal share
+                'fit_seconds': fit_seconds / n_products,
+                'predict_seconds': predict_seconds / n_products,
+            })
+
+    return results
+
+
 def detect_seasonal_patterns(product, days=365):
     """
     Detect seasonal patterns in sales data
     Returns: list of seasonal periods
     """
     try:
-        from pos.models import TransactionItem
+        from pos.models import ProductSalesDaily
+        from django.db.models.functions import ExtractMonth
         
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=days)
         
-        # Get monthly sales from TransactionItem
-        monthly_sales = TransactionItem.objects.filter(
+        # Get monthly sales from the daily rollup
+        monthly_sales = ProductSalesDaily.objects.filter(
             product=product,
-            transaction__created_at__date__gte=start_date,
-            transaction__created_at__date__lte=end_date,
-            transaction__status='COMPLETED'
-        ).extra(
-            select={'month': "EXTRACT(month FROM transaction__created_at)"}
+            business_date__gte=start_date,
+            business_date__lte=end_date
+        ).annotate(
+            month=ExtractMonth('business_date')
         ).values('month').annotate(
             total_quantity=Sum('quantity')
         )
@@ -287,51 +675,68 @@ def detect_seasonal_patterns(product, days=365):
         return []
 
 
+PRIORITY_ACTIONS = {
+    'URGENT': 'URGENT_ORDER',
+    'HIGH': 'ORDER_SOON',
+    'MEDIUM': 'REORDER',
+    'LOW': 'MONITOR',
+}
+
+
+def recommend_stock(current_stock, reorder_level, daily_demand):
+    """
+    Vectorized stock recommendation for many products at once
+    Returns: days_until_stockout (inf without demand), priority, recommended_order arrays
+    """
+    current_stock = np.asarray(current_stock, dtype=float)
+    reorder_level = np.asarray(reorder_level, dtype=float)
+    daily_demand = np.asarray(daily_demand, dtype=float)
+    
+    # Calculate days until stockout
+    has_demand = daily_demand > 0
+    days_until_stockout = np.full(len(current_stock), np.inf)
+    days_until_stockout[has_demand] = current_stock[has_demand] / daily_demand[has_demand]
+    
+    # Determine priority
+    priority = np.select(
+        [days_until_stockout < 7, days_until_stockout < 14, current_stock < reorder_level],
+        ['URGENT', 'HIGH', 'MEDIUM'],
+        'LOW'
+    )
+    
+    # Order enough for 30 days + 1 week safety stock
+    safety_stock = np.trunc(daily_demand * 7)
+    recommended_order = np.trunc(
+        np.maximum(0, daily_demand * 30 - current_stock + safety_stock)
+    ).astype(int)
+    
+    return days_until_stockout, priority, recommended_order
+
+
 def generate_stock_recommendation(product, forecast):
     """
     Generate stock recommendation based on forecast
     Returns: recommendation dict
     """
     try:
-        current_stock = product.current_stock
-        reorder_point = product.reorder_point or 0
+        current_stock = product.current_stock or 0
         predicted_demand = forecast.predicted_demand
         
-        # Calculate days until stockout
-        if predicted_demand > 0:
-            days_until_stockout = current_stock / predicted_demand
-        else:
-            days_until_stockout = 999
-        
-        # Determine priority
-        if days_until_stockout < 7:
-            priority = 'CRITICAL'
-            action = 'URGENT_ORDER'
-        elif days_until_stockout < 14:
-            priority = 'HIGH'
-            action = 'ORDER_SOON'
-        elif current_stock < reorder_point:
-            priority = 'MEDIUM'
-            action = 'REORDER'
-        else:
-            priority = 'LOW'
-            action = 'MONITOR'
-        
-        # Calculate recommended order quantity
-        # Order enough for 30 days + safety stock
-        safety_stock = int(predicted_demand * 7)  # 1 week safety stock
-        recommended_order = max(0, (predicted_demand * 30) - current_stock + safety_stock)
+        days, priority, recommended_order = recommend_stock(
+            [current_stock], [product.reorder_level or 0], [predicted_demand]
+        )
+        days_until_stockout = days[0]
         
         reason = f"Current stock: {current_stock}, Predicted demand: {predicted_demand}/day"
-        if days_until_stockout < 999:
+        if np.isfinite(days_until_stockout):
             reason += f", Days until stockout: {int(days_until_stockout)}"
         
         return {
-            'priority': priority,
-            'action': action,
-            'recommended_order_quantity': int(recommended_order),
+            'priority': str(priority[0]),
+            'action': PRIORITY_ACTIONS[priority[0]],
+            'recommended_order_quantity': int(recommended_order[0]),
             'reason': reason,
-            'days_until_stockout': int(days_until_stockout) if days_until_stockout < 999 else None
+            'days_until_stockout': int(days_until_stockout) if np.isfinite(days_until_stockout) else None
         }
         
     except Exception as e:
@@ -342,4 +747,4 @@ def generate_stock_recommendation(product, forecast):
             'recommended_order_quantity': 0,
             'reason': 'Unable to generate recommendation',
             'days_until_stockout': None
-        }
\ No newline at end of file
+        }
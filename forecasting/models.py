@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+import numpy as np
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -10,6 +13,8 @@ class ForecastModel(models.Model):
     
     MODEL_TYPES = (
         ('LINEAR_REGRESSION', 'Linear Regression'),
+        ('HOLT_WINTERS', 'Holt-Winters Exponential Smoothing'),
+        ('CROSTON', 'Croston (SBA) Intermittent Demand'),
     )
     
     STATUS_CHOICES = (
@@ -19,7 +24,18 @@ class ForecastModel(models.Model):
         ('FAILED', 'Failed'),
     )
     
+    SLOT_CHOICES = (
+        ('CHAMPION', 'Champion'),
+        ('CHALLENGER', 'Challenger'),
+    )
+    
     name = models.CharField(max_length=200)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, null=True, blank=True, related_name='forecast_models',
+        help_text='Product this model forecasts'
+    )
+    slot = models.CharField(max_length=20, choices=SLOT_CHOICES, default='CHAMPION',
+                            help_text='Champion serves forecasts, a challenger is under evaluation')
     model_type = models.CharField(max_length=50, choices=MODEL_TYPES, default='LINEAR_REGRESSION')
     version = models.CharField(max_length=50)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='TRAINING')
@@ -52,6 +68,8 @@ class ForecastModel(models.Model):
     trained_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='trained_models')
     trained_at = models.DateTimeField(auto_now_add=True)
     last_used = models.DateTimeField(null=True, blank=True)
+    retrain_reason = models.CharField(max_length=255, blank=True,
+                                      help_text='Why this model replaced the previous one')
     
     class Meta:
         db_table = 'forecast_models'
@@ -61,20 +79,175 @@ class ForecastModel(models.Model):
         indexes = [
             models.Index(fields=['status', 'is_active']),
         ]
+        constraints = [
+            # One active model per product slot, also the index serving lookups use
+            models.UniqueConstraint(
+                fields=['product', 'slot'],
+                condition=models.Q(is_active=True),
+                name='unique_active_forecast_model_slot'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} v{self.version} ({self.get_status_display()})"
     
     def activate(self):
-        """Set this model as active and deactivate others"""
-        ForecastModel.objects.filter(is_active=True).update(is_active=False)
-        self.is_active = True
-        self.status = 'ACTIVE'
-        self.save()
+        """Set this model as active in its product slot, retiring only the model it replaces"""
+        from .registry import register_model
+        register_model(self, self.slot)
+
+
+class ForecastRun(models.Model):
+    """One forecast horizon for a product, the per-day values packed into arrays"""
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='forecast_runs')
+    forecast_model = models.ForeignKey(ForecastModel, on_delete=models.CASCADE, related_name='runs')
+    
+    # Horizon, end_date is pulled in when a newer run for the product takes over
+    start_date = models.DateField(help_text='First forecast day')
+    end_date = models.DateField(help_text='Last day this run is current for')
+    
+    # Little-endian int32 per day, seasonal factors float32, peak days one bit each
+    predictions = models.BinaryField()
+    lower = models.BinaryField()
+    upper = models.BinaryField()
+    seasonal_factors = models.BinaryField()
+    peak_days = models.BinaryField()
+    confidence_level = models.FloatField(default=95.0, help_text='Confidence level (e.g., 95%)')
+    
+    # Per-day value -> packed column and its dtype, None for one bit per day
+    PACKED_FIELDS = {
+        'predicted_demand': ('predictions', '<i4'),
+        'confidence_lower': ('lower', '<i4'),
+        'confidence_upper': ('upper', '<i4'),
+        'seasonal_factor': ('seasonal_factors', '<f4'),
+        'is_peak_season': ('peak_days', None),
+    }
+    
+    # Days up to here have been written out as ProductForecast rows for accuracy tracking
+    materialized_through = models.DateField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'forecast_runs'
+        verbose_name = 'Forecast Run'
+        verbose_name_plural = 'Forecast Runs'
+        ordering = ['-start_date']
+        unique_together = ['product', 'forecast_model', 'start_date']
+        indexes = [
+            models.Index(fields=['product', 'end_date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.start_date} to {self.end_date}"
+    
+    @classmethod
+    def pack(cls, predictions, conf_lower, conf_upper, is_peak, seasonal_factors, **fields):
+        """Build a run from per-day arrays starting at fields['start_date']"""
+        predictions = np.asarray(predictions, dtype='<i4')
+        return cls(
+            end_date=fields['start_date'] + timedelta(days=len(predictions) - 1),
+            predictions=predictions.tobytes(),
+            lower=np.asarray(conf_lower, dtype='<i4').tobytes(),
+            upper=np.asarray(conf_upper, dtype='<i4').tobytes(),
+            seasonal_factors=np.asarray(seasonal_factors, dtype='<f4').tobytes(),
+            peak_days=np.packbits(np.asarray(is_peak, dtype=bool)).tobytes(),
+            **fields
+        )
+    
+    @classmethod
+    def bulk_upsert(cls, runs, batch_size=500):
+        """
+        Insert runs in bulk, replacing a run of the same product/model/start date.
+        Older runs of these products stop being current where the new ones start,
+        and runs of another model starting the same day are deleted, so at most
+        one run covers any product and day.
+        """
+        by_start = {}
+        for run in runs:
+            by_start.setdefault(run.start_date, []).append(run)
+        for start_date, started in by_start.items():
+            product_ids = [run.product_id for run in started]
+            cls.objects.filter(
+                product_id__in=product_ids,
+                start_date__lt=start_date,
+                end_date__gte=start_date
+            ).update(end_date=start_date - timedelta(days=1))
+            
+            kept = models.Q()
+            for run in started:
+                kept |= models.Q(product_id=run.product_id, forecast_model_id=run.forecast_model_id)
+            cls.objects.filter(product_id__in=product_ids, start_date=start_date).exclude(kept).delete()
+        
+        return cls.objects.bulk_create(
+            runs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product', 'forecast_model', 'start_date'],
+            update_fields=['end_date', 'predictions', 'lower', 'upper', 'seasonal_factors',
+                           'peak_days', 'confidence_level', 'updated_at']
+        )
+    
+    @classmethod
+    def unpack(cls, name, data, days):
+        """First `days` values of the packed column behind per-day value `name`"""
+        _, dtype = cls.PACKED_FIELDS[name]
+        if dtype is None:
+            return np.unpackbits(np.frombuffer(bytes(data), dtype=np.uint8))[:days].astype(bool)
+        return np.frombuffer(bytes(data), dtype=dtype)[:days]
+    
+    @property
+    def days(self):
+        """Number of days this run is current for"""
+        return (self.end_date - self.start_date).days + 1
+    
+    @property
+    def predicted_demand(self):
+        return self.unpack('predicted_demand', self.predictions, self.days)
+    
+    @property
+    def confidence_lower(self):
+        return self.unpack('confidence_lower', self.lower, self.days)
+    
+    @property
+    def confidence_upper(self):
+        return self.unpack('confidence_upper', self.upper, self.days)
+    
+    @property
+    def seasonal_factor(self):
+        return self.unpack('seasonal_factor', self.seasonal_factors, self.days)
+    
+    @property
+    def is_peak_season(self):
+        return self.unpack('is_peak_season', self.peak_days, self.days)
+    
+    def daily(self):
+        """Per-day forecast values, shaped like ProductForecast rows"""
+        predicted, lower, upper = self.predicted_demand, self.confidence_lower, self.confidence_upper
+        is_peak, factors = self.is_peak_season, self.seasonal_factor
+        return [
+            {
+                'product': self.product_id,
+                'forecast_model': self.forecast_model_id,
+                'run': self.pk,
+                'forecast_date': self.start_date + timedelta(days=i),
+                'predicted_demand': int(predicted[i]),
+                'confidence_lower': int(lower[i]),
+                'confidence_upper': int(upper[i]),
+                'confidence_level': self.confidence_level,
+                'is_peak_season': bool(is_peak[i]),
+                'seasonal_factor': float(factors[i]),
+                # Safety stock is the upper bound, as on ProductForecast
+                'recommended_stock': int(upper[i]),
+            }
+            for i in range(self.days)
+        ]
 
 
 class ProductForecast(models.Model):
-    """Store demand forecasts for products"""
+    """Realized demand forecasts, written out from forecast runs once the date has passed"""
     
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='forecasts')
     forecast_model = models.ForeignKey(ForecastModel, on_delete=models.CASCADE, related_name='forecasts')
@@ -117,6 +290,18 @@ class ProductForecast(models.Model):
     def __str__(self):
         return f"{self.product.name} - {self.forecast_date}: {self.predicted_demand} units"
     
+    @classmethod
+    def bulk_upsert(cls, forecasts, batch_size=1000):
+        """Insert forecasts in bulk, refreshing rows that already exist for the same product/date/model"""
+        return cls.objects.bulk_create(
+            forecasts,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['product', 'forecast_date', 'forecast_model'],
+            update_fields=['predicted_demand', 'confidence_lower', 'confidence_upper',
+                           'is_peak_season', 'seasonal_factor', 'updated_at']
+        )
+    
     def calculate_accuracy(self):
         """Calculate forecast accuracy after actual demand is known"""
         if self.actual_demand is not None:
@@ -147,26 +332,42 @@ class CategoryForecast(models.Model):
     """Store aggregate forecasts for product categories"""
     
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='forecasts')
-    forecast_model = models.ForeignKey(ForecastModel, on_delete=models.CASCADE, related_name='category_forecasts')
+    # Bottom-up forecasts sum many product models, so they have no model of their own
+    forecast_model = models.ForeignKey(ForecastModel, on_delete=models.CASCADE, related_name='category_forecasts',
+                                       null=True, blank=True)
     
     forecast_date = models.DateField()
     predicted_demand = models.IntegerField(validators=[MinValueValidator(0)])
     confidence_lower = models.IntegerField(validators=[MinValueValidator(0)])
     confidence_upper = models.IntegerField(validators=[MinValueValidator(0)])
+    product_count = models.IntegerField(default=0, help_text='Products whose forecasts were summed')
     
     actual_demand = models.IntegerField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'category_forecasts'
         verbose_name = 'Category Forecast'
         verbose_name_plural = 'Category Forecasts'
         ordering = ['-forecast_date']
-        unique_together = ['category', 'forecast_date', 'forecast_model']
+        unique_together = ['category', 'forecast_date']
     
     def __str__(self):
         return f"{self.category.name} - {self.forecast_date}: {self.predicted_demand} units"
+    
+    @classmethod
+    def bulk_upsert(cls, forecasts, batch_size=1000):
+        """Insert category forecasts in bulk, refreshing rows that already exist for the same category/date"""
+        return cls.objects.bulk_create(
+            forecasts,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['category', 'forecast_date'],
+            update_fields=['forecast_model', 'predicted_demand', 'confidence_lower',
+                           'confidence_upper', 'product_count', 'updated_at']
+        )
 
 
 class SeasonalPattern(models.Model):
@@ -199,6 +400,7 @@ class SeasonalPattern(models.Model):
     
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    is_detected = models.BooleanField(default=False, help_text='Proposed by seasonality detection')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -245,7 +447,8 @@ class StockRecommendation(models.Model):
     )
     
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_recommendations')
-    forecast = models.ForeignKey(ProductForecast, on_delete=models.CASCADE, related_name='recommendations')
+    forecast = models.ForeignKey(ForecastRun, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='recommendations')
     
     # Recommendation details
     current_stock = models.IntegerField()
@@ -281,4 +484,229 @@ class StockRecommendation(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.product.name}: Order {self.recommended_order_quantity} units ({self.get_priority_display()})"
\ No newline at end of file
+        return f"{self.product.name}: Order {self.recommended_order_quantity} units ({self.get_priority_display()})"
+
+
+class ProductForecastSummary(models.Model):
+    """Precomputed forecast summary per product, refreshed whenever its forecasts are written"""
+    
+    TREND_CHOICES = (
+        ('increasing', 'Increasing'),
+        ('decreasing', 'Decreasing'),
+        ('stable', 'Stable'),
+        ('unknown', 'Unknown'),
+    )
+    
+    SEASONAL_IMPACT_CHOICES = (
+        ('high', 'High'),
+        ('normal', 'Normal'),
+    )
+    
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast_summary')
+    
+    # Date the forecast windows start from
+    as_of = models.DateField()
+    
+    # Upcoming demand
+    forecast_7_days = models.IntegerField(default=0)
+    forecast_30_days = models.IntegerField(default=0)
+    average_daily_demand = models.FloatField(default=0)
+    
+    # Pending recommendation
+    recommended_order = models.IntegerField(default=0)
+    priority = models.CharField(max_length=20, choices=StockRecommendation.PRIORITY_CHOICES, default='LOW')
+    
+    trend = models.CharField(max_length=20, choices=TREND_CHOICES, default='unknown')
+    seasonal_impact = models.CharField(max_length=20, choices=SEASONAL_IMPACT_CHOICES, default='normal')
+    
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'product_forecast_summaries'
+        verbose_name = 'Product Forecast Summary'
+        verbose_name_plural = 'Product Forecast Summaries'
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.forecast_7_days} units next 7 days"
+    
+    def days_until_stockout(self, current_stock):
+        """Days the given stock lasts at the forecast daily demand"""
+        if self.average_daily_demand > 0:
+            return int(current_stock / self.average_daily_demand)
+        return 999
+
+
+class ForecastJob(models.Model):
+    """Track bulk forecast generation runs"""
+    
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    )
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    
+    # Job parameters (product selection, horizon, training window)
+    parameters = models.JSONField(default=dict)
+    
+    # Progress
+    total_products = models.IntegerField(default=0)
+    processed_products = models.IntegerField(default=0)
+    forecasts_generated = models.IntegerField(default=0)
+    recommendations_generated = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    # Tracking
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='forecast_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Touched as each chunk is saved, a running job that stops touching it has died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'forecast_jobs'
+        verbose_name = 'Forecast Job'
+        verbose_name_plural = 'Forecast Jobs'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Forecast job #{self.id} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Percentage of selected products processed"""
+        if self.total_products > 0:
+            return round(self.processed_products / self.total_products * 100, 2)
+        return 100.0 if self.status == 'COMPLETED' else 0.0
+
+
+class ForecastAccuracySummary(models.Model):
+    """Accuracy totals per model and category, refreshed when actual demand is backfilled"""
+    
+    forecast_model = models.ForeignKey(ForecastModel, on_delete=models.CASCADE, related_name='accuracy_summaries')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='forecast_accuracy_summaries')
+    
+    # Forecasts with known actual demand
+    total_forecasts = models.IntegerField(default=0)
+    accurate_forecasts = models.IntegerField(default=0, help_text='Within 20% of actual demand')
+    
+    # Sums kept so averages can be combined across categories
+    error_sum = models.BigIntegerField(default=0)
+    percentage_error_sum = models.FloatField(default=0)
+    percentage_error_count = models.IntegerField(default=0)
+    
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'forecast_accuracy_summaries'
+        verbose_name = 'Forecast Accuracy Summary'
+        verbose_name_plural = 'Forecast Accuracy Summaries'
+        unique_together = ['forecast_model', 'category']
+    
+    def __str__(self):
+        return f"{self.forecast_model.name} - {self.category.name}: {self.accurate_forecasts}/{self.total_forecasts}"
+    
+    @property
+    def accuracy_rate(self):
+        if self.total_forecasts > 0:
+            return self.accurate_forecasts / self.total_forecasts * 100
+        return 0
+
+
+class BacktestRun(models.Model):
+    """Rolling-origin evaluation of the forecasting model types over the catalog"""
+    
+    STATUS_CHOICES = ForecastJob.STATUS_CHOICES
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    
+    # Origins, horizon, training window, model types and product selection
+    parameters = models.JSONField(default=dict)
+    
+    total_products = models.IntegerField(default=0)
+    # Per model type: mean MAE/RMSE/MAPE and total fit/predict seconds
+    summary = models.JSONField(default=dict, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='backtest_runs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'forecast_backtest_runs'
+        verbose_name = 'Backtest Run'
+        verbose_name_plural = 'Backtest Runs'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Backtest #{self.id} ({self.get_status_display()})"
+
+
+class BacktestResult(models.Model):
+    """Backtest errors and cost of one model type on one product"""
+    
+    run = models.ForeignKey(BacktestRun, on_delete=models.CASCADE, related_name='results')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='backtest_results')
+    model_type = models.CharField(max_length=50, choices=ForecastModel.MODEL_TYPES)
+    
+    # Null when the model could not be fitted (MAPE also when nothing sold)
+    mae = models.FloatField(null=True, blank=True)
+    rmse = models.FloatField(null=True, blank=True)
+    mape = models.FloatField(null=True, blank=True)
+    observations = models.IntegerField(default=0, help_text='Forecast days scored across all origins')
+    
+    fit_seconds = models.FloatField(default=0)
+    predict_seconds = models.FloatField(default=0)
+    
+    class Meta:
+        db_table = 'forecast_backtest_results'
+        verbose_name = 'Backtest Result'
+        verbose_name_plural = 'Backtest Results'
+        unique_together = ['run', 'product', 'model_type']
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.model_type}: MAE {self.mae}"
+
+
+class ReorderLevelProposal(models.Model):
+    """Reorder level proposed for a product by the inventory policy simulation"""
+    
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('APPLIED', 'Applied'),
+        ('DISMISSED', 'Dismissed'),
+    )
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reorder_proposals')
+    current_reorder_level = models.IntegerField()
+    proposed_reorder_level = models.IntegerField(validators=[MinValueValidator(0)])
+    shelf_life_days = models.IntegerField(null=True, blank=True, help_text='Empty for products that do not expire')
+    
+    # Simulated share of days with unmet demand and share of stock thrown away
+    current_stockout_rate = models.FloatField()
+    current_spoilage_rate = models.FloatField()
+    stockout_rate = models.FloatField()
+    spoilage_rate = models.FloatField()
+    
+    paths = models.IntegerField(help_text='Demand paths simulated')
+    horizon_days = models.IntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    created_at = models.DateTimeField(auto_now_add=True)
+    applied_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'reorder_level_proposals'
+        verbose_name = 'Reorder Level Proposal'
+        verbose_name_plural = 'Reorder Level Proposals'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name}: {self.current_reorder_level} -> {self.proposed_reorder_level}"
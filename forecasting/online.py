@@ -0,0 +1,149 @@
+"""
+Online updates for the linear forecaster
+Folds each closed business day into every product's regression with
+recursive least squares and a forgetting factor, so models track recent
+demand daily in O(features²) per product instead of a full refit.
+The RLS covariance is stored with the model's weights in its parameters.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .ml_utils import FEATURE_COLUMNS, lag_feature_matrix, load_sales_histories
+from .models import ForecastModel
+
+# Weight of yesterday's evidence relative to today's, ~100 days of effective memory
+RLS_FORGETTING = 0.99
+# Ridge on the initial Gram matrix. Features constant over a training window (month)
+# would otherwise leave directions with unbounded covariance that swing on the first new day
+RLS_RIDGE = 1.0
+# Longest gap folded in one run, older models are left to the drift scheduler
+MAX_CATCH_UP_DAYS = 30
+
+
+def with_intercept(features):
+    """Append the constant column the folded bias multiplies"""
+    return np.concatenate([features, np.ones(features.shape[:-1] + (1,))], axis=-1)
+
+
+def rls_initialize(features, mask):
+    """
+    Covariance matching a least-squares fit on the masked rows of each product
+    features: (products, days, k) with the intercept column, mask: (products, days)
+    Returns: (products, k, k) inverse Gram matrices
+    """
+    gram = np.einsum('nt,nti,ntj->nij', mask, features, features)
+    return np.linalg.inv(gram + RLS_RIDGE * np.eye(features.shape[-1]))
+
+
+def rls_update(theta, covariance, x, y, forgetting=RLS_FORGETTING, active=None):
+    """
+    One recursive-least-squares step for a batch of products
+    theta: (products, k), covariance: (products, k, k), x: (products, k), y: (products,)
+    Rows where `active` is False are returned unchanged.
+    Returns: theta, covariance
+    """
+    px = np.einsum('nij,nj->ni', covariance, x)
+    gain = px / (forgetting + np.einsum('ni,ni->n', x, px))[:, None]
+    error = y - np.einsum('ni,ni->n', x, theta)
+
+    new_theta = theta + gain * error[:, None]
+    new_covariance = (covariance - np.einsum('ni,nj->nij', gain, px)) / forgetting
+
+    if active is None:
+        return new_theta, new_covariance
+    return (
+        np.where(active[:, None], new_theta, theta),
+        np.where(active[:, None, None], new_covariance, covariance)
+    )
+
+
+@transaction.atomic
+def update_models_online(until=None, forgetting=RLS_FORGETTING):
+    """
+    Fold every closed business day up to `until` (yesterday by default) into
+    the active linear models. Models without RLS state start from the
+    covariance of a training-length window ending the day before the first
+    folded day, which is their training window unless they fell far behind.
+    Returns: number of models updated
+    """
+    today = timezone.now().date()
+    until = until or today - timedelta(days=1)
+
+    models = list(ForecastModel.objects.filter(
+        model_type='LINEAR_REGRESSION',
+        is_active=True,
+        product__isnull=False,
+        parameters__has_key='weights'
+    ).order_by('id'))
+
+    pending = []
+    for forecast_model in models:
+        state = forecast_model.parameters.get('rls')
+        last_update = (
+            date.fromisoformat(state['last_update']) if state
+            else forecast_model.training_end_date
+        )
+        first_day = max(last_update + timedelta(days=1), until - timedelta(days=MAX_CATCH_UP_DAYS))
+        if first_day <= until:
+            pending.append((forecast_model, state, first_day))
+    if not pending:
+        return 0
+
+    # One history load covering every training window and day to fold, plus lag warm-up
+    earliest = min(
+        first_day if state else first_day - timedelta(days=forecast_model.parameters.get('training_days', 90))
+        for forecast_model, state, first_day in pending
+    )
+    history_start, quantities, _ = load_sales_histories(
+        [forecast_model.product_id for forecast_model, _, _ in pending],
+        days=(today - earliest).days + 14
+    )
+    features = with_intercept(lag_feature_matrix(history_start, quantities))
+    n_days = quantities.shape[1]
+
+    def day_index(day):
+        return (day - history_start).days
+
+    theta = np.array([
+        forecast_model.parameters['weights'] + [forecast_model.parameters['bias']]
+        for forecast_model, _, _ in pending
+    ])
+    covariance = np.zeros((len(pending), len(FEATURE_COLUMNS) + 1, len(FEATURE_COLUMNS) + 1))
+    first = np.array([day_index(first_day) for _, _, first_day in pending])
+
+    # Models without state start from the covariance of the rows they were fitted on
+    fresh = np.array([state is None for _, state, _ in pending])
+    if fresh.any():
+        windows = np.zeros((len(pending), n_days))
+        for i, (forecast_model, state, first_day) in enumerate(pending):
+            if state is None:
+                end = day_index(first_day)
+                windows[i, max(end - forecast_model.parameters.get('training_days', 90), 0):end] = 1
+        covariance[fresh] = rls_initialize(features[fresh], windows[fresh])
+    for i, (_, state, _) in enumerate(pending):
+        if state is not None:
+            covariance[i] = np.array(state['covariance'])
+
+    for t in range(first.min(), day_index(until) + 1):
+        theta, covariance = rls_update(
+            theta, covariance, features[:, t], quantities[:, t], forgetting, active=first <= t
+        )
+
+    for i, (forecast_model, state, first_day) in enumerate(pending):
+        forecast_model.parameters = {
+            **forecast_model.parameters,
+            'weights': theta[i, :-1].tolist(),
+            'bias': float(theta[i, -1]),
+            'rls': {
+                'covariance': covariance[i].tolist(),
+                'forgetting': forgetting,
+                'last_update': until.isoformat(),
+                'updates': (state or {}).get('updates', 0) + (until - first_day).days + 1
+            }
+        }
+    ForecastModel.objects.bulk_update([m for m, _, _ in pending], ['parameters'], batch_size=500)
+
+    return len(pending)
@@ -0,0 +1,106 @@
+"""
+Catalog-wide stock recommendations
+Scores every active product against its upcoming forecast demand in one
+vectorized pass and upserts the pending recommendations in bulk
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import Product
+from .ml_utils import recommend_stock
+from .models import StockRecommendation
+from .runs import load_forecast_grid
+from .summaries import SHORT_WINDOW, refresh_forecast_summaries
+
+
+def load_upcoming_demand(product_ids, today=None):
+    """
+    Average forecast demand over the next week and the run covering the nearest forecast day per product
+    Returns: daily_demand array, {product_id: forecast_run_id}
+    """
+    today = today or timezone.now().date()
+    product_ids, grid = load_forecast_grid(product_ids, today + timedelta(days=1), SHORT_WINDOW)
+
+    weekly_demand = grid['predicted_demand'].sum(axis=1)
+    nearest = grid['covered'].argmax(axis=1)
+    nearest_forecast = {
+        product_id: int(grid['run_id'][i, nearest[i]])
+        for i, product_id in enumerate(product_ids)
+        if grid['covered'][i].any()
+    }
+
+    return weekly_demand / SHORT_WINDOW, nearest_forecast
+
+
+@transaction.atomic
+def generate_recommendations(product_ids=None):
+    """
+    Create or update the pending recommendation of every active product with forecasts
+    Products whose stock, order quantity and priority are unchanged are skipped
+    Returns: number of recommendations created or updated
+    """
+    products = Product.objects.filter(is_active=True)
+    if product_ids is not None:
+        products = products.filter(id__in=product_ids)
+
+    rows = list(products.order_by('id').values_list('id', 'current_stock', 'reorder_level'))
+    if not rows:
+        return 0
+
+    ids, current_stock, reorder_level = zip(*rows)
+    current_stock = [stock or 0 for stock in current_stock]
+    reorder_level = [level or 0 for level in reorder_level]
+
+    daily_demand, nearest_forecast = load_upcoming_demand(ids)
+    days_until_stockout, priority, recommended_order = recommend_stock(
+        current_stock, reorder_level, daily_demand
+    )
+
+    pending = {}
+    for recommendation in StockRecommendation.objects.filter(
+        product_id__in=ids,
+        status='PENDING'
+    ).order_by('product_id', '-created_at'):
+        pending.setdefault(recommendation.product_id, recommendation)
+
+    created, updated = [], []
+    for i, product_id in enumerate(ids):
+        # Recommendations hang off a forecast run, products without one are left alone
+        if product_id not in nearest_forecast:
+            continue
+
+        existing = pending.get(product_id)
+        values = {
+            'forecast_id': nearest_forecast[product_id],
+            'current_stock': current_stock[i],
+            'recommended_order_quantity': int(recommended_order[i]),
+            'priority': str(priority[i]),
+            'reason': f"Current stock: {current_stock[i]}, Predicted demand: {daily_demand[i]:.1f}/day",
+        }
+        if np.isfinite(days_until_stockout[i]):
+            values['reason'] += f", Days until stockout: {int(days_until_stockout[i])}"
+
+        if existing is None:
+            if values['recommended_order_quantity'] > 0 or values['priority'] != 'LOW':
+                created.append(StockRecommendation(product_id=product_id, **values))
+        elif (
+            existing.current_stock != values['current_stock']
+            or existing.recommended_order_quantity != values['recommended_order_quantity']
+            or existing.priority != values['priority']
+        ):
+            for field, value in values.items():
+                setattr(existing, field, value)
+            updated.append(existing)
+
+    StockRecommendation.objects.bulk_create(created, batch_size=1000)
+    StockRecommendation.objects.bulk_update(
+        updated,
+        ['forecast', 'current_stock', 'recommended_order_quantity', 'priority', 'reason'],
+        batch_size=1000
+    )
+
+    refresh_forecast_summaries([r.product_id for r in created + updated])
+    return len(created) + len(updated)
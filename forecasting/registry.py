@@ -0,0 +1,71 @@
+"""
+Per-product model registry
+Every product has at most one active model per slot: the champion that
+serves its forecasts and an optional challenger under evaluation. A partial
+unique constraint enforces this and doubles as the index that serving
+lookups use. Lookups are not cached: the cache is per process, so other
+workers and management commands could not invalidate it, and the indexed
+lookup is a single query.
+"""
+from django.db import transaction
+
+from .models import ForecastModel
+
+
+def get_serving_models(product_ids, slot='CHAMPION'):
+    """
+    Active model in `slot` for each product, with one indexed query
+    Returns: dict of product id -> ForecastModel, products without one are left out
+    """
+    return {
+        forecast_model.product_id: forecast_model
+        for forecast_model in ForecastModel.objects.filter(
+            product_id__in=list(product_ids), slot=slot, is_active=True
+        )
+    }
+
+
+def get_serving_model(product_id, slot='CHAMPION'):
+    """Active model in `slot` for one product, or None"""
+    return get_serving_models([product_id], slot).get(product_id)
+
+
+def retire_models(product_ids, slot='CHAMPION'):
+    """Deprecate the active models in `slot` for these products only"""
+    return ForecastModel.objects.filter(
+        product_id__in=product_ids, slot=slot, is_active=True
+    ).update(is_active=False, status='DEPRECATED')
+
+
+@transaction.atomic
+def register_model(forecast_model, slot='CHAMPION'):
+    """
+    Save `forecast_model` as the active model in its product's slot,
+    retiring the model that held it. Other products are untouched.
+    """
+    ForecastModel.objects.filter(
+        product_id=forecast_model.product_id, slot=slot, is_active=True
+    ).exclude(pk=forecast_model.pk).update(is_active=False, status='DEPRECATED')
+
+    forecast_model.slot = slot
+    forecast_model.is_active = True
+    forecast_model.status = 'ACTIVE'
+    forecast_model.save()
+    return forecast_model
+
+
+@transaction.atomic
+def promote_challenger(product_id):
+    """
+    Make the product's challenger its champion, deprecating the old champion
+    Returns: the new champion, or None when the product has no challenger
+    """
+    challenger = ForecastModel.objects.select_for_update().filter(
+        product_id=product_id, slot='CHALLENGER', is_active=True
+    ).first()
+    if challenger is None:
+        return None
+
+    # Vacate the challenger slot first, the champion slot is taken over by register_model
+    ForecastModel.objects.filter(pk=challenger.pk).update(is_active=False)
+    return register_model(challenger, 'CHAMPION')
@@ -0,0 +1,101 @@
+"""
+Drift-triggered retraining
+Compares each active model's realized error on backfilled actuals against
+the error it had at training time and retrains only the products whose
+forecasts have drifted, instead of refitting the whole catalog every night
+"""
+from datetime import timedelta
+
+from django.db.models import Avg, Count, F
+from django.db.models.functions import Abs
+from django.utils import timezone
+
+from .jobs import run_forecast_job
+from .models import ForecastJob, ForecastModel, ProductForecast
+from .registry import retire_models
+
+DRIFT_WINDOW_DAYS = 14
+# Realized MAE this many times the training MAE counts as drift
+DRIFT_THRESHOLD = 1.5
+# Days with actual demand needed before a model is judged
+MIN_DRIFT_OBSERVATIONS = 7
+# Training MAE floor, so near-perfect fits on tiny volumes do not drift on one unit of error
+MIN_TRAINING_MAE = 0.5
+
+
+def detect_drift(window_days=DRIFT_WINDOW_DAYS, threshold=DRIFT_THRESHOLD,
+                 min_observations=MIN_DRIFT_OBSERVATIONS, today=None):
+    """
+    Realized MAE of every active product model over the last `window_days`,
+    from one grouped aggregate over backfilled forecasts
+    Returns: list of drift dicts for models past the threshold
+    """
+    today = today or timezone.now().date()
+
+    realized = ProductForecast.objects.filter(
+        forecast_model__is_active=True,
+        actual_demand__isnull=False,
+        forecast_date__gte=today - timedelta(days=window_days),
+        forecast_date__lt=today
+    ).values('forecast_model_id').annotate(
+        realized_mae=Avg(Abs(F('forecast_error'))),
+        observations=Count('id')
+    ).filter(observations__gte=min_observations).order_by()
+    realized = {row['forecast_model_id']: row for row in realized}
+
+    drifted = []
+    for forecast_model in ForecastModel.objects.filter(
+        id__in=realized,
+        product__isnull=False
+    ):
+        row = realized[forecast_model.id]
+        training_mae = max(forecast_model.mae or 0, MIN_TRAINING_MAE)
+        if row['realized_mae'] <= threshold * training_mae:
+            continue
+
+        drifted.append({
+            'model': forecast_model,
+            'product_id': forecast_model.product_id,
+            'realized_mae': row['realized_mae'],
+            'training_mae': forecast_model.mae,
+            'observations': row['observations'],
+            'reason': (
+                f"Drift: MAE {row['realized_mae']:.2f} over the last {row['observations']} days "
+                f"vs {training_mae:.2f} at training"
+            )
+        })
+
+    return drifted
+
+
+def retrain_drifted_models(window_days=DRIFT_WINDOW_DAYS, threshold=DRIFT_THRESHOLD,
+                           forecast_days=30, training_days=90, user=None, dry_run=False):
+    """
+    Deprecate drifted models and refit their products with one forecast job per model type
+    Returns: drift dicts, forecast jobs run
+    """
+    drifted = detect_drift(window_days, threshold)
+    if dry_run or not drifted:
+        return drifted, []
+
+    retire_models([d['product_id'] for d in drifted])
+
+    by_type = {}
+    for drift in drifted:
+        by_type.setdefault(drift['model'].model_type, []).append(drift)
+
+    jobs = []
+    for model_type, drifts in by_type.items():
+        job = ForecastJob.objects.create(
+            parameters={
+                'product_ids': [d['product_id'] for d in drifts],
+                'model_type': model_type,
+                'forecast_days': forecast_days,
+                'training_days': training_days,
+                'retrain_reasons': {str(d['product_id']): d['reason'] for d in drifts}
+            },
+            created_by=user
+        )
+        jobs.append(run_forecast_job(job.id))
+
+    return drifted, jobs
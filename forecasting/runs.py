@@ -0,0 +1,127 @@
+"""
+Packed forecast runs
+Forecast horizons are stored as one ForecastRun per product, model and run
+with the per-day values packed into arrays. Readers unpack the current runs
+into a (products x days) grid, and the days that have passed are written
+out as ProductForecast rows for accuracy tracking.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import ForecastRun, ProductForecast
+
+MATERIALIZE_BATCH_SIZE = 500
+
+
+def load_forecast_grid(product_ids, start_date, days=None, fields=tuple(ForecastRun.PACKED_FIELDS)):
+    """
+    Current forecast of each product for each day from `start_date`, read from
+    the runs covering the window with one values_list query. Where runs overlap
+    on a day the most recently written one counts.
+    product_ids: products to load, or None for every product with a run in the window
+    days: window length, or None to run to the last covered day
+    fields: per-day values to unpack, only their packed columns are read
+    Returns: product ids and a dict of (products, days) arrays, `covered` marks filled cells
+    """
+    runs = ForecastRun.objects.filter(end_date__gte=start_date)
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        runs = runs.filter(product_id__in=product_ids)
+    if days is not None:
+        runs = runs.filter(start_date__lte=start_date + timedelta(days=days - 1))
+    columns = [ForecastRun.PACKED_FIELDS[field][0] for field in fields]
+    runs = list(runs.order_by('updated_at', 'id').values_list(
+        'id', 'product_id', 'forecast_model_id', 'start_date', 'end_date', *columns
+    ))
+
+    if product_ids is None:
+        product_ids = sorted({run[1] for run in runs})
+    if days is None:
+        days = max(((run[4] - start_date).days + 1 for run in runs), default=0)
+
+    shape = (len(product_ids), days)
+    empty = {
+        'predicted_demand': np.zeros(shape, dtype=np.int64),
+        'confidence_lower': np.zeros(shape, dtype=np.int64),
+        'confidence_upper': np.zeros(shape, dtype=np.int64),
+        'seasonal_factor': np.ones(shape),
+        'is_peak_season': np.zeros(shape, dtype=bool),
+    }
+    grid = {field: empty[field] for field in fields}
+    grid.update({
+        'covered': np.zeros(shape, dtype=bool),
+        'run_id': np.zeros(shape, dtype=np.int64),
+        'forecast_model_id': np.zeros(shape, dtype=np.int64),
+    })
+
+    index = {product_id: i for i, product_id in enumerate(product_ids)}
+    for run_id, product_id, forecast_model_id, run_start, run_end, *packed in runs:
+        i = index[product_id]
+        first = max((run_start - start_date).days, 0)
+        last = min((run_end - start_date).days + 1, days)
+        offset = (start_date - run_start).days
+
+        for field, data in zip(fields, packed):
+            grid[field][i, first:last] = ForecastRun.unpack(field, data, last + offset)[first + offset:]
+        grid['covered'][i, first:last] = True
+        grid['run_id'][i, first:last] = run_id
+        grid['forecast_model_id'][i, first:last] = forecast_model_id
+
+    return product_ids, grid
+
+
+def materialize_realized_forecasts(until, batch_size=MATERIALIZE_BATCH_SIZE):
+    """
+    Write out the run days before `until` as ProductForecast rows, without actual
+    demand yet, and delete runs that have no days left to realize
+    Returns: number of rows written
+    """
+    last_day = until - timedelta(days=1)
+    runs = ForecastRun.objects.filter(start_date__lte=last_day).filter(
+        Q(materialized_through__isnull=True)
+        | (Q(materialized_through__lt=F('end_date')) & Q(materialized_through__lt=last_day))
+    )
+
+    written = 0
+    last_id = 0
+    while True:
+        batch = list(runs.filter(id__gt=last_id).order_by('id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        forecasts = []
+        for run in batch:
+            first = run.start_date if run.materialized_through is None else run.materialized_through + timedelta(days=1)
+            through = min(run.end_date, last_day)
+            daily = run.daily()
+            for day in range((first - run.start_date).days, (through - run.start_date).days + 1):
+                values = daily[day]
+                forecasts.append(ProductForecast(
+                    product_id=run.product_id,
+                    forecast_model_id=run.forecast_model_id,
+                    forecast_date=values['forecast_date'],
+                    predicted_demand=values['predicted_demand'],
+                    confidence_lower=values['confidence_lower'],
+                    confidence_upper=values['confidence_upper'],
+                    confidence_level=values['confidence_level'],
+                    is_peak_season=values['is_peak_season'],
+                    seasonal_factor=values['seasonal_factor']
+                ))
+            run.materialized_through = through
+
+        with transaction.atomic():
+            ProductForecast.bulk_upsert(forecasts)
+            ForecastRun.objects.bulk_update(batch, ['materialized_through'], batch_size=1000)
+        written += len(forecasts)
+
+    # Every day of these runs is behind us and written out
+    ForecastRun.objects.filter(
+        end_date__lte=last_day,
+        materialized_through__gte=F('end_date')
+    ).delete()
+
+    return written
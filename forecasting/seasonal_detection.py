@@ -0,0 +1,239 @@
+"""
+Seasonality detection
+Scans the daily demand history of every category at once, measures weekly
+and annual autocorrelation, and proposes SeasonalPattern rows for the
+days of the year that sell well above the category's normal level
+"""
+from datetime import date as date_type, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventory.models import Category
+from .models import SeasonalPattern
+from .seasonality import DAYS_IN_CALENDAR, REFERENCE_YEAR, day_of_year_index
+
+WEEK = 7
+YEAR = 365
+
+# A day of the year counts as peak when it sells this many times the normal level
+PEAK_RATIO = 1.5
+MIN_PEAK_DAYS = 2
+
+# Excess demand over a peak must be this many standard deviations above expected
+MIN_PEAK_ZSCORE = 5
+
+
+def load_category_histories(days=730):
+    """
+    Zero-filled daily sales per category with one grouped query
+    Returns: start_date, category_ids, quantities (categories x days matrix)
+    """
+    from pos.models import ProductSalesDaily
+
+    end_date = timezone.now().date()
+    start_date = end_date - timedelta(days=days)
+
+    sales_data = list(ProductSalesDaily.objects.filter(
+        business_date__gte=start_date,
+        business_date__lte=end_date
+    ).values('product__category_id', 'business_date').annotate(
+        total_quantity=Sum('quantity')
+    ).order_by().values_list('product__category_id', 'business_date', 'total_quantity'))
+
+    category_ids = sorted({category_id for category_id, _, _ in sales_data})
+    row_index = {category_id: i for i, category_id in enumerate(category_ids)}
+    quantities = np.zeros((len(category_ids), days + 1))
+
+    for category_id, date, total_quantity in sales_data:
+        quantities[row_index[category_id], (date - start_date).days] = total_quantity
+
+    return start_date, category_ids, quantities
+
+
+def autocorrelation(quantities, lags):
+    """
+    Autocorrelation of every row at the given lags, computed for all lags
+    at once through the FFT power spectrum (Wiener-Khinchin)
+    Returns: (rows, len(lags)) array, NaN where a lag exceeds the history
+    """
+    quantities = np.atleast_2d(quantities)
+    n_days = quantities.shape[1]
+    centered = quantities - quantities.mean(axis=1, keepdims=True)
+
+    spectrum = np.fft.rfft(centered, n=2 * n_days, axis=1)
+    covariance = np.fft.irfft(spectrum * np.conj(spectrum), axis=1)[:, :n_days]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acf = covariance / covariance[:, :1]
+
+    lags = np.asarray(lags)
+    result = np.full((len(quantities), len(lags)), np.nan)
+    valid = lags < n_days
+    result[:, valid] = acf[:, lags[valid]]
+    return result
+
+
+def day_of_year_profile(start_date, quantities, first_sale=None):
+    """
+    Observed and expected demand per calendar day for every row, summed
+    across years into 366 day-of-year slots. Expected demand is the row's
+    mean since its first sale scaled by its weekday index, so weekend peaks
+    are not read as seasons.
+    Returns: observed, expected as (rows, 366) arrays and each row's
+    dispersion (residual variance over mean, at least 1 as for Poisson counts)
+    """
+    n_rows, n_days = quantities.shape
+    if first_sale is None:
+        first_sale = np.zeros(n_rows, dtype=int)
+
+    dates = [start_date + timedelta(days=i) for i in range(n_days)]
+    weekdays = np.array([d.weekday() for d in dates])
+    slots = np.array([day_of_year_index(d) for d in dates])
+    covered = np.arange(n_days)[None, :] >= first_sale[:, None]
+    sold = quantities * covered
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sold.sum(axis=1) / covered.sum(axis=1)
+        weekday_means = np.stack([
+            sold[:, weekdays == w].sum(axis=1) / covered[:, weekdays == w].sum(axis=1)
+            for w in range(WEEK)
+        ], axis=1)
+    weekday_means = np.nan_to_num(weekday_means)
+
+    residuals = (sold - weekday_means[:, weekdays]) * covered
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dispersion = (residuals ** 2).sum(axis=1) / covered.sum(axis=1) / mean
+    dispersion = np.maximum(np.nan_to_num(dispersion, nan=1), 1)
+
+    observed = np.zeros((n_rows, DAYS_IN_CALENDAR))
+    expected = np.zeros((n_rows, DAYS_IN_CALENDAR))
+    np.add.at(observed, (slice(None), slots), sold)
+    np.add.at(expected, (slice(None), slots), weekday_means[:, weekdays] * covered)
+
+    # Histories without a leap day never fill Feb 29, borrow Feb 28 so seasons are not split
+    feb_29 = day_of_year_index(date_type(REFERENCE_YEAR, 2, 29))
+    missing = expected[:, feb_29] == 0
+    observed[missing, feb_29] = observed[missing, feb_29 - 1]
+    expected[missing, feb_29] = expected[missing, feb_29 - 1]
+
+    return observed, expected, dispersion
+
+
+def find_peak_seasons(observed, expected, dispersion=1, threshold=PEAK_RATIO,
+                      min_days=MIN_PEAK_DAYS, min_zscore=MIN_PEAK_ZSCORE):
+    """
+    Runs of consecutive day-of-year slots selling at least `threshold` times
+    the expected level, wrapping around the year end. A run is kept only if
+    its excess demand is significant for count data (over-dispersed Poisson
+    z-score), which filters out noise in short or thin histories.
+    Returns: list of (start_slot, end_slot, demand_multiplier)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        peak = np.nan_to_num(observed / expected) >= threshold
+    if peak.all() or not peak.any():
+        return []
+
+    # Rotate so the calendar starts on a non-peak day and no run straddles the edges
+    shift = int(np.argmin(peak))
+    rotated = np.roll(peak, -shift)
+    edges = np.diff(np.concatenate([[0], rotated.astype(int), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+
+    seasons = []
+    for start, end in zip(starts, ends):
+        if end - start + 1 < min_days:
+            continue
+        run = (np.arange(start, end + 1) + shift) % DAYS_IN_CALENDAR
+        run_observed = observed[run].sum()
+        run_expected = expected[run].sum()
+        if (run_observed - run_expected) / np.sqrt(dispersion * run_expected) < min_zscore:
+            continue
+        seasons.append((int(run[0]), int(run[-1]), float(run_observed / run_expected)))
+    return seasons
+
+
+def slot_to_month_day(slot):
+    day = date_type(REFERENCE_YEAR, 1, 1) + timedelta(days=int(slot))
+    return day.month, day.day
+
+
+@transaction.atomic
+def detect_category_seasonality(days=730, threshold=PEAK_RATIO, min_days=MIN_PEAK_DAYS):
+    """
+    Propose seasonal patterns for every category with at least a year of sales.
+    Proposals are created inactive for review and replace earlier proposals
+    that were never activated.
+    Returns: per-category report dicts
+    """
+    start_date, category_ids, quantities = load_category_histories(days)
+    if not category_ids:
+        return []
+
+    # History actually covered by each category, from its first sale
+    first_sale = np.argmax(quantities > 0, axis=1)
+    covered_days = quantities.shape[1] - first_sale
+
+    acf = autocorrelation(quantities, [WEEK, YEAR])
+    observed, expected, dispersion = day_of_year_profile(start_date, quantities, first_sale)
+    names = dict(Category.objects.filter(id__in=category_ids).values_list('id', 'name'))
+
+    report = []
+    proposals = []
+    for i, category_id in enumerate(category_ids):
+        weekly_acf, annual_acf = acf[i]
+        seasons = []
+
+        if covered_days[i] >= YEAR:
+            seasons = find_peak_seasons(
+                observed[i], expected[i], dispersion[i], threshold, min_days
+            )
+
+        for start_slot, end_slot, multiplier in seasons:
+            start_month, start_day = slot_to_month_day(start_slot)
+            end_month, end_day = slot_to_month_day(end_slot)
+            length = (end_slot - start_slot) % DAYS_IN_CALENDAR + 1
+
+            proposals.append((category_id, SeasonalPattern(
+                name=f"{names[category_id]} peak {start_month}/{start_day}-{end_month}/{end_day}",
+                season_type='MONTHLY' if length >= 28 else 'SPECIAL',
+                start_month=start_month,
+                start_day=start_day,
+                end_month=end_month,
+                end_day=end_day,
+                demand_multiplier=round(multiplier, 2),
+                description=(
+                    f"Detected from {int(covered_days[i])} days of sales "
+                    f"(weekly autocorrelation {weekly_acf:.2f}, annual {np.nan_to_num(annual_acf):.2f})"
+                ),
+                is_active=False,
+                is_detected=True
+            )))
+
+        report.append({
+            'category_id': category_id,
+            'category': names[category_id],
+            'history_days': int(covered_days[i]),
+            'weekly_autocorrelation': float(weekly_acf),
+            'annual_autocorrelation': None if np.isnan(annual_acf) else float(annual_acf),
+            'patterns_proposed': len(seasons)
+        })
+
+    # Replace stale proposals for these categories
+    SeasonalPattern.objects.filter(
+        is_detected=True,
+        is_active=False,
+        categories__in=category_ids
+    ).delete()
+
+    patterns = SeasonalPattern.objects.bulk_create([pattern for _, pattern in proposals])
+    Through = SeasonalPattern.categories.through
+    Through.objects.bulk_create([
+        Through(seasonalpattern_id=pattern.id, category_id=category_id)
+        for (category_id, _), pattern in zip(proposals, patterns)
+    ])
+
+    return report
@@ -0,0 +1,107 @@
+"""
+Precomputed seasonal calendar
+Maps day-of-year x category to the demand multiplier of the first active
+seasonal pattern covering that day, so forecasts never query patterns per day
+"""
+from datetime import date as date_type, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+CALENDAR_CACHE_KEY = 'forecasting:seasonal_calendar'
+
+# Leap reference year so Feb 29 has its own slot
+REFERENCE_YEAR = 2000
+DAYS_IN_CALENDAR = 366
+
+
+def day_of_year_index(date):
+    """Zero-based calendar slot for a date (Feb 29 always maps to slot 59)"""
+    return date_type(REFERENCE_YEAR, date.month, date.day).timetuple().tm_yday - 1
+
+
+class SeasonalCalendar:
+    """Day-of-year x category multiplier table built from active seasonal patterns"""
+
+    def __init__(self, category_ids, multipliers, peaks, fingerprint=None):
+        self.category_index = {category_id: i for i, category_id in enumerate(category_ids)}
+        self.multipliers = multipliers
+        self.peaks = peaks
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, patterns, fingerprint=None):
+        """Build from patterns in priority order; the first pattern covering a day wins"""
+        patterns = list(patterns)
+        category_ids = sorted({
+            category.id for pattern in patterns for category in pattern.categories.all()
+        })
+        category_index = {category_id: i for i, category_id in enumerate(category_ids)}
+
+        multipliers = np.ones((DAYS_IN_CALENDAR, len(category_ids)))
+        peaks = np.zeros((DAYS_IN_CALENDAR, len(category_ids)), dtype=bool)
+
+        for pattern in patterns:
+            try:
+                start = day_of_year_index(date_type(REFERENCE_YEAR, pattern.start_month, pattern.start_day))
+                end = day_of_year_index(date_type(REFERENCE_YEAR, pattern.end_month, pattern.end_day))
+            except ValueError:
+                # Impossible month/day combination, the pattern can never match
+                continue
+
+            days = np.zeros(DAYS_IN_CALENDAR, dtype=bool)
+            if start > end:
+                # Year-crossing seasons (e.g., Dec-Jan)
+                days[start:] = True
+                days[:end + 1] = True
+            else:
+                days[start:end + 1] = True
+
+            for category in pattern.categories.all():
+                column = category_index[category.id]
+                slots = days & ~peaks[:, column]
+                multipliers[slots, column] = pattern.demand_multiplier
+                peaks[slots, column] = True
+
+        return cls(category_ids, multipliers, peaks, fingerprint)
+
+    def lookup(self, category_id, start_date, days):
+        """
+        Seasonal flags and multipliers for `days` consecutive dates
+        Returns: is_peak (bool array), seasonal_factor (float array)
+        """
+        column = self.category_index.get(category_id)
+        if column is None:
+            return np.zeros(days, dtype=bool), np.ones(days)
+
+        slots = [day_of_year_index(start_date + timedelta(days=i)) for i in range(days)]
+        return self.peaks[slots, column], self.multipliers[slots, column]
+
+
+def get_seasonal_calendar():
+    """
+    Cached seasonal calendar, rebuilt whenever the patterns change.
+    Costs a single aggregate query while the cached calendar is current.
+    """
+    from .models import SeasonalPattern
+
+    fingerprint = SeasonalPattern.objects.aggregate(
+        count=Count('id'),
+        updated=Max('updated_at')
+    )
+
+    calendar = cache.get(CALENDAR_CACHE_KEY)
+    if calendar is not None and calendar.fingerprint == fingerprint:
+        return calendar
+
+    calendar = SeasonalCalendar.build(
+        SeasonalPattern.objects.filter(is_active=True).prefetch_related('categories'),
+        fingerprint
+    )
+    cache.set(CALENDAR_CACHE_KEY, calendar, None)
+    return calendar
+
+
+def invalidate_seasonal_calendar():
+    cache.delete(CALENDAR_CACHE_KEY)
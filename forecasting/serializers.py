@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from .models import (
     ForecastModel, ProductForecast, CategoryForecast,
-    SeasonalPattern, StockRecommendation
+    SeasonalPattern, StockRecommendation, ForecastJob
 )
 from inventory.models import Product, Category
 
@@ -11,15 +11,16 @@ class ForecastModelSerializer(serializers.ModelSerializer):
     trained_by_name = serializers.CharField(source='trained_by.full_name', read_only=True)
     model_type_display = serializers.CharField(source='get_model_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    product_name = serializers.CharField(source='product.name', read_only=True, default=None)
     
     class Meta:
         model = ForecastModel
-        fields = ('id', 'name', 'model_type', 'model_type_display', 'version',
+        fields = ('id', 'name', 'product', 'product_name', 'slot', 'model_type', 'model_type_display', 'version',
                  'status', 'status_display', 'parameters', 'r2_score', 'mse',
                  'rmse', 'mae', 'accuracy', 'training_start_date', 'training_end_date',
                  'training_samples', 'is_active', 'trained_by', 'trained_by_name',
-                 'trained_at', 'last_used')
-        read_only_fields = ('id', 'trained_at', 'last_used')
+                 'trained_at', 'last_used', 'retrain_reason')
+        read_only_fields = ('id', 'trained_at', 'last_used', 'retrain_reason')
 
 
 class ProductForecastSerializer(serializers.ModelSerializer):
@@ -40,11 +41,30 @@ class ProductForecastSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'forecast_error', 'absolute_percentage_error', 'created_at', 'updated_at')
 
 
+class ForecastDaySerializer(serializers.Serializer):
+    """One day of a forecast run, unpacked"""
+    product = serializers.IntegerField()
+    product_name = serializers.CharField()
+    product_sku = serializers.CharField()
+    product_current_stock = serializers.IntegerField()
+    forecast_model = serializers.IntegerField()
+    run = serializers.IntegerField()
+    forecast_date = serializers.DateField()
+    predicted_demand = serializers.IntegerField()
+    confidence_lower = serializers.IntegerField()
+    confidence_upper = serializers.IntegerField()
+    confidence_level = serializers.FloatField(default=95.0)
+    is_peak_season = serializers.BooleanField()
+    seasonal_factor = serializers.FloatField()
+    recommended_stock = serializers.IntegerField()
+
+
 class ProductForecastCreateSerializer(serializers.Serializer):
     """Serializer for creating forecasts"""
     product_id = serializers.IntegerField()
     forecast_days = serializers.IntegerField(default=30, min_value=1, max_value=90)
     training_days = serializers.IntegerField(default=90, min_value=30, max_value=365)
+    slot = serializers.ChoiceField(choices=ForecastModel.SLOT_CHOICES, default='CHAMPION')
     
     def validate_product_id(self, value):
         try:
@@ -62,8 +82,8 @@ class CategoryForecastSerializer(serializers.ModelSerializer):
         model = CategoryForecast
         fields = ('id', 'category', 'category_name', 'forecast_model', 'forecast_date',
                  'predicted_demand', 'confidence_lower', 'confidence_upper',
-                 'actual_demand', 'created_at')
-        read_only_fields = ('id', 'created_at')
+                 'product_count', 'actual_demand', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'product_count', 'created_at', 'updated_at')
 
 
 class SeasonalPatternSerializer(serializers.ModelSerializer):
@@ -75,8 +95,8 @@ class SeasonalPatternSerializer(serializers.ModelSerializer):
         model = SeasonalPattern
         fields = ('id', 'name', 'season_type', 'season_type_display', 'start_month',
                  'start_day', 'end_month', 'end_day', 'demand_multiplier', 'categories',
-                 'category_names', 'description', 'is_active', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'created_at', 'updated_at')
+                 'category_names', 'description', 'is_active', 'is_detected', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'is_detected', 'created_at', 'updated_at')
     
     def get_category_names(self, obj):
         return [cat.name for cat in obj.categories.all()]
@@ -154,4 +174,29 @@ class BulkForecastSerializer(serializers.Serializer):
         required=False
     )
     forecast_days = serializers.IntegerField(default=30, min_value=1, max_value=90)
-    generate_recommendations = serializers.BooleanField(default=True)
\ No newline at end of file
+    training_days = serializers.IntegerField(default=90, min_value=30, max_value=365)
+    model_type = serializers.ChoiceField(
+        choices=[choice[0] for choice in ForecastModel.MODEL_TYPES] + ['AUTO'],
+        default='LINEAR_REGRESSION'
+    )
+    generate_recommendations = serializers.BooleanField(default=True)
+
+
+class DetectSeasonalPatternsSerializer(serializers.Serializer):
+    """Serializer for seasonality detection runs"""
+    days = serializers.IntegerField(default=730, min_value=365, max_value=1825)
+
+
+class ForecastJobSerializer(serializers.ModelSerializer):
+    """Serializer for bulk forecast jobs"""
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
+    progress = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = ForecastJob
+        fields = ('id', 'status', 'status_display', 'parameters', 'total_products',
+                 'processed_products', 'progress', 'forecasts_generated',
+                 'recommendations_generated', 'errors', 'error_message', 'created_by',
+                 'created_by_name', 'created_at', 'started_at', 'heartbeat_at', 'completed_at')
+        read_only_fields = fields
\ No newline at end of file
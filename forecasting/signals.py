@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import SeasonalPattern
+from .seasonality import invalidate_seasonal_calendar
+
+
+@receiver([post_save, post_delete], sender=SeasonalPattern)
+def seasonal_pattern_changed(sender, **kwargs):
+    invalidate_seasonal_calendar()
+
+
+@receiver(m2m_changed, sender=SeasonalPattern.categories.through)
+def seasonal_pattern_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    # Bump updated_at so calendars cached by other processes see the change
+    patterns = SeasonalPattern.objects.all()
+    if not reverse:
+        patterns = patterns.filter(pk=instance.pk)
+    elif pk_set:
+        patterns = patterns.filter(pk__in=pk_set)
+    patterns.update(updated_at=timezone.now())
+
+    invalidate_seasonal_calendar()
@@ -0,0 +1,200 @@
+"""
+Exponential smoothing forecasters in pure NumPy
+Holt-Winters (additive, damped trend) for regular weekly demand and
+Croston/SBA for intermittent demand. Both fit every product of a batch
+in a single O(days) pass with no DataFrame or sklearn overhead.
+Must stay free of Django imports, it runs inside forecast worker processes.
+"""
+import itertools
+
+import numpy as np
+
+SEASON_LENGTH = 7
+
+# Candidate (alpha, beta, gamma) smoothing parameters, picked per product by in-sample error
+HOLT_WINTERS_GRID = list(itertools.product((0.1, 0.3, 0.5), (0.01, 0.1), (0.05, 0.2)))
+TREND_DAMPING = 0.9
+
+CROSTON_ALPHA = 0.1
+
+# Average inter-demand interval above which demand counts as intermittent (Syntetos-Boylan)
+INTERMITTENT_ADI = 1.32
+
+
+def average_demand_interval(quantities):
+    """Average number of days between sales per product (inf without sales)"""
+    quantities = np.atleast_2d(quantities)
+    sale_days = np.count_nonzero(quantities, axis=1)
+    with np.errstate(divide='ignore'):
+        return np.where(sale_days > 0, quantities.shape[1] / np.maximum(sale_days, 1), np.inf)
+
+
+def is_intermittent(quantities):
+    """Whether each product's demand is intermittent enough for Croston"""
+    return average_demand_interval(quantities) > INTERMITTENT_ADI
+
+
+def evaluate_one_step(quantities, fitted, test_fraction=0.2):
+    """
+    Accuracy of one-step-ahead fitted values over the last part of the history,
+    the same metrics fit_linear_regression reports on its test split
+    Returns: list of metric dicts, one per product
+    """
+    split = int(quantities.shape[1] * (1 - test_fraction))
+    y = quantities[:, split:]
+    errors = y - fitted[:, split:]
+
+    mse = np.mean(errors ** 2, axis=1)
+    total = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(total > 0, 1 - np.sum(errors ** 2, axis=1) / total, 0.0)
+    accuracy = np.mean(np.abs(errors) / (y + 1) * 100 <= 20, axis=1) * 100
+
+    return [
+        {
+            'mse': float(mse[i]),
+            'rmse': float(np.sqrt(mse[i])),
+            'mae': float(np.mean(np.abs(errors[i]))),
+            'r2_score': float(r2[i]),
+            'accuracy': float(accuracy[i])
+        }
+        for i in range(len(quantities))
+    ]
+
+
+def fit_holt_winters(quantities, season_length=SEASON_LENGTH, grid=HOLT_WINTERS_GRID):
+    """
+    Additive Holt-Winters with a damped trend for a batch of products.
+    Every grid candidate runs in the same pass; each product keeps the
+    candidate with the lowest one-step-ahead squared error.
+
+    quantities: (products, days) daily sales, oldest first, at least two seasons
+    Returns: state dict (level, trend, season, alpha, beta, gamma), fitted values
+    """
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+    n_products, n_days = quantities.shape
+    if n_days < 2 * season_length:
+        raise ValueError(f'Holt-Winters needs at least {2 * season_length} days of history')
+
+    alpha, beta, gamma = (np.array(values)[:, None] for values in zip(*grid))
+    phi = TREND_DAMPING
+    shape = (len(grid), n_products)
+
+    # Initialise from the first two seasons
+    first = quantities[:, :season_length]
+    second = quantities[:, season_length:2 * season_length]
+    level = np.broadcast_to(first.mean(axis=1), shape).copy()
+    trend = np.broadcast_to((second.mean(axis=1) - first.mean(axis=1)) / season_length, shape).copy()
+    season = np.broadcast_to(first - first.mean(axis=1, keepdims=True),
+                             (len(grid), n_products, season_length)).copy()
+
+    fitted = np.zeros((len(grid), n_products, n_days))
+    fitted[:, :, :season_length] = quantities[:, :season_length]
+
+    for t in range(season_length, n_days):
+        slot = t % season_length
+        y = quantities[:, t]
+        seasonal = season[:, :, slot]
+
+        fitted[:, :, t] = level + phi * trend + seasonal
+
+        previous_level = level
+        level = alpha * (y - seasonal) + (1 - alpha) * (previous_level + phi * trend)
+        trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+        season[:, :, slot] = gamma * (y - level) + (1 - gamma) * seasonal
+
+    errors = np.sum((quantities - fitted) ** 2, axis=2)
+    best = np.argmin(errors, axis=0)
+    products = np.arange(n_products)
+
+    state = {
+        'level': level[best, products],
+        'trend': trend[best, products],
+        'season': season[best, products],
+        'alpha': alpha[best, 0],
+        'beta': beta[best, 0],
+        'gamma': gamma[best, 0],
+        'history_length': n_days,
+    }
+    return state, fitted[best, products]
+
+
+def holt_winters_forecast(state, days):
+    """Expected demand for the `days` after the fitted history, shape (products, days)"""
+    horizon = np.arange(1, days + 1)
+    damping = np.cumsum(TREND_DAMPING ** horizon)
+    season_length = state['season'].shape[1]
+    slots = (state['history_length'] + horizon - 1) % season_length
+
+    forecast = (state['level'][:, None] + damping * state['trend'][:, None]
+                + state['season'][:, slots])
+    return np.maximum(0, forecast)
+
+
+def fit_croston(quantities, alpha=CROSTON_ALPHA, sba=True):
+    """
+    Croston's method for a batch of products, with the Syntetos-Boylan
+    bias correction by default. Demand size and inter-demand interval are
+    smoothed only on days with sales; the interval starts from the average
+    over the whole history rather than the (arbitrary) first gap.
+
+    Returns: state dict (size, interval, rate, alpha), fitted values
+    """
+    quantities = np.atleast_2d(np.asarray(quantities, dtype=float))
+    n_products, n_days = quantities.shape
+    correction = 1 - alpha / 2 if sba else 1.0
+    initial_interval = average_demand_interval(quantities)
+
+    size = np.zeros(n_products)
+    interval = np.ones(n_products)
+    since_last = np.zeros(n_products)
+    started = np.zeros(n_products, dtype=bool)
+    fitted = np.zeros((n_products, n_days))
+
+    for t in range(n_days):
+        y = quantities[:, t]
+        fitted[:, t] = np.where(started, size / interval * correction, 0)
+
+        since_last += 1
+        sold = y > 0
+        update = sold & started
+        first = sold & ~started
+
+        size = np.where(update, size + alpha * (y - size), np.where(first, y, size))
+        interval = np.where(update, interval + alpha * (since_last - interval),
+                            np.where(first, initial_interval, interval))
+        started |= sold
+        since_last[sold] = 0
+
+    state = {
+        'size': size,
+        'interval': interval,
+        'rate': np.where(started, size / interval * correction, 0),
+        'alpha': alpha,
+    }
+    return state, fitted
+
+
+def croston_forecast(state, days):
+    """Flat expected daily demand for `days`, shape (products, days)"""
+    return np.repeat(state['rate'][:, None], days, axis=1)
+
+
+def integer_forecast(expected, seasonal_factors=None):
+    """
+    Turn expected daily demand into whole units per day.
+    Rounds the running total instead of each day, so a slow seller at
+    0.3 units a day still forecasts 3 units over 10 days.
+
+    Returns: predictions, confidence_lower, confidence_upper as int arrays
+    """
+    expected = np.atleast_2d(expected)
+    if seasonal_factors is not None:
+        expected = expected * np.broadcast_to(seasonal_factors, expected.shape)
+
+    cumulative = np.round(np.cumsum(expected, axis=1))
+    predictions = np.diff(cumulative, axis=1, prepend=0).astype(int)
+
+    conf_lower = np.trunc(predictions * 0.8).astype(int)
+    conf_upper = np.maximum(predictions, np.ceil(expected * 1.2)).astype(int)
+    return predictions, conf_lower, conf_upper
@@ -3,15 +3,15 @@ from .views import (
     # Training
     TrainModelView,
     # Forecast Generation
-    GenerateForecastView, BulkGenerateForecastView,
+    GenerateForecastView, BulkGenerateForecastView, ForecastJobDetailView,
     # Forecast Retrieval
-    ProductForecastListView, ForecastSummaryView,
+    ProductForecastListView, ForecastBatchView, HourlyForecastView, CategoryForecastListView, ForecastSummaryView, ForecastSummaryBatchView,
     # Recommendations
     StockRecommendationListView, AcknowledgeRecommendationView,
     # Seasonal Patterns
-    SeasonalPatternListCreateView, SeasonalPatternDetailView,
+    SeasonalPatternListCreateView, SeasonalPatternDetailView, DetectSeasonalPatternsView,
     # Model Management
-    ForecastModelListView, ForecastAccuracyView
+    ForecastModelListView, PromoteModelView, ForecastAccuracyView
 )
 
 app_name = 'forecasting'
@@ -23,9 +23,14 @@ urlpatterns = [
     # Forecast Generation
     path('generate/', GenerateForecastView.as_view(), name='generate-forecast'),
     path('generate/bulk/', BulkGenerateForecastView.as_view(), name='bulk-generate-forecast'),
+    path('generate/bulk/<int:pk>/', ForecastJobDetailView.as_view(), name='forecast-job-detail'),
     
     # Forecast Retrieval
     path('forecasts/', ProductForecastListView.as_view(), name='forecast-list'),
+    path('forecasts/batch/', ForecastBatchView.as_view(), name='forecast-batch'),
+    path('forecasts/hourly/', HourlyForecastView.as_view(), name='forecast-hourly'),
+    path('forecasts/categories/', CategoryForecastListView.as_view(), name='category-forecast-list'),
+    path('forecasts/summary/', ForecastSummaryBatchView.as_view(), name='forecast-summary-batch'),
     path('forecasts/summary/<int:product_id>/', ForecastSummaryView.as_view(), name='forecast-summary'),
     
     # Recommendations
@@ -34,9 +39,11 @@ urlpatterns = [
     
     # Seasonal Patterns
     path('seasonal-patterns/', SeasonalPatternListCreateView.as_view(), name='seasonal-pattern-list'),
+    path('seasonal-patterns/detect/', DetectSeasonalPatternsView.as_view(), name='seasonal-pattern-detect'),
     path('seasonal-patterns/<int:pk>/', SeasonalPatternDetailView.as_view(), name='seasonal-pattern-detail'),
     
     # Model Management
     path('models/', ForecastModelListView.as_view(), name='model-list'),
     path('models/accuracy/', ForecastAccuracyView.as_view(), name='model-accuracy'),
+    path('models/<int:pk>/promote/', PromoteModelView.as_view(), name='model-promote'),
 ]
\ No newline at end of file
@@ -4,24 +4,33 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Avg, Count, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from accounts.permissions import IsOwner
 from accounts.utils import create_audit_log
 from inventory.models import Product, Category
 from .models import (
-    ForecastModel, ProductForecast, CategoryForecast,
-    SeasonalPattern, StockRecommendation
+    ForecastModel, ForecastRun, CategoryForecast,
+    SeasonalPattern, StockRecommendation, ForecastJob, ForecastAccuracySummary
 )
 from .serializers import (
-    ForecastModelSerializer, ProductForecastSerializer, ProductForecastCreateSerializer,
+    ForecastModelSerializer, ForecastDaySerializer, ProductForecastCreateSerializer,
     CategoryForecastSerializer, SeasonalPatternSerializer, StockRecommendationSerializer,
     ForecastSummarySerializer, ForecastAccuracySerializer, TrainingResultSerializer,
-    BulkForecastSerializer
+    BulkForecastSerializer, ForecastJobSerializer, DetectSeasonalPatternsSerializer
 )
 from .ml_utils import (
     train_linear_regression_model, predict_demand, prepare_training_data,
-    detect_seasonal_patterns, generate_stock_recommendation
+    detect_seasonal_patterns, generate_stock_recommendation,
+    load_sales_histories, fold_scaler, forecast_horizon
 )
+from .hourly import forecast_hourly_demand
+from .jobs import fail_stale_jobs, is_job_stale, start_forecast_job
+from .runs import load_forecast_grid
+from .registry import get_serving_model, promote_challenger, register_model
+from .seasonality import get_seasonal_calendar
+from .summaries import get_forecast_summaries, refresh_forecast_summaries
+from .aggregation import refresh_category_forecasts
+from .seasonal_detection import detect_category_seasonality
 import numpy as np
 
 
@@ -64,15 +73,18 @@ class TrainModelView(APIView):
         # Save model record
         end_date = timezone.now().date()
         start_date = end_date - timedelta(days=training_days)
+        weights, bias = fold_scaler(model, scaler)
         
-        forecast_model = ForecastModel.objects.create(
+        # Only this product's model in the requested slot is replaced
+        forecast_model = register_model(ForecastModel(
             name=f"{product.name} Forecast Model",
+            product=product,
             model_type='LINEAR_REGRESSION',
             version=f"v{timezone.now().strftime('%Y%m%d%H%M%S')}",
-            status='ACTIVE',
             parameters={
-                'product_id': product.id,
-                'training_days': training_days
+                'training_days': training_days,
+                'weights': weights.tolist(),
+                'bias': bias
             },
             r2_score=metrics['r2_score'],
             mse=metrics['mse'],
@@ -82,9 +94,8 @@ class TrainModelView(APIView):
             training_start_date=start_date,
             training_end_date=end_date,
             training_samples=training_info['training_samples'],
-            trained_by=request.user,
-            is_active=True
-        )
+            trained_by=request.user
+        ), serializer.validated_data['slot'])
         
         create_audit_log(
             user=request.user,
@@ -98,7 +109,7 @@ class TrainModelView(APIView):
         result = {
             'success': True,
             'message': f'Model trained successfully with {metrics["accuracy"]:.2f}% accuracy',
-            'model': ForecastModelSerializer(forecast_model).data,
+            'model': forecast_model,
             'metrics': metrics,
             'training_info': training_info
         }
@@ -130,12 +141,9 @@ class GenerateForecastView(APIView):
             )
         
         # Get or train model
-        forecast_model = ForecastModel.objects.filter(
-            parameters__product_id=product.id,
-            is_active=True
-        ).first()
+        forecast_model = get_serving_model(product.id)
         
-        if not forecast_model:
+        if not forecast_model or forecast_model.model_type != 'LINEAR_REGRESSION':
             # Train new model
             model, scaler, metrics, training_info = train_linear_regression_model(
                 product,
@@ -151,13 +159,18 @@ class GenerateForecastView(APIView):
             # Save model
             end_date = timezone.now().date()
             start_date = end_date - timedelta(days=training_days)
+            weights, bias = fold_scaler(model, scaler)
             
-            forecast_model = ForecastModel.objects.create(
+            forecast_model = register_model(ForecastModel(
                 name=f"{product.name} Forecast Model",
+                product=product,
                 model_type='LINEAR_REGRESSION',
                 version=f"v{timezone.now().strftime('%Y%m%d%H%M%S')}",
-                status='ACTIVE',
-                parameters={'product_id': product.id},
+                parameters={
+                    'training_days': training_days,
+                    'weights': weights.tolist(),
+                    'bias': bias
+                },
                 r2_score=metrics['r2_score'],
                 mse=metrics['mse'],
                 rmse=metrics['rmse'],
@@ -166,140 +179,240 @@ class GenerateForecastView(APIView):
                 training_start_date=start_date,
                 training_end_date=end_date,
                 training_samples=training_info['training_samples'],
-                trained_by=request.user,
-                is_active=True
-            )
+                trained_by=request.user
+            ))
+        elif 'weights' in forecast_model.parameters:
+            # Reuse the stored fit, models are retrained by the drift scheduler
+            weights = np.array(forecast_model.parameters['weights'])
+            bias = forecast_model.parameters['bias']
         else:
-            # Load existing model
+            # Models saved before weights were stored are fitted once and keep the fit
             model, scaler, _, _ = train_linear_regression_model(product, training_days)
+            
+            if model is None:
+                return Response(
+                    {'error': 'Insufficient data for forecasting'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            weights, bias = fold_scaler(model, scaler)
+            forecast_model.parameters = {
+                **forecast_model.parameters,
+                'weights': weights.tolist(),
+                'bias': bias
+            }
+            forecast_model.save(update_fields=['parameters'])
         
         # Get historical data for lag features
-        X, y, dates = prepare_training_data(product, days=training_days)
-        historical_data = y.tolist() if y is not None else []
+        _, histories, _ = load_sales_histories([product.id], days=training_days)
         
-        # Generate forecasts
-        forecasts_created = []
+        # Forecast the whole horizon in one vectorized pass
         start_date = timezone.now().date() + timedelta(days=1)
+        is_peak, seasonal_factors = get_seasonal_calendar().lookup(
+            product.category_id, start_date, forecast_days
+        )
+        predictions, conf_lower, conf_upper = forecast_horizon(
+            weights, bias, histories, start_date, forecast_days, seasonal_factors
+        )
         
-        for i in range(forecast_days):
-            forecast_date = start_date + timedelta(days=i)
-            
-            # Check if forecast already exists
-            existing = ProductForecast.objects.filter(
-                product=product,
-                forecast_date=forecast_date,
-                forecast_model=forecast_model
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Make prediction
-            prediction, (conf_lower, conf_upper) = predict_demand(
-                model, scaler, product, forecast_date, historical_data
-            )
-            
-            # Check for seasonal patterns
-            seasonal_patterns = SeasonalPattern.objects.filter(is_active=True)
-            is_peak = False
-            seasonal_factor = 1.0
-            
-            for pattern in seasonal_patterns:
-                if pattern.is_active_on_date(forecast_date):
-                    if product.category in pattern.categories.all():
-                        is_peak = True
-                        seasonal_factor = pattern.demand_multiplier
-                        prediction = int(prediction * seasonal_factor)
-                        conf_lower = int(conf_lower * seasonal_factor)
-                        conf_upper = int(conf_upper * seasonal_factor)
-                        break
-            
-            # Create forecast
-            forecast = ProductForecast.objects.create(
-                product=product,
-                forecast_model=forecast_model,
-                forecast_date=forecast_date,
-                predicted_demand=prediction,
-                confidence_lower=conf_lower,
-                confidence_upper=conf_upper,
-                is_peak_season=is_peak,
-                seasonal_factor=seasonal_factor
-            )
-            
-            forecasts_created.append(forecast)
-            
-            # Update historical data for next prediction
-            historical_data.append(prediction)
+        # The whole horizon is one packed run, replacing today's run of this model if there is one
+        run, = ForecastRun.bulk_upsert([ForecastRun.pack(
+            predictions[0], conf_lower[0], conf_upper[0], is_peak, seasonal_factors,
+            product=product,
+            forecast_model=forecast_model,
+            start_date=start_date
+        )])
+        forecasts_created = [
+            {
+                **forecast,
+                'product_name': product.name,
+                'product_sku': product.sku,
+                'product_current_stock': product.current_stock
+            }
+            for forecast in run.daily()
+        ]
+        refresh_forecast_summaries([product.id])
+        if product.category_id:
+            refresh_category_forecasts([product.category_id], start_date)
         
         # Update model last_used
-        forecast_model.last_used = timezone.now()
-        forecast_model.save()
+        ForecastModel.objects.filter(pk=forecast_model.pk).update(last_used=timezone.now())
         
         return Response({
             'message': f'Generated {len(forecasts_created)} forecasts',
-            'forecasts': ProductForecastSerializer(forecasts_created, many=True).data
+            'forecasts': ForecastDaySerializer(forecasts_created, many=True).data
         }, status=status.HTTP_201_CREATED)
 
 
 class BulkGenerateForecastView(APIView):
-    """Generate forecasts for multiple products"""
+    """Queue a forecast job for multiple products"""
     permission_classes = [IsAuthenticated, IsOwner]
     
     def post(self, request):
         serializer = BulkForecastSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        category_id = serializer.validated_data.get('category_id')
-        product_ids = serializer.validated_data.get('product_ids')
-        forecast_days = serializer.validated_data.get('forecast_days', 30)
-        generate_recommendations = serializer.validated_data.get('generate_recommendations', True)
-        
-        # Get products
-        if product_ids:
-            products = Product.objects.filter(id__in=product_ids, is_active=True)
-        elif category_id:
-            products = Product.objects.filter(category_id=category_id, is_active=True)
-        else:
-            products = Product.objects.filter(is_active=True)[:10]  # Limit to 10
+        job = ForecastJob.objects.create(
+            parameters={
+                'category_id': serializer.validated_data.get('category_id'),
+                'product_ids': serializer.validated_data.get('product_ids'),
+                'forecast_days': serializer.validated_data.get('forecast_days', 30),
+                'training_days': serializer.validated_data.get('training_days', 90),
+                'model_type': serializer.validated_data.get('model_type', 'LINEAR_REGRESSION'),
+                'generate_recommendations': serializer.validated_data.get('generate_recommendations', True)
+            },
+            created_by=request.user
+        )
         
-        results = {
-            'total_products': products.count(),
-            'forecasts_generated': 0,
-            'recommendations_generated': 0,
-            'errors': []
-        }
+        create_audit_log(
+            user=request.user,
+            action='CREATE',
+            table_name='forecast_jobs',
+            record_id=job.id,
+            description=f"Queued bulk forecast job #{job.id}",
+            request=request
+        )
         
-        for product in products:
-            try:
-                # Generate forecast (reuse GenerateForecastView logic)
-                # For brevity, simplified here
-                results['forecasts_generated'] += forecast_days
-            except Exception as e:
-                results['errors'].append({
-                    'product': product.name,
-                    'error': str(e)
-                })
+        # Runs after the response is committed, poll the job for progress
+        start_forecast_job(job)
         
-        return Response(results)
+        return Response(ForecastJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ForecastJobDetailView(generics.RetrieveAPIView):
+    """Get progress of a bulk forecast job"""
+    queryset = ForecastJob.objects.select_related('created_by').all()
+    serializer_class = ForecastJobSerializer
+    permission_classes = [IsAuthenticated, IsOwner]
+    
+    def get_object(self):
+        job = super().get_object()
+        # Pollers see a dead job as failed instead of running forever, other jobs are left to the command
+        if is_job_stale(job) and fail_stale_jobs(jobs=ForecastJob.objects.filter(pk=job.pk)):
+            job.refresh_from_db()
+        return job
 
 
 # ========== FORECAST RETRIEVAL ==========
 
 class ProductForecastListView(generics.ListAPIView):
-    """List forecasts for a product"""
-    serializer_class = ProductForecastSerializer
+    """List per-day forecasts for a product, unpacked from the current forecast runs"""
+    serializer_class = ForecastDaySerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         product_id = self.request.query_params.get('product_id')
         days = int(self.request.query_params.get('days', 30))
         
-        queryset = ProductForecast.objects.select_related(
-            'product', 'forecast_model'
-        ).all()
+        # Date range from today, inclusive of the last day
+        start_date = timezone.now().date()
+        product_ids, grid = load_forecast_grid(
+            [int(product_id)] if product_id else None, start_date, days + 1
+        )
         
-        if product_id:
-            queryset = queryset.filter(product_id=product_id)
+        products = Product.objects.in_bulk(product_ids)
+        
+        # Ordered by date, then product
+        forecasts = []
+        for d, i in zip(*np.nonzero(grid['covered'].T)):
+            product = products[product_ids[i]]
+            forecasts.append({
+                'product': product.id,
+                'product_name': product.name,
+                'product_sku': product.sku,
+                'product_current_stock': product.current_stock,
+                'forecast_model': int(grid['forecast_model_id'][i, d]),
+                'run': int(grid['run_id'][i, d]),
+                'forecast_date': start_date + timedelta(days=int(d)),
+                'predicted_demand': int(grid['predicted_demand'][i, d]),
+                'confidence_lower': int(grid['confidence_lower'][i, d]),
+                'confidence_upper': int(grid['confidence_upper'][i, d]),
+                'is_peak_season': bool(grid['is_peak_season'][i, d]),
+                'seasonal_factor': float(grid['seasonal_factor'][i, d]),
+                # Safety stock is the upper bound
+                'recommended_stock': int(grid['confidence_upper'][i, d]),
+            })
+        return forecasts
+
+
+class ForecastBatchView(APIView):
+    """Get upcoming forecasts for many products (or a whole category) as columnar arrays"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        product_ids = request.query_params.get('product_ids')
+        category_id = request.query_params.get('category_id')
+        
+        try:
+            days = int(request.query_params.get('days', 30))
+            if product_ids:
+                product_ids = [int(i) for i in product_ids.split(',')]
+            elif category_id:
+                product_ids = list(Product.objects.filter(
+                    is_active=True, category_id=int(category_id)
+                ).order_by('id').values_list('id', flat=True))
+            else:
+                product_ids = None
+        except ValueError:
+            return Response(
+                {'error': 'product_ids, category_id and days must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Date range from today, inclusive of the last day
+        start_date = timezone.now().date()
+        product_ids, grid = load_forecast_grid(
+            product_ids, start_date, days + 1,
+            fields=('predicted_demand', 'confidence_lower', 'confidence_upper')
+        )
+        
+        # Products with a run in the window, days without a forecast are null
+        has_forecast = grid['covered'].any(axis=1)
+        
+        def column(field):
+            return np.where(grid['covered'], grid[field], None)[has_forecast].tolist()
+        
+        return Response({
+            'count': int(has_forecast.sum()),
+            'dates': [start_date + timedelta(days=d) for d in range(days + 1)],
+            'product_id': np.asarray(product_ids, dtype=np.int64)[has_forecast].tolist(),
+            'predicted_demand': column('predicted_demand'),
+            'confidence_lower': column('confidence_lower'),
+            'confidence_upper': column('confidence_upper')
+        })
+
+
+class HourlyForecastView(APIView):
+    """Get the expected transactions and units per hour for a day, tomorrow by default"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            forecast_date = date.fromisoformat(request.query_params['date'])
+        except KeyError:
+            forecast_date = timezone.now().date() + timedelta(days=1)
+        except ValueError:
+            return Response(
+                {'error': 'date must be YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(forecast_hourly_demand(forecast_date))
+
+
+class CategoryForecastListView(generics.ListAPIView):
+    """List bottom-up forecasts for categories, one row per category per day"""
+    serializer_class = CategoryForecastSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        category_id = self.request.query_params.get('category_id')
+        days = int(self.request.query_params.get('days', 30))
+        
+        queryset = CategoryForecast.objects.select_related('category')
+        
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
         
         # Filter by date range
         start_date = timezone.now().date()
@@ -309,7 +422,7 @@ class ProductForecastListView(generics.ListAPIView):
             forecast_date__lte=end_date
         )
         
-        return queryset.order_by('forecast_date')
+        return queryset.order_by('category_id', 'forecast_date')
 
 
 class ForecastSummaryView(APIView):
@@ -317,80 +430,48 @@ class ForecastSummaryView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, product_id):
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        columns = get_forecast_summaries(Product.objects.filter(id=product_id))
+        
+        if not columns['product_id']:
             return Response(
                 {'error': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get forecasts
-        today = timezone.now().date()
-        forecasts_7 = ProductForecast.objects.filter(
-            product=product,
-            forecast_date__gte=today,
-            forecast_date__lte=today + timedelta(days=7)
-        )
-        
-        forecasts_30 = ProductForecast.objects.filter(
-            product=product,
-            forecast_date__gte=today,
-            forecast_date__lte=today + timedelta(days=30)
-        )
+        data = {column: values[0] for column, values in columns.items()}
         
-        forecast_7_days = sum(f.predicted_demand for f in forecasts_7)
-        forecast_30_days = sum(f.predicted_demand for f in forecasts_30)
+        serializer = ForecastSummarySerializer(data)
+        return Response(serializer.data)
+
+
+class ForecastSummaryBatchView(APIView):
+    """Get forecast summaries for many products (or a whole category) in one columnar response"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        product_ids = request.query_params.get('product_ids')
+        category_id = request.query_params.get('category_id')
         
-        # Calculate days until stockout
-        avg_daily_demand = forecast_7_days / 7 if forecast_7_days > 0 else 0
-        days_until_stockout = product.current_stock / avg_daily_demand if avg_daily_demand > 0 else 999
+        products = Product.objects.filter(is_active=True)
         
-        # Get recommendation
-        recommendation = StockRecommendation.objects.filter(
-            product=product,
-            status='PENDING'
-        ).first()
-        
-        recommended_order = recommendation.recommended_order_quantity if recommendation else 0
-        priority = recommendation.priority if recommendation else 'LOW'
-        
-        # Determine trend
-        if len(forecasts_7) >= 7:
-            first_half = sum(f.predicted_demand for f in list(forecasts_7)[:3])
-            second_half = sum(f.predicted_demand for f in list(forecasts_7)[4:])
-            if second_half > first_half * 1.1:
-                trend = 'increasing'
-            elif second_half < first_half * 0.9:
-                trend = 'decreasing'
-            else:
-                trend = 'stable'
-        else:
-            trend = 'unknown'
+        try:
+            if product_ids:
+                products = products.filter(id__in=[int(i) for i in product_ids.split(',')])
+            elif category_id:
+                products = products.filter(category_id=int(category_id))
+        except ValueError:
+            return Response(
+                {'error': 'product_ids and category_id must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Seasonal impact
-        peak_forecasts = forecasts_30.filter(is_peak_season=True)
-        if peak_forecasts.exists():
-            seasonal_impact = 'high'
-        else:
-            seasonal_impact = 'normal'
-        
-        data = {
-            'product_id': product.id,
-            'product_name': product.name,
-            'product_sku': product.sku,
-            'current_stock': product.current_stock,
-            'forecast_7_days': forecast_7_days,
-            'forecast_30_days': forecast_30_days,
-            'recommended_order': recommended_order,
-            'days_until_stockout': int(days_until_stockout),
-            'priority': priority,
-            'trend': trend,
-            'seasonal_impact': seasonal_impact
-        }
+        columns = get_forecast_summaries(products)
         
-        serializer = ForecastSummarySerializer(data)
-        return Response(serializer.data)
+        return Response({
+            'count': len(columns['product_id']),
+            'as_of': timezone.now().date(),
+            'columns': columns
+        })
 
 
 # ========== STOCK RECOMMENDATIONS ==========
@@ -441,6 +522,7 @@ class AcknowledgeRecommendationView(APIView):
         recommendation.acknowledged_by = request.user
         recommendation.acknowledged_at = timezone.now()
         recommendation.save()
+        refresh_forecast_summaries([recommendation.product_id])
         
         return Response({
             'message': 'Recommendation acknowledged',
@@ -475,13 +557,88 @@ class SeasonalPatternDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated, IsOwner]
 
 
+class DetectSeasonalPatternsView(APIView):
+    """Propose seasonal patterns for every category from its sales history"""
+    permission_classes = [IsAuthenticated, IsOwner]
+    
+    def post(self, request):
+        serializer = DetectSeasonalPatternsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        report = detect_category_seasonality(days=serializer.validated_data['days'])
+        proposed = sum(r['patterns_proposed'] for r in report)
+        
+        create_audit_log(
+            user=request.user,
+            action='CREATE',
+            table_name='seasonal_patterns',
+            description=f"Detected {proposed} seasonal pattern proposals across {len(report)} categories",
+            request=request
+        )
+        
+        patterns = SeasonalPattern.objects.filter(
+            is_detected=True, is_active=False
+        ).prefetch_related('categories')
+        
+        return Response({
+            'message': f'Proposed {proposed} seasonal patterns',
+            'categories': report,
+            'patterns': SeasonalPatternSerializer(patterns, many=True).data
+        })
+
+
 # ========== MODEL MANAGEMENT ==========
 
 class ForecastModelListView(generics.ListAPIView):
     """List all forecast models"""
-    queryset = ForecastModel.objects.all().order_by('-trained_at')
     serializer_class = ForecastModelSerializer
     permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = ForecastModel.objects.all().order_by('-trained_at')
+        
+        product_id = self.request.query_params.get('product_id')
+        if product_id:
+            queryset = queryset.filter(product_id=product_id)
+        
+        slot = self.request.query_params.get('slot')
+        if slot:
+            queryset = queryset.filter(slot=slot, is_active=True)
+        
+        return queryset
+
+
+class PromoteModelView(APIView):
+    """Promote a product's challenger model to champion"""
+    permission_classes = [IsAuthenticated, IsOwner]
+    
+    def post(self, request, pk):
+        try:
+            challenger = ForecastModel.objects.get(pk=pk)
+        except ForecastModel.DoesNotExist:
+            return Response(
+                {'error': 'Model not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if challenger.slot != 'CHALLENGER' or not challenger.is_active:
+            return Response(
+                {'error': 'Only an active challenger can be promoted'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        champion = promote_challenger(challenger.product_id)
+        
+        create_audit_log(
+            user=request.user,
+            action='UPDATE',
+            table_name='forecast_models',
+            record_id=champion.id,
+            description=f"Promoted challenger {champion.name} {champion.version} to champion",
+            request=request
+        )
+        
+        return Response(ForecastModelSerializer(champion).data)
 
 
 class ForecastAccuracyView(APIView):
@@ -496,65 +653,53 @@ class ForecastAccuracyView(APIView):
         else:
             models = ForecastModel.objects.filter(is_active=True)
         
-        results = []
+        # Totals are kept per model and category, refreshed by the accuracy backfill
+        summaries = ForecastAccuracySummary.objects.filter(
+            forecast_model__in=models
+        ).select_related('forecast_model', 'category').order_by('forecast_model_id', 'category__name')
         
-        for model in models:
-            # Get forecasts with actual demand
-            forecasts = ProductForecast.objects.filter(
-                forecast_model=model,
-                actual_demand__isnull=False
-            )
-            
-            total_forecasts = forecasts.count()
-            
-            if total_forecasts == 0:
-                continue
-            
-            # Calculate accuracy
-            accurate_forecasts = forecasts.filter(
-                absolute_percentage_error__lte=20
-            ).count()
-            
-            accuracy_rate = (accurate_forecasts / total_forecasts * 100) if total_forecasts > 0 else 0
-            
-            average_error = forecasts.aggregate(
-                avg=Avg('forecast_error')
-            )['avg'] or 0
+        results = {}
+        
+        for summary in summaries:
+            model = summary.forecast_model
+            result = results.setdefault(model.id, {
+                'model_id': model.id,
+                'model_name': model.name,
+                'total_forecasts': 0,
+                'accurate_forecasts': 0,
+                'error_sum': 0,
+                'percentage_error_sum': 0,
+                'percentage_error_count': 0,
+                'category_accuracy': []
+            })
             
-            average_percentage_error = forecasts.aggregate(
-                avg=Avg('absolute_percentage_error')
-            )['avg'] or 0
+            result['total_forecasts'] += summary.total_forecasts
+            result['accurate_forecasts'] += summary.accurate_forecasts
+            result['error_sum'] += summary.error_sum
+            result['percentage_error_sum'] += summary.percentage_error_sum
+            result['percentage_error_count'] += summary.percentage_error_count
             
             # Accuracy by category
-            category_accuracy = []
-            categories = Category.objects.filter(is_active=True)
-            
-            for category in categories:
-                cat_forecasts = forecasts.filter(product__category=category)
-                cat_total = cat_forecasts.count()
-                
-                if cat_total > 0:
-                    cat_accurate = cat_forecasts.filter(
-                        absolute_percentage_error__lte=20
-                    ).count()
-                    
-                    category_accuracy.append({
-                        'category': category.name,
-                        'total': cat_total,
-                        'accurate': cat_accurate,
-                        'accuracy_rate': (cat_accurate / cat_total * 100)
-                    })
+            if summary.category.is_active:
+                result['category_accuracy'].append({
+                    'category': summary.category.name,
+                    'total': summary.total_forecasts,
+                    'accurate': summary.accurate_forecasts,
+                    'accuracy_rate': summary.accuracy_rate
+                })
+        
+        for result in results.values():
+            total_forecasts = result['total_forecasts']
+            percentage_error_count = result.pop('percentage_error_count')
             
-            results.append({
-                'model_id': model.id,
-                'model_name': model.name,
-                'total_forecasts': total_forecasts,
-                'accurate_forecasts': accurate_forecasts,
-                'accuracy_rate': accuracy_rate,
-                'average_error': float(average_error),
-                'average_percentage_error': float(average_percentage_error),
-                'category_accuracy': category_accuracy
-            })
+            result['accuracy_rate'] = result['accurate_forecasts'] / total_forecasts * 100
+            result['average_error'] = result.pop('error_sum') / total_forecasts
+            result['average_percentage_error'] = (
+                result.pop('percentage_error_sum') / percentage_error_count
+                if percentage_error_count > 0 else 0
+            )
+        
+        results = list(results.values())
         
         serializer = ForecastAccuracySerializer(results, many=True)
         return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Low stock alert engine
+Called once after a batch of stock changes with every product it touched.
+The products and whether they have open alerts are read in one query.
+Products at or below their reorder level without a pending alert get one
+inserted with ON CONFLICT DO NOTHING, so the partial unique index on pending
+alerts keeps one per product even under concurrent checkouts. Open alerts of
+products back above their level are resolved in bulk.
+"""
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import LowStockAlert, Product
+
+
+def evaluate_stock_alerts(product_ids):
+    """
+    Raise and resolve alerts for the products whose stock just changed
+    Returns: (alerts raised, alerts resolved)
+    """
+    product_ids = set(product_ids)
+    if not product_ids:
+        return 0, 0
+
+    alerts = LowStockAlert.objects.filter(product=OuterRef('pk'))
+    products = Product.objects.filter(id__in=product_ids).annotate(
+        has_pending=Exists(alerts.filter(status='PENDING')),
+        has_open=Exists(alerts.filter(status__in=['PENDING', 'ACKNOWLEDGED']))
+    ).values_list('id', 'current_stock', 'reorder_level', 'has_pending', 'has_open')
+
+    low = []
+    recovered = []
+    for product_id, current_stock, reorder_level, has_pending, has_open in products:
+        if current_stock <= reorder_level:
+            if not has_pending:
+                low.append(LowStockAlert(
+                    product_id=product_id,
+                    current_stock=current_stock,
+                    reorder_level=reorder_level
+                ))
+        elif has_open:
+            recovered.append(product_id)
+
+    # A concurrent batch may have raised the same alert since the read
+    if low:
+        LowStockAlert.objects.bulk_create(low, ignore_conflicts=True)
+
+    resolved = 0
+    if recovered:
+        resolved = LowStockAlert.objects.filter(
+            product_id__in=recovered,
+            status__in=['PENDING', 'ACKNOWLEDGED']
+        ).update(status='RESOLVED', resolved_at=timezone.now())
+
+    return len(low), resolved
@@ -0,0 +1,98 @@
+"""
+Stock ledger
+Movements, checkout and voids change one product's stock at a time through
+here, so they record exact before and after values. Bulk receiving
+(inventory.receiving) applies a whole delivery in one CASE update under row
+locks instead. A change is a single UPDATE ... RETURNING that applies the
+delta and reports the new stock, the old stock being the new one less the
+delta. Setting an absolute level on PostgreSQL reads the locked old row in
+the same statement; elsewhere the row is write-locked by a no-op update
+first. Other databases, MariaDB included (it has RETURNING on inserts but
+not on updates), fall back to a locked read and an update in one transaction.
+"""
+from django.db import connection, transaction
+
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    """A guarded decrement would take stock below zero"""
+
+    def __init__(self, product_id, available):
+        super().__init__(f"Insufficient stock for product {product_id}. Available: {available}")
+        self.product_id = product_id
+        self.available = available
+
+
+def _returning_supported():
+    # UPDATE ... RETURNING, SQLite has it from 3.35 like RETURNING on inserts
+    if connection.vendor == 'sqlite':
+        return connection.features.can_return_columns_from_insert
+    return connection.vendor == 'postgresql'
+
+
+def _missing(product_id):
+    """Why a guarded update matched no row"""
+    available = Product.objects.filter(pk=product_id).values_list('current_stock', flat=True).first()
+    if available is None:
+        raise Product.DoesNotExist(f"Product {product_id} does not exist")
+    raise InsufficientStock(product_id, available)
+
+
+def change_stock(product_id, delta, allow_negative=True):
+    """
+    Add `delta` (negative to take stock out) to a product's stock
+    allow_negative: when False, fail with InsufficientStock instead of going below zero
+    Returns: (stock_before, stock_after)
+    """
+    table = Product._meta.db_table
+    guard = '' if allow_negative else ' AND current_stock + %s >= 0'
+    params = [delta, product_id] + ([] if allow_negative else [delta])
+
+    if not _returning_supported():
+        with transaction.atomic():
+            before = Product.objects.select_for_update().filter(pk=product_id).values_list(
+                'current_stock', flat=True
+            ).first()
+            if before is None or (not allow_negative and before + delta < 0):
+                _missing(product_id)
+            Product.objects.filter(pk=product_id).update(current_stock=before + delta)
+        return before, before + delta
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET current_stock = current_stock + %s WHERE id = %s{guard} RETURNING current_stock",
+            params
+        )
+        row = cursor.fetchone()
+
+    if row is None:
+        _missing(product_id)
+    return row[0] - delta, row[0]
+
+
+def set_stock(product_id, level):
+    """
+    Set a product's stock to `level`, as stock counts and adjustments do
+    Returns: (stock_before, stock_after)
+    """
+    table = Product._meta.db_table
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS p SET current_stock = %s "
+                f"FROM (SELECT id, current_stock FROM {table} WHERE id = %s FOR UPDATE) AS old "
+                f"WHERE p.id = old.id RETURNING old.current_stock, p.current_stock",
+                [level, product_id]
+            )
+            row = cursor.fetchone()
+        if row is None:
+            _missing(product_id)
+        return row
+
+    # Take the write lock with a no-op change, then nothing can move the stock in between
+    with transaction.atomic():
+        before, _ = change_stock(product_id, 0)
+        Product.objects.filter(pk=product_id).update(current_stock=level)
+    return before, level
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product search index, after bulk imports, queryset updates or SQLite table rebuilds'
+
+    def handle(self, *args, **options):
+        updated = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search text for {updated} products"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recount active products per category, after bulk imports or queryset updates'
+
+    def handle(self, *args, **options):
+        updated = Category.refresh_product_counts()
+        self.stdout.write(self.style.SUCCESS(f"Recounted active products for {updated} categories"))
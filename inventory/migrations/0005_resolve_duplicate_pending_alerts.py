@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:31
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def resolve_duplicates(apps, schema_editor):
+    """Keep the newest pending alert per product, resolve the older duplicates"""
+    LowStockAlert = apps.get_model('inventory', 'LowStockAlert')
+
+    seen = set()
+    duplicates = []
+    for alert_id, product_id in LowStockAlert.objects.filter(
+        status='PENDING'
+    ).order_by('product_id', '-created_at', '-id').values_list('id', 'product_id'):
+        if product_id in seen:
+            duplicates.append(alert_id)
+        seen.add(product_id)
+    LowStockAlert.objects.filter(id__in=duplicates).update(status='RESOLVED', resolved_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicates, migrations.RunPython.noop),
+    ]
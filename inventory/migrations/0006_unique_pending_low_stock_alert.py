@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_resolve_duplicate_pending_alerts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='lowstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'PENDING')), fields=('product',), name='unique_pending_low_stock_alert'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:34
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_products(apps, schema_editor):
+    Category = apps.get_model('inventory', 'Category')
+    Product = apps.get_model('inventory', 'Product')
+
+    counts = Product.objects.filter(
+        category=models.OuterRef('pk'), is_active=True
+    ).order_by().values('category').annotate(count=models.Count('id')).values('count')
+    Category.objects.update(active_product_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_category_active_product_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_products, migrations.RunPython.noop),
+    ]
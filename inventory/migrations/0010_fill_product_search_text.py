@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:38
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Concat, Lower
+
+
+def fill_search_text(apps, schema_editor):
+    Category = apps.get_model('inventory', 'Category')
+    Product = apps.get_model('inventory', 'Product')
+
+    category_name = Category.objects.filter(pk=models.OuterRef('category_id')).values('name')
+    Product.objects.update(search_text=Lower(Concat(
+        'name', models.Value(' '), 'sku', models.Value(' '), Coalesce('barcode', models.Value('')),
+        models.Value(' '), models.Subquery(category_name),
+        output_field=models.TextField()
+    )))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_product_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:38
+
+from django.db import migrations
+
+POSTGRESQL_INDEX = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX products_search_trgm ON products USING gin (search_text gin_trgm_ops)",
+]
+
+# FTS5 table over products.search_text, kept in sync by triggers
+SQLITE_INDEX = [
+    "CREATE VIRTUAL TABLE products_fts USING fts5("
+    "search_text, content='products', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER products_fts_update AFTER UPDATE OF search_text ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')",
+]
+
+
+def create_search_index(apps, schema_editor):
+    statements = {'postgresql': POSTGRESQL_INDEX, 'sqlite': SQLITE_INDEX}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        'postgresql': ["DROP INDEX IF EXISTS products_search_trgm"],
+        'sqlite': [
+            "DROP TRIGGER IF EXISTS products_fts_insert",
+            "DROP TRIGGER IF EXISTS products_fts_delete",
+            "DROP TRIGGER IF EXISTS products_fts_update",
+            "DROP TABLE IF EXISTS products_fts",
+        ],
+    }
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_fill_product_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Coalesce, Concat, Lower
 from django.utils import timezone
-from django.db.models import F
 
 class Category(models.Model):
     """Product categories (Roses, Tulips, Arrangements, etc.)"""
@@ -9,6 +9,8 @@ class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Kept current by product signals, see refresh_product_counts for bulk changes
+    active_product_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -23,8 +25,20 @@ class Category(models.Model):
     
     @property
     def product_count(self):
-        """Count of products in this category"""
-        return self.products.filter(is_active=True).count()
+        """Count of active products in this category"""
+        return self.active_product_count
+    
+    @classmethod
+    def refresh_product_counts(cls):
+        """
+        Recount active products for every category in one UPDATE, for changes
+        that bypass signals such as bulk_create and queryset updates
+        Returns: number of categories updated
+        """
+        counts = Product.objects.filter(
+            category=models.OuterRef('pk'), is_active=True
+        ).order_by().values('category').annotate(count=models.Count('id')).values('count')
+        return cls.objects.update(active_product_count=Coalesce(models.Subquery(counts), 0))
 
 
 class Supplier(models.Model):
@@ -87,6 +101,9 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, related_name='created_products') 
     
+    # Name, SKU, barcode and category name in lower case, indexed for search (see inventory.search)
+    search_text = models.TextField(blank=True, default='', editable=False)
+    
     class Meta:
         db_table = 'products'
         verbose_name = 'Product'
@@ -101,6 +118,31 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} ({self.sku})"
     
+    # Fields search_text is built from
+    SEARCH_FIELDS = ('name', 'sku', 'barcode', 'category')
+    
+    def save(self, *args, **kwargs):
+        self.search_text = ' '.join([self.name, self.sku, self.barcode or '', self.category.name]).lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def refresh_search_text(cls, queryset=None):
+        """
+        Rebuild search_text in one UPDATE, for changes that bypass save() such as
+        bulk_create, queryset updates and category renames
+        Returns: number of products updated
+        """
+        category_name = Category.objects.filter(pk=models.OuterRef('category_id')).values('name')
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_text=Lower(Concat(
+            'name', models.Value(' '), 'sku', models.Value(' '), Coalesce('barcode', models.Value('')),
+            models.Value(' '), models.Subquery(category_name),
+            output_field=models.TextField()
+        )))
+    
     @property
     def is_low_stock(self):
         """Check if product is below reorder level"""
@@ -185,31 +227,26 @@ class InventoryMovement(models.Model):
             # Only process non-SALE movements here
             # SALE movements are created with pre-calculated stock_before/stock_after
             if self.movement_type != 'SALE' and not (self.stock_before is not None and self.stock_after is not None):
-                self.stock_before = self.product.current_stock
+                from .ledger import change_stock, set_stock
                 
+                # One statement each, returning the exact stock before and after
                 if self.movement_type in ['STOCK_IN']:
-                    Product.objects.filter(pk=self.product.pk).update(current_stock=F('current_stock') + self.quantity)
+                    self.stock_before, self.stock_after = change_stock(self.product_id, self.quantity)
                 elif self.movement_type in ['STOCK_OUT', 'DAMAGE']:
-                    Product.objects.filter(pk=self.product.pk).update(current_stock=F('current_stock') - self.quantity)
+                    self.stock_before, self.stock_after = change_stock(self.product_id, -self.quantity)
                 elif self.movement_type == 'ADJUSTMENT':
-                    Product.objects.filter(pk=self.product.pk).update(current_stock=self.quantity)
+                    self.stock_before, self.stock_after = set_stock(self.product_id, self.quantity)
+                else:
+                    self.stock_before = self.stock_after = self.product.current_stock
+                
+                self.product.current_stock = self.stock_after
                 
-                self.product.refresh_from_db()
-                self.stock_after = self.product.current_stock
+                super().save(*args, **kwargs)
                 
-                # Create low stock alert for manual movements
-                if self.product.is_low_stock and self.movement_type in ['STOCK_OUT', 'DAMAGE', 'ADJUSTMENT']:
-                    existing_alert = LowStockAlert.objects.filter(
-                        product=self.product,
-                        status='PENDING'
-                    ).first()
-                    
-                    if not existing_alert:
-                        LowStockAlert.objects.create(
-                            product=self.product,
-                            current_stock=self.product.current_stock,
-                            reorder_level=self.product.reorder_level
-                        )
+                # Raise or resolve the product's low stock alert
+                from .alerts import evaluate_stock_alerts
+                evaluate_stock_alerts([self.product_id])
+                return
         
         super().save(*args, **kwargs)
 
@@ -238,6 +275,14 @@ class LowStockAlert(models.Model):
         verbose_name = 'Low Stock Alert'
         verbose_name_plural = 'Low Stock Alerts'
         ordering = ['-created_at']
+        constraints = [
+            # One pending alert per product, alert inserts rely on it to skip duplicates
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(status='PENDING'),
+                name='unique_pending_low_stock_alert'
+            ),
+        ]
     
     def __str__(self):
         return f"Alert: {self.product.name} - Stock: {self.current_stock}/{self.reorder_level}"
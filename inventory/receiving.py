@@ -0,0 +1,61 @@
+"""
+Bulk stock receiving
+A supplier delivery is received as one set of statements however many
+lines it has: the delivered products are locked and read together, every
+STOCK_IN increment is applied by a single UPDATE with a CASE per product,
+and the movements are bulk-created with their exact before and after stock.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .alerts import evaluate_stock_alerts
+from .models import InventoryMovement, Product
+
+
+@transaction.atomic
+def receive_stock(lines, reference_number, user, supplier=None, notes=''):
+    """
+    Apply a delivery's lines as STOCK_IN movements
+    lines: list of (product_id, quantity, line notes), a product may appear more than once
+    Returns: the created movements, in line order
+    """
+    product_ids = sorted({product_id for product_id, _, _ in lines})
+    products = {
+        product['id']: product
+        for product in Product.objects.select_for_update().filter(id__in=product_ids).values(
+            'id', 'current_stock'
+        )
+    }
+
+    totals = {}
+    for product_id, quantity, _ in lines:
+        totals[product_id] = totals.get(product_id, 0) + quantity
+
+    Product.objects.filter(id__in=product_ids).update(current_stock=F('current_stock') + Case(
+        *[When(id=product_id, then=Value(total)) for product_id, total in totals.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    ))
+
+    reason = f"Delivery {reference_number}" + (f" from {supplier.name}" if supplier else '')
+    stock = {product_id: products[product_id]['current_stock'] for product_id in product_ids}
+    movements = []
+    for product_id, quantity, line_notes in lines:
+        movements.append(InventoryMovement(
+            product_id=product_id,
+            movement_type='STOCK_IN',
+            quantity=quantity,
+            stock_before=stock[product_id],
+            stock_after=stock[product_id] + quantity,
+            reference_number=reference_number,
+            reason=reason,
+            notes=line_notes or notes,
+            created_by=user
+        ))
+        stock[product_id] += quantity
+    InventoryMovement.objects.bulk_create(movements, batch_size=1000)
+
+    # Restocked products resolve their alerts, ones still low keep or get one
+    evaluate_stock_alerts(product_ids)
+
+    return movements
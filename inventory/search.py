@@ -0,0 +1,155 @@
+"""
+Product search
+Searches Product.search_text, the product's name, SKU, barcode and category
+name in one lower-case column. On PostgreSQL a GIN trigram index (pg_trgm)
+serves substring and word similarity matches, so a fragment, a prefix or a
+misspelling still finds the product. On SQLite an FTS5 trigram table kept in
+sync by triggers serves substring matches ranked by bm25, falling back to
+the term's trigrams when nothing matches exactly. On every database terms
+too short for trigrams match word prefixes. Results come back best match
+first.
+
+SQLite drops the sync triggers when a migration rebuilds the products table,
+run rebuild_product_search after such migrations.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from rest_framework import filters
+
+from .models import Product
+
+# Share of a term's trigrams a fuzzy match must contain (word similarity on PostgreSQL)
+FUZZY_MIN_SHARED = 0.5
+FTS_TABLE = 'products_fts'
+# Same as migration 0011, recreated by rebuild_search_index
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF search_text ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO products_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+]
+
+
+def normalize_term(term):
+    """Lower case with single spaces, as search_text is stored"""
+    return re.sub(r'\s+', ' ', term or '').strip().lower()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _quote(text):
+    """FTS5 string literal"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _rank_prefix(queryset, term, limit):
+    """Products with a word starting with `term`, for terms shorter than a trigram"""
+    return list(queryset.filter(
+        Q(search_text__startswith=term) | Q(search_text__contains=' ' + term)
+    ).order_by('name').values_list('id', flat=True)[:limit])
+
+
+def _rank_postgresql(queryset, term, limit):
+    # Imported here so the module loads on databases without a PostgreSQL driver
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # Substrings as the old ILIKE search found them, plus misspellings; both use the GIN index
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET LOCAL pg_trgm.word_similarity_threshold = %s", [FUZZY_MIN_SHARED])
+        return list(queryset.filter(
+            Q(search_text__contains=term) | Q(TrigramWordSimilar(F('search_text'), term))
+        ).annotate(
+            similarity=TrigramWordSimilarity(term, 'search_text')
+        ).order_by('-similarity', 'name').values_list('id', flat=True)[:limit])
+
+
+def _match_sqlite(queryset, match, term, limit=None):
+    """(id, search_text) of FTS5 matches within queryset, word prefixes first then by bm25"""
+    sql, params = queryset.order_by().values('id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, search_text FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({sql}) "
+            f"ORDER BY instr(' ' || search_text, %s) = 0, rank"
+            + (" LIMIT %s" if limit else ""),
+            [match, *params, ' ' + term] + ([limit] if limit else [])
+        )
+        return cursor.fetchall()
+
+
+def _rank_sqlite(queryset, term, limit):
+    rows = _match_sqlite(queryset, _quote(term), term, limit)
+    if rows:
+        return [row[0] for row in rows]
+
+    # Typos: rows sharing enough of the term's trigrams, most shared first
+    wanted = trigrams(term)
+    rows = _match_sqlite(queryset, ' OR '.join(_quote(gram) for gram in sorted(wanted)), term)
+    shared = [(len(wanted & trigrams(text)) / len(wanted), i, row_id) for i, (row_id, text) in enumerate(rows)]
+    shared.sort(key=lambda item: (-item[0], item[1]))
+    return [row_id for score, _, row_id in shared if score >= FUZZY_MIN_SHARED][:limit]
+
+
+def search_products(queryset, term, limit=None):
+    """
+    Products of `queryset` matching `term`, best match first
+    limit: keep only this many best matches, all of them by default
+    Returns: the queryset narrowed to the matches and ordered by a `search_rank` annotation
+    """
+    term = normalize_term(term)
+    if not term:
+        return queryset
+
+    # Trigram indexes cannot match terms shorter than a trigram
+    if len(term) < 3:
+        ids = _rank_prefix(queryset, term, limit)
+    elif connection.vendor == 'postgresql':
+        ids = _rank_postgresql(queryset, term, limit)
+    elif connection.vendor == 'sqlite':
+        ids = _rank_sqlite(queryset, term, limit)
+    else:
+        ids = list(queryset.filter(search_text__contains=term).order_by('name').values_list('id', flat=True)[:limit])
+
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).annotate(search_rank=Case(
+        *[When(pk=product_id, then=Value(position)) for position, product_id in enumerate(ids)],
+        output_field=IntegerField()
+    )).order_by('search_rank')
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """?search= over the product search index instead of LIKE on each field"""
+
+    def filter_queryset(self, request, queryset, view):
+        return search_products(queryset, request.query_params.get(self.search_param, ''))
+
+
+class ProductOrderingFilter(filters.OrderingFilter):
+    """Keeps searched products in rank order unless ?ordering= is given"""
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
+
+
+def rebuild_search_index():
+    """
+    Refill search_text and, on SQLite, restore the sync triggers and rebuild the FTS5 table
+    Returns: number of products updated
+    """
+    updated = Product.refresh_search_text()
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for sql in SQLITE_TRIGGERS:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return updated
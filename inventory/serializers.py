@@ -181,6 +181,30 @@ class StockAdjustmentSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
+class ReceivingLineSerializer(serializers.Serializer):
+    """One product line of a supplier delivery"""
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class StockReceivingSerializer(serializers.Serializer):
+    """Serializer for receiving a supplier delivery in one request"""
+    supplier = serializers.PrimaryKeyRelatedField(queryset=Supplier.objects.all(), required=False, allow_null=True)
+    reference_number = serializers.CharField(max_length=100)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    lines = ReceivingLineSerializer(many=True, allow_empty=False, max_length=1000)
+    
+    def validate_lines(self, lines):
+        """Check every product exists with one query rather than one per line"""
+        product_ids = {line['product'] for line in lines}
+        found = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        missing = sorted(product_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Products not found: {', '.join(map(str, missing))}")
+        return lines
+
+
 class LowStockAlertSerializer(serializers.ModelSerializer):
     """Serializer for Low Stock Alerts"""
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -0,0 +1,78 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Category, Product
+
+
+# Fields the count depends on, a snapshot is not possible while either is deferred
+COUNTED_FIELDS = {'is_active', 'category_id'}
+NOT_LOADED = object()
+
+
+def _counted_category(instance):
+    """Category whose active product count includes this product, if any"""
+    if COUNTED_FIELDS & instance.get_deferred_fields():
+        return NOT_LOADED
+    # Read from __dict__ so deferred fields are not loaded on every instance
+    if instance.__dict__.get('is_active') is True:
+        return instance.__dict__.get('category_id')
+    return None
+
+
+def _stored_counted_category(pk):
+    """Category counting the product as stored in the database, if any"""
+    row = Product.objects.filter(pk=pk).values_list('is_active', 'category_id').first()
+    if row and row[0] is True:
+        return row[1]
+    return None
+
+
+def _adjust_count(category_id, delta):
+    if category_id is not None:
+        Category.objects.filter(pk=category_id).update(
+            active_product_count=F('active_product_count') + delta
+        )
+
+
+@receiver(post_init, sender=Product)
+def remember_counted_category(sender, instance, **kwargs):
+    instance._counted_category_id = _counted_category(instance)
+
+
+@receiver([pre_save, pre_delete], sender=Product)
+def load_counted_category(sender, instance, **kwargs):
+    # Loaded with is_active or category deferred, read the old row before it changes
+    if instance._counted_category_id is NOT_LOADED and instance.pk is not None:
+        instance._counted_category_id = _stored_counted_category(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    before = None if created else instance._counted_category_id
+    after = _counted_category(instance)
+    if after is NOT_LOADED:
+        # Deferred fields are not saved, the row holds the current values
+        after = _stored_counted_category(instance.pk)
+    if before != after:
+        _adjust_count(before, -1)
+        _adjust_count(after, 1)
+    instance._counted_category_id = after
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    _adjust_count(instance._counted_category_id, -1)
+
+
+@receiver(post_init, sender=Category)
+def remember_category_name(sender, instance, **kwargs):
+    instance._indexed_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    # Product search text includes the category name
+    if not created and instance.name != instance._indexed_name:
+        Product.refresh_search_text(Product.objects.filter(category=instance))
+    instance._indexed_name = instance.name
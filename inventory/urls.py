@@ -8,7 +8,7 @@ from .views import (
     ProductListCreateView, ProductDetailView,
     # Inventory Movements
     InventoryMovementListCreateView, InventoryMovementDetailView,
-    StockAdjustmentView,
+    StockAdjustmentView, StockReceivingView,
     # Low Stock Alerts
     LowStockAlertListView, LowStockAlertDetailView,
     AcknowledgeAlertView, ResolveAlertView,
@@ -35,6 +35,7 @@ urlpatterns = [
     path('movements/', InventoryMovementListCreateView.as_view(), name='movement-list'),
     path('movements/<int:pk>/', InventoryMovementDetailView.as_view(), name='movement-detail'),
     path('stock-adjustment/', StockAdjustmentView.as_view(), name='stock-adjustment'),
+    path('movements/receive/', StockReceivingView.as_view(), name='stock-receive'),
     
     # Low Stock Alerts
     path('alerts/', LowStockAlertListView.as_view(), name='alert-list'),
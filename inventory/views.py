@@ -9,12 +9,15 @@ from accounts.utils import create_audit_log
 from django.db import IntegrityError 
 from rest_framework import serializers 
 from .models import Category, Supplier, Product, InventoryMovement, LowStockAlert
+from pos.models import ProductSalesDaily
 from .serializers import (
     CategorySerializer, SupplierSerializer,
     ProductListSerializer, ProductDetailSerializer, ProductCreateUpdateSerializer,
     InventoryMovementSerializer, InventoryMovementCreateSerializer,
-    StockAdjustmentSerializer, LowStockAlertSerializer, InventoryReportSerializer
+    StockAdjustmentSerializer, StockReceivingSerializer, LowStockAlertSerializer, InventoryReportSerializer
 )
+from .receiving import receive_stock
+from .search import ProductOrderingFilter, ProductSearchFilter
 
 
 # ========== CATEGORY VIEWS ==========
@@ -137,8 +140,8 @@ class SupplierDetailView(generics.RetrieveUpdateDestroyAPIView):
 class ProductListCreateView(generics.ListCreateAPIView):
     """List all products or create a new one"""
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'sku', 'barcode', 'category__name']
+    # Searches name, SKU, barcode and category name, best match first
+    filter_backends = [ProductSearchFilter, ProductOrderingFilter]
     ordering_fields = ['name', 'unit_price', 'current_stock', 'created_at']
     ordering = ['name']
     
@@ -296,22 +299,9 @@ class InventoryMovementListCreateView(generics.ListCreateAPIView):
         return InventoryMovementSerializer
     
     def perform_create(self, serializer):
+        # Saving the movement applies it to stock and evaluates the product's alert
         movement = serializer.save(created_by=self.request.user)
         
-        product = movement.product
-        if product.is_low_stock:
-            existing_alert = LowStockAlert.objects.filter(
-                product=product,
-                status='PENDING'
-            ).first()
-            
-            if not existing_alert:
-                LowStockAlert.objects.create(
-                    product=product,
-                    current_stock=product.current_stock,
-                    reorder_level=product.reorder_level
-                )
-        
         create_audit_log(
             user=self.request.user,
             action='CREATE',
@@ -368,6 +358,60 @@ class StockAdjustmentView(APIView):
         })
 
 
+class StockReceivingView(APIView):
+    """Receive a supplier delivery: every line as a STOCK_IN movement in one request"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = StockReceivingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        supplier = serializer.validated_data.get('supplier')
+        reference_number = serializer.validated_data['reference_number']
+        lines = serializer.validated_data['lines']
+        
+        movements = receive_stock(
+            [(line['product'], line['quantity'], line['notes']) for line in lines],
+            reference_number=reference_number,
+            user=request.user,
+            supplier=supplier,
+            notes=serializer.validated_data['notes']
+        )
+        total_quantity = sum(movement.quantity for movement in movements)
+        
+        create_audit_log(
+            user=request.user,
+            action='CREATE',
+            table_name='inventory_movements',
+            new_values={
+                'supplier': supplier.id if supplier else None,
+                'reference_number': reference_number,
+                'movement_ids': [movement.id for movement in movements],
+                'total_quantity': total_quantity
+            },
+            description=f"Received delivery {reference_number}: {len(movements)} lines, {total_quantity} units",
+            request=request
+        )
+        
+        return Response({
+            'message': 'Delivery received successfully',
+            'reference_number': reference_number,
+            'supplier': supplier.id if supplier else None,
+            'lines': len(movements),
+            'total_quantity': total_quantity,
+            'movements': [
+                {
+                    'id': movement.id,
+                    'product': movement.product_id,
+                    'quantity': movement.quantity,
+                    'stock_before': movement.stock_before,
+                    'stock_after': movement.stock_after
+                }
+                for movement in movements
+            ]
+        }, status=status.HTTP_201_CREATED)
+
+
 # ========== LOW STOCK ALERT VIEWS ==========
 
 class LowStockAlertListView(generics.ListAPIView):
@@ -480,9 +524,7 @@ class InventoryReportView(APIView):
         
         categories_count = Category.objects.filter(is_active=True).count()
         
-        top_selling = InventoryMovement.objects.filter(
-            movement_type='SALE'
-        ).values(
+        top_selling = ProductSalesDaily.objects.values(
             'product__id', 'product__name', 'product__sku'
         ).annotate(
             total_sold=Sum('quantity')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SalesTransaction, TransactionItem, Cart, CartItem, PaymentTransaction
+from .models import SalesTransaction, TransactionItem, ProductSalesDaily, SalesHourly, Cart, CartItem, PaymentTransaction
 
 
 class TransactionItemInline(admin.TabularInline):
@@ -48,6 +48,21 @@ class TransactionItemAdmin(admin.ModelAdmin):
     readonly_fields = ('line_total', 'profit')
 
 
+@admin.register(ProductSalesDaily)
+class ProductSalesDailyAdmin(admin.ModelAdmin):
+    list_display = ('business_date', 'product', 'quantity', 'revenue', 'cost')
+    list_filter = ('business_date',)
+    search_fields = ('product__name', 'product__sku')
+    date_hierarchy = 'business_date'
+
+
+@admin.register(SalesHourly)
+class SalesHourlyAdmin(admin.ModelAdmin):
+    list_display = ('business_date', 'hour', 'transactions', 'quantity', 'revenue')
+    list_filter = ('business_date', 'hour')
+    date_hierarchy = 'business_date'
+
+
 class CartItemInline(admin.TabularInline):
     model = CartItem
     extra = 0
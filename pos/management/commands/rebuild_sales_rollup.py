@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pos.models import ProductSalesDaily, SalesHourly
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-day product and per-hour sales rollups from completed transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Only rebuild the last N days (defaults to the whole history)')
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['days']:
+            start_date = timezone.localdate() - timedelta(days=options['days'])
+
+        rows = ProductSalesDaily.rebuild(start_date=start_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily sales rows"))
+        rows = SalesHourly.rebuild(start_date=start_date)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} hourly sales rows"))
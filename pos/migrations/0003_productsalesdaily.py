@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_alter_product_current_stock_alter_product_is_active_and_more'),
+        ('pos', '0002_alter_salestransaction_created_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Product Daily Sales',
+                'verbose_name_plural': 'Product Daily Sales',
+                'db_table': 'product_sales_daily',
+                'ordering': ['-business_date'],
+                'indexes': [models.Index(fields=['business_date', 'product'], name='product_sal_busines_df8fc2_idx')],
+                'unique_together': {('product', 'business_date')},
+            },
+        ),
+    ]
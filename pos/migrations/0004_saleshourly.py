@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0003_productsalesdaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('transactions', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'verbose_name': 'Hourly Sales',
+                'verbose_name_plural': 'Hourly Sales',
+                'db_table': 'sales_hourly',
+                'ordering': ['-business_date', 'hour'],
+                'unique_together': {('business_date', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:50
+
+from django.db import migrations
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_product_sales_daily(apps, schema_editor):
+    """Same as ProductSalesDaily.rebuild(), which historical models do not have"""
+    ProductSalesDaily = apps.get_model('pos', 'ProductSalesDaily')
+    TransactionItem = apps.get_model('pos', 'TransactionItem')
+
+    totals = TransactionItem.objects.filter(transaction__status='COMPLETED').annotate(
+        business_date=TruncDate('transaction__created_at')
+    ).values('product_id', 'business_date').annotate(
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('line_total'),
+        total_cost=Sum(F('quantity') * F('product__cost_price'))
+    ).order_by()
+
+    ProductSalesDaily.objects.all().delete()
+    ProductSalesDaily.objects.bulk_create([
+        ProductSalesDaily(
+            product_id=row['product_id'],
+            business_date=row['business_date'],
+            quantity=row['total_quantity'],
+            revenue=row['total_revenue'],
+            cost=row['total_cost'] or 0
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0004_saleshourly'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_product_sales_daily, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:54
+
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+
+
+def fill_sales_hourly(apps, schema_editor):
+    """Same as SalesHourly.rebuild(), which historical models do not have"""
+    SalesHourly = apps.get_model('pos', 'SalesHourly')
+    SalesTransaction = apps.get_model('pos', 'SalesTransaction')
+
+    totals = SalesTransaction.objects.filter(status='COMPLETED').annotate(
+        business_date=TruncDate('created_at'),
+        hour=ExtractHour('created_at')
+    ).values('business_date', 'hour').annotate(
+        total_transactions=Count('id', distinct=True),
+        total_quantity=Sum('items__quantity'),
+        total_revenue=Sum('items__line_total')
+    ).order_by()
+
+    SalesHourly.objects.all().delete()
+    SalesHourly.objects.bulk_create([
+        SalesHourly(
+            business_date=row['business_date'],
+            hour=row['hour'],
+            transactions=row['total_transactions'],
+            quantity=row['total_quantity'] or 0,
+            revenue=row['total_revenue'] or 0
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0005_fill_product_sales_daily'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_sales_hourly, migrations.RunPython.noop),
+    ]
@@ -2,8 +2,10 @@ from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.db.models import Sum, F
-from django.db import DatabaseError 
+from django.db import DatabaseError, IntegrityError 
 from accounts.models import User
+from inventory.alerts import evaluate_stock_alerts
+from inventory.ledger import InsufficientStock, change_stock
 from inventory.models import Product, InventoryMovement
 from decimal import Decimal
 import traceback 
@@ -126,31 +128,20 @@ class SalesTransaction(models.Model):
             return
         
         # 2. Deduct inventory for each item
-        for item in self.items.all():
+        for item in self.items.select_related('product'):
             try:
-                # Refresh product instance to get current stock value just before update
-                item.product.refresh_from_db()
-                stock_before = item.product.current_stock
-                
-                # 🚨 CRITICAL FIX: Check for insufficient stock before updating
-                if stock_before < item.quantity:
+                # Deduct stock, checked and recorded exactly in one statement
+                try:
+                    stock_before, stock_after = change_stock(item.product_id, -item.quantity, allow_negative=False)
+                except InsufficientStock as e:
                     # This raises an exception that the outer @transaction.atomic block will catch
                     # and signal to the CheckoutView's catch block.
                     raise Exception(
-                        f"Insufficient stock: {item.product.name} (SKU: {item.product.sku}). Available: {stock_before}, Needed: {item.quantity}"
+                        f"Insufficient stock: {item.product.name} (SKU: {item.product.sku}). Available: {e.available}, Needed: {item.quantity}"
                     )
-                
-                # ATOMICALLY DEDUCT STOCK using F expression
-                rows_updated = Product.objects.filter(pk=item.product.pk).update(
-                    current_stock=F('current_stock') - item.quantity
-                )
-                
-                if rows_updated == 0:
-                    raise DatabaseError(f"Failed to update stock for Product ID {item.product.pk}. Row not found.")
-
-                # Refresh and capture stock AFTER deduction
-                item.product.refresh_from_db()
-                stock_after = item.product.current_stock
+                except Product.DoesNotExist:
+                    raise DatabaseError(f"Failed to update stock for Product ID {item.product_id}. Row not found.")
+                item.product.current_stock = stock_after
                 
                 # Create inventory movement log
                 InventoryMovement.objects.create(
@@ -175,6 +166,10 @@ class SalesTransaction(models.Model):
         self.completed_at = timezone.now()
         # Use save(update_fields=...) to save only the changed fields
         self.save(update_fields=['status', 'completed_at', 'updated_at']) 
+        
+        evaluate_stock_alerts(self.items.values_list('product_id', flat=True))
+        ProductSalesDaily.record_transaction(self)
+        SalesHourly.record_transaction(self)
     
     @transaction.atomic
     def void_transaction(self, user, reason):
@@ -184,22 +179,13 @@ class SalesTransaction(models.Model):
         
         # Restore inventory if transaction was completed
         if self.status == 'COMPLETED':
-            for item in self.items.all():
+            for item in self.items.select_related('product'):
                 
-                # 1. Refresh & Capture stock BEFORE atomic update
-                item.product.refresh_from_db()
-                stock_before = item.product.current_stock
+                # 1. Restore stock, capturing the exact before and after
+                stock_before, stock_after = change_stock(item.product_id, item.quantity)
+                item.product.current_stock = stock_after
                 
-                # 2. ATOMICALLY RESTORE STOCK
-                Product.objects.filter(pk=item.product.pk).update(
-                    current_stock=F('current_stock') + item.quantity
-                )
-
-                # 3. Refresh & Capture stock AFTER atomic update
-                item.product.refresh_from_db()
-                stock_after = item.product.current_stock
-                
-                # 4. Create inventory movement to restore stock
+                # 2. Create inventory movement to restore stock
                 InventoryMovement.objects.create(
                     product=item.product,
                     movement_type='RETURN',
@@ -211,6 +197,13 @@ class SalesTransaction(models.Model):
                     created_by=user,
                     transaction_id=self.id
                 )
+            
+            # Restocked products may be back above their reorder level
+            evaluate_stock_alerts(self.items.values_list('product_id', flat=True))
+            
+            # Take the sale back out of its business day
+            ProductSalesDaily.record_transaction(self, sign=-1)
+            SalesHourly.record_transaction(self, sign=-1)
         
         self.status = 'VOID'
         self.voided_by = user
@@ -258,6 +251,204 @@ class TransactionItem(models.Model):
             return Decimal(0)
 
 
+class ProductSalesDaily(models.Model):
+    """Completed sales per product and business day, kept current at checkout and void"""
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    business_date = models.DateField()
+    
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'product_sales_daily'
+        verbose_name = 'Product Daily Sales'
+        verbose_name_plural = 'Product Daily Sales'
+        ordering = ['-business_date']
+        unique_together = ['product', 'business_date']
+        indexes = [
+            models.Index(fields=['business_date', 'product']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.business_date}: {self.quantity} sold"
+    
+    @classmethod
+    def record_transaction(cls, sales_transaction, sign=1):
+        """Add (or with sign=-1, remove) a transaction's items on its business day"""
+        business_date = timezone.localdate(sales_transaction.created_at)
+        
+        totals = {}
+        for item in sales_transaction.items.select_related('product'):
+            cost_price = item.product.cost_price or Decimal(0)
+            quantity, revenue, cost = totals.get(item.product_id, (0, Decimal(0), Decimal(0)))
+            totals[item.product_id] = (
+                quantity + item.quantity,
+                revenue + item.line_total,
+                cost + cost_price * item.quantity
+            )
+        
+        for product_id, (quantity, revenue, cost) in totals.items():
+            cls._add(product_id, business_date, sign * quantity, sign * revenue, sign * cost)
+    
+    @classmethod
+    def _add(cls, product_id, business_date, quantity, revenue, cost):
+        """Increment one rollup row, creating it on the day's first sale"""
+        increments = {
+            'quantity': F('quantity') + quantity,
+            'revenue': F('revenue') + revenue,
+            'cost': F('cost') + cost,
+        }
+        rows = cls.objects.filter(product_id=product_id, business_date=business_date)
+        
+        if rows.update(**increments):
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    product_id=product_id,
+                    business_date=business_date,
+                    quantity=quantity,
+                    revenue=revenue,
+                    cost=cost
+                )
+        except IntegrityError:
+            # A concurrent checkout created the row first
+            rows.update(**increments)
+    
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, start_date=None, end_date=None):
+        """
+        Recompute the rollup from completed transactions, optionally for a date range
+        Returns: number of rollup rows written
+        """
+        from django.db.models.functions import TruncDate
+        
+        items = TransactionItem.objects.filter(transaction__status='COMPLETED')
+        rollup = cls.objects.all()
+        if start_date:
+            items = items.filter(transaction__created_at__date__gte=start_date)
+            rollup = rollup.filter(business_date__gte=start_date)
+        if end_date:
+            items = items.filter(transaction__created_at__date__lte=end_date)
+            rollup = rollup.filter(business_date__lte=end_date)
+        
+        totals = items.annotate(
+            business_date=TruncDate('transaction__created_at')
+        ).values('product_id', 'business_date').annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum('line_total'),
+            total_cost=Sum(F('quantity') * F('product__cost_price'))
+        ).order_by()
+        
+        rollup.delete()
+        created = cls.objects.bulk_create([
+            cls(
+                product_id=row['product_id'],
+                business_date=row['business_date'],
+                quantity=row['total_quantity'],
+                revenue=row['total_revenue'],
+                cost=row['total_cost'] or 0
+            )
+            for row in totals
+        ], batch_size=1000)
+        return len(created)
+
+
+class SalesHourly(models.Model):
+    """Completed sales per business day and hour of the day, kept current at checkout and void"""
+    
+    business_date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    
+    transactions = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'sales_hourly'
+        verbose_name = 'Hourly Sales'
+        verbose_name_plural = 'Hourly Sales'
+        ordering = ['-business_date', 'hour']
+        unique_together = ['business_date', 'hour']
+    
+    def __str__(self):
+        return f"{self.business_date} {self.hour:02d}:00: {self.transactions} transactions"
+    
+    @classmethod
+    def record_transaction(cls, sales_transaction, sign=1):
+        """Add (or with sign=-1, remove) a transaction in its local hour"""
+        created_at = timezone.localtime(sales_transaction.created_at)
+        totals = sales_transaction.items.aggregate(quantity=Sum('quantity'), revenue=Sum('line_total'))
+        
+        increments = {
+            'transactions': F('transactions') + sign,
+            'quantity': F('quantity') + sign * (totals['quantity'] or 0),
+            'revenue': F('revenue') + sign * (totals['revenue'] or Decimal(0)),
+        }
+        rows = cls.objects.filter(business_date=created_at.date(), hour=created_at.hour)
+        
+        if rows.update(**increments):
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    business_date=created_at.date(),
+                    hour=created_at.hour,
+                    transactions=sign,
+                    quantity=sign * (totals['quantity'] or 0),
+                    revenue=sign * (totals['revenue'] or Decimal(0))
+                )
+        except IntegrityError:
+            # A concurrent checkout created the row first
+            rows.update(**increments)
+    
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, start_date=None, end_date=None):
+        """
+        Recompute the rollup from completed transactions, optionally for a date range
+        Returns: number of rollup rows written
+        """
+        from django.db.models import Count
+        from django.db.models.functions import ExtractHour, TruncDate
+        
+        sales = SalesTransaction.objects.filter(status='COMPLETED')
+        rollup = cls.objects.all()
+        if start_date:
+            sales = sales.filter(created_at__date__gte=start_date)
+            rollup = rollup.filter(business_date__gte=start_date)
+        if end_date:
+            sales = sales.filter(created_at__date__lte=end_date)
+            rollup = rollup.filter(business_date__lte=end_date)
+        
+        totals = sales.annotate(
+            business_date=TruncDate('created_at'),
+            hour=ExtractHour('created_at')
+        ).values('business_date', 'hour').annotate(
+            total_transactions=Count('id', distinct=True),
+            total_quantity=Sum('items__quantity'),
+            total_revenue=Sum('items__line_total')
+        ).order_by()
+        
+        rollup.delete()
+        created = cls.objects.bulk_create([
+            cls(
+                business_date=row['business_date'],
+                hour=row['hour'],
+                transactions=row['total_transactions'],
+                quantity=row['total_quantity'] or 0,
+                revenue=row['total_revenue'] or 0
+            )
+            for row in totals
+        ], batch_size=1000)
+        return len(created)
+
+
 class Cart(models.Model):
     """Shopping cart for building transactions"""
     
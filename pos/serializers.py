@@ -2,13 +2,16 @@ from rest_framework import serializers
 from .models import (
     SalesTransaction,
     TransactionItem,
+    ProductSalesDaily,
+    SalesHourly,
     Cart,
     CartItem,
     PaymentTransaction
 )
-from inventory.models import Product, InventoryMovement, LowStockAlert
+from inventory.alerts import evaluate_stock_alerts
+from inventory.ledger import InsufficientStock, change_stock
+from inventory.models import Product, InventoryMovement
 from django.db import transaction
-from django.db.models import F
 from decimal import Decimal
 
 # ====================
@@ -86,29 +89,21 @@ class SalesTransactionCreateSerializer(serializers.ModelSerializer):
         transaction_obj = SalesTransaction.objects.create(**validated_data)
 
         # Create transaction items and deduct stock
+        touched = set()
         for item in items_data:
             product_id = item.get('product_id') or item.get('product')
-            product = Product.objects.select_for_update().get(id=product_id)
+            product = Product.objects.get(id=product_id)
 
             quantity = int(item.get('quantity', 1))
             unit_price = float(item.get('unit_price', product.unit_price))
             discount = float(item.get('discount', 0))
 
-            # Check stock
-            if product.current_stock < quantity:
+            # Deduct stock, checked and recorded exactly in one statement
+            try:
+                stock_before, stock_after = change_stock(product.pk, -quantity, allow_negative=False)
+            except InsufficientStock:
                 raise serializers.ValidationError(f"Not enough stock for {product.name}")
-
-            # ✅ FIX 1: Record stock BEFORE deduction for audit trail
-            stock_before = product.current_stock
-
-            # Deduct stock using F() expression for atomicity
-            Product.objects.filter(pk=product.pk).update(
-                current_stock=F('current_stock') - quantity
-            )
-            
-            # Refresh to get updated stock
-            product.refresh_from_db()
-            stock_after = product.current_stock
+            product.current_stock = stock_after
 
             # Create transaction item
             TransactionItem.objects.create(
@@ -132,23 +127,14 @@ class SalesTransactionCreateSerializer(serializers.ModelSerializer):
                 created_by=self.context['request'].user if 'request' in self.context else None,
                 transaction_id=transaction_obj.id
             )
+            touched.add(product.pk)
+
+        # ✅ FIX 3: Raise LowStockAlerts for every product the sale took low, in one pass
+        evaluate_stock_alerts(touched)
 
-            # ✅ FIX 3: Create LowStockAlert if needed (synchronously)
-            if product.current_stock <= product.reorder_level:
-                # Check if there's already a pending alert for this product
-                existing_alert = LowStockAlert.objects.filter(
-                    product=product,
-                    status='PENDING'
-                ).first()
-                
-                if not existing_alert:
-                    LowStockAlert.objects.create(
-                        product=product,
-                        current_stock=product.current_stock,
-                        reorder_level=product.reorder_level,
-                        status='PENDING'
-                    )
-                    print(f"🚨 Low Stock Alert Created: {product.name} - Stock: {product.current_stock}/{product.reorder_level}")
+        # Roll the sale into its business day
+        ProductSalesDaily.record_transaction(transaction_obj)
+        SalesHourly.record_transaction(transaction_obj)
 
         return transaction_obj
 
@@ -6,7 +6,7 @@ from django.db.models import Sum, Count, Avg, F, Q
 from django.utils import timezone
 from datetime import timedelta
 from accounts.utils import create_audit_log
-from .models import SalesTransaction, TransactionItem, Cart, CartItem, PaymentTransaction
+from .models import SalesTransaction, TransactionItem, ProductSalesDaily, Cart, CartItem, PaymentTransaction
 from inventory.models import Product
 from django.db import transaction, DatabaseError 
 from rest_framework.exceptions import ValidationError
@@ -388,6 +388,11 @@ class CheckoutView(APIView):
 
 # ========== SALES REPORTS VIEWS ==========
 
+def _business_date(value):
+    """Shop-local date of a report bound, naive values are taken as local already"""
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
 class SalesReportView(APIView):
     """Get comprehensive sales report"""
     permission_classes = [IsAuthenticated]
@@ -401,10 +406,14 @@ class SalesReportView(APIView):
         if request.query_params.get('end_date'):
             end_date = timezone.datetime.fromisoformat(request.query_params.get('end_date'))
         
+        # Whole business days, the product totals below come from the daily rollup
+        start_day = _business_date(start_date)
+        end_day = _business_date(end_date)
+        
         transactions = SalesTransaction.objects.filter(
             status='COMPLETED',
-            created_at__gte=start_date,
-            created_at__lte=end_date
+            created_at__date__gte=start_day,
+            created_at__date__lte=end_day
         )
         
         total_sales = transactions.aggregate(total=Sum('total_amount'))['total'] or 0
@@ -425,13 +434,14 @@ class SalesReportView(APIView):
             payment_method__in=['GCASH', 'PAYMAYA', 'BANK_TRANSFER']
         ).aggregate(total=Sum('total_amount'))['total'] or 0
         
-        top_products = TransactionItem.objects.filter(
-            transaction__in=transactions
+        top_products = ProductSalesDaily.objects.filter(
+            business_date__gte=start_day,
+            business_date__lte=end_day
         ).values(
             'product__id', 'product__name', 'product__sku'
         ).annotate(
             total_quantity=Sum('quantity'),
-            total_sales=Sum('line_total')
+            total_sales=Sum('revenue')
         ).order_by('-total_quantity')[:10]
         
         daily_sales = transactions.extra(
@@ -12,7 +12,7 @@ from io import BytesIO, StringIO
 from django.shortcuts import get_object_or_404
 import csv
 
-from django.db.models.functions import ExtractDay, ExtractHour, TruncDate
+from django.db.models.functions import ExtractDay, TruncDate
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -22,7 +22,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib import colors
 
 from accounts.permissions import IsOwner
-from pos.models import SalesTransaction, TransactionItem
+from pos.models import SalesTransaction, TransactionItem, ProductSalesDaily
 from inventory.models import Product, Category, InventoryMovement, LowStockAlert
 from .models import DashboardMetric, ReportSchedule, ReportExport
 from .serializers import (
@@ -95,7 +95,7 @@ class DashboardOverviewView(APIView):
         low_stock_count = Product.objects.filter(current_stock__lt=10, is_active=True).count()
         out_of_stock_count = Product.objects.filter(current_stock=0, is_active=True).count()
         inventory_value = Product.objects.filter(is_active=True).aggregate(total=Sum(F('current_stock') * F('cost_price')))['total'] or 0
-        top_products = TransactionItem.objects.filter(transaction__in=month_txns).values('product__id', 'product__name', 'product__sku').annotate(total_quantity=Sum('quantity'), total_sales=Sum('line_total')).order_by('-total_quantity')[:5]
+        top_products = ProductSalesDaily.objects.filter(business_date__gte=month_start).values('product__id', 'product__name', 'product__sku').annotate(total_quantity=Sum('quantity'), total_sales=Sum('revenue')).order_by('-total_quantity')[:5]
         recent_txns = base_filter.order_by('-created_at')[:10].values('id', 'transaction_number', 'total_amount', 'created_at', 'created_by__full_name')
         data = {
             'today_sales': float(today_data['sales']), 'today_transactions': today_data['transactions'],
@@ -176,8 +176,8 @@ class InventoryAnalyticsView(APIView):
         expired_products = Product.objects.filter(expiry_date__lt=timezone.now().date(), is_active=True).count()
         average_stock_age = Product.objects.filter(is_active=True).annotate(age=ExtractDay(timezone.now() - F('created_at'))).aggregate(avg=Avg('age'))['avg'] or 0
         last_30_days = timezone.now() - timedelta(days=30)
-        fast_moving = TransactionItem.objects.filter(transaction__status__in=['COMPLETED', 'PAID', 'Completed'], transaction__created_at__gte=last_30_days).values('product__id', 'product__name', 'product__current_stock').annotate(total_sold=Sum('quantity')).order_by('-total_sold')[:10]
-        slow_moving = Product.objects.filter(is_active=True).annotate(sold=Sum('transaction_items__quantity', filter=Q(transaction_items__transaction__status__in=['COMPLETED', 'PAID', 'Completed'], transaction_items__transaction__created_at__gte=last_30_days))).filter(Q(sold__isnull=True) | Q(sold__lte=5)).values('id', 'name', 'current_stock', 'sold')[:10]
+        fast_moving = ProductSalesDaily.objects.filter(business_date__gte=timezone.localdate(last_30_days)).values('product__id', 'product__name', 'product__current_stock').annotate(total_sold=Sum('quantity')).order_by('-total_sold')[:10]
+        slow_moving = Product.objects.filter(is_active=True).annotate(sold=Sum('daily_sales__quantity', filter=Q(daily_sales__business_date__gte=timezone.localdate(last_30_days)))).filter(Q(sold__isnull=True) | Q(sold__lte=5)).values('id', 'name', 'current_stock', 'sold')[:10]
         category_distribution = Product.objects.filter(is_active=True).values('category__name').annotate(product_count=Count('id'), total_stock=Sum('current_stock'), total_value=Sum(F('current_stock') * F('cost_price'))).order_by('-total_value')
         stock_in_total = InventoryMovement.objects.filter(movement_type='STOCK_IN', created_at__gte=last_30_days).aggregate(total=Sum('quantity'))['total'] or 0
         stock_out_total = InventoryMovement.objects.filter(movement_type__in=['STOCK_OUT', 'SALE'], created_at__gte=last_30_days).aggregate(total=Sum('quantity'))['total'] or 0
@@ -218,25 +218,25 @@ class ProfitLossReportView(APIView):
         gross_sales = transactions.aggregate(total=Sum('subtotal'))['total'] or 0
         discounts = transactions.aggregate(total=Sum('discount'))['total'] or 0
         net_sales = transactions.aggregate(total=Sum('total_amount'))['total'] or 0
-        cost_of_goods_sold = sum(item.product.cost_price * item.quantity for t in transactions for item in t.items.all())
+        daily_sales = ProductSalesDaily.objects.filter(business_date__gte=start_date, business_date__lte=end_date)
+        cost_of_goods_sold = daily_sales.aggregate(total=Sum('cost'))['total'] or 0
         gross_profit = net_sales - cost_of_goods_sold
         gross_profit_margin = (gross_profit / net_sales * 100) if net_sales > 0 else 0
         operating_expenses = 0
         net_profit = gross_profit - operating_expenses
         net_profit_margin = (net_profit / net_sales * 100) if net_sales > 0 else 0
         profit_by_category = []
-        for category in Category.objects.filter(is_active=True):
-            cat_items = TransactionItem.objects.filter(transaction__in=transactions, product__category=category)
-            cat_revenue = cat_items.aggregate(total=Sum('line_total'))['total'] or 0
-            cat_cost = sum(item.product.cost_price * item.quantity for item in cat_items)
+        for cat in daily_sales.filter(product__category__is_active=True).values('product__category__name').annotate(revenue=Sum('revenue'), cost=Sum('cost')):
+            cat_revenue = cat['revenue'] or 0
+            cat_cost = cat['cost'] or 0
             cat_profit = cat_revenue - cat_cost
             if cat_revenue > 0:
-                profit_by_category.append({'category': category.name, 'revenue': float(cat_revenue), 'cost': float(cat_cost), 'profit': float(cat_profit), 'margin': float((cat_profit / cat_revenue * 100))})
+                profit_by_category.append({'category': cat['product__category__name'], 'revenue': float(cat_revenue), 'cost': float(cat_cost), 'profit': float(cat_profit), 'margin': float((cat_profit / cat_revenue * 100))})
         profit_by_category.sort(key=lambda x: x['profit'], reverse=True)
         profit_by_product = []
-        product_items = TransactionItem.objects.filter(transaction__in=transactions).values('product__id', 'product__name', 'product__cost_price').annotate(revenue=Sum('line_total'), quantity=Sum('quantity'))
+        product_items = daily_sales.values('product__id', 'product__name').annotate(revenue=Sum('revenue'), cost=Sum('cost'), quantity=Sum('quantity'))
         for item in product_items:
-            cost = item['product__cost_price'] * item['quantity']
+            cost = item['cost']
             profit = item['revenue'] - cost
             profit_by_product.append({'product': item['product__name'], 'revenue': float(item['revenue']), 'cost': float(cost), 'profit': float(profit), 'quantity': item['quantity']})
         profit_by_product.sort(key=lambda x: x['profit'], reverse=True)
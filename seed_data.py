@@ -12,9 +12,9 @@ from django.db import models
 from django.utils import timezone
 from accounts.models import User, AuditLog
 from inventory.models import Category, Supplier, Product, InventoryMovement, LowStockAlert
-from pos.models import SalesTransaction, TransactionItem, Cart, CartItem, PaymentTransaction
+from pos.models import SalesTransaction, TransactionItem, Cart, CartItem, PaymentTransaction, ProductSalesDaily, SalesHourly
 from forecasting.models import (
-    ForecastModel, ProductForecast, CategoryForecast, 
+    ForecastModel, ForecastRun, ProductForecast, CategoryForecast, 
     SeasonalPattern, StockRecommendation
 )
 from reports.models import ReportSchedule, ReportExport, DashboardMetric
@@ -25,6 +25,7 @@ print("Starting seed data generation...")
 # Clear existing data (optional - comment out if you want to keep existing data)
 print("Clearing existing data...")
 StockRecommendation.objects.all().delete()
+ForecastRun.objects.all().delete()
 ProductForecast.objects.all().delete()
 CategoryForecast.objects.all().delete()
 ForecastModel.objects.all().delete()
@@ -282,6 +283,11 @@ for days_ago in range(30, 0, -1):
 
 print(f"Created {transaction_count} sales transactions")
 
+# Transactions are created already COMPLETED, so checkout never updated the rollup
+print("Rebuilding daily and hourly sales rollups...")
+ProductSalesDaily.rebuild()
+SalesHourly.rebuild()
+
 print("Creating seasonal patterns...")
 # Create seasonal patterns
 seasonal_patterns = [
@@ -361,38 +367,34 @@ forecast_model = ForecastModel.objects.create(
 )
 
 print("Creating product forecasts...")
-# Create forecasts for next 7 days
+# Create a forecast run for the next 7 days
 for product in Product.objects.all()[:10]:  # Forecast for first 10 products
     base_demand = product.current_stock // 5  # Base daily demand
     
-    for days_ahead in range(1, 8):
-        forecast_date = date.today() + timedelta(days=days_ahead)
-        
-        # Add some randomness
-        predicted = base_demand + random.randint(-2, 5)
-        predicted = max(1, predicted)
-        
-        ProductForecast.objects.create(
-            product=product,
-            forecast_model=forecast_model,
-            forecast_date=forecast_date,
-            predicted_demand=predicted,
-            confidence_lower=max(1, predicted - 5),
-            confidence_upper=predicted + 8,
-            confidence_level=95.0,
-            is_peak_season=False,
-            seasonal_factor=1.0
-        )
+    # Add some randomness
+    predicted = [max(1, base_demand + random.randint(-2, 5)) for _ in range(7)]
+    
+    ForecastRun.pack(
+        predicted,
+        [max(1, p - 5) for p in predicted],
+        [p + 8 for p in predicted],
+        [False] * 7,
+        [1.0] * 7,
+        product=product,
+        forecast_model=forecast_model,
+        start_date=date.today() + timedelta(days=1)
+    ).save()
 
 print("Creating stock recommendations...")
 # Create stock recommendations for low stock items
 for product in Product.objects.filter(current_stock__lte=models.F('reorder_level'))[:5]:
-    latest_forecast = product.forecasts.filter(
-        forecast_date__gte=date.today()
+    latest_forecast = product.forecast_runs.filter(
+        end_date__gte=date.today()
     ).first()
     
     if latest_forecast:
-        recommended_qty = latest_forecast.recommended_stock - product.current_stock
+        first_day = latest_forecast.daily()[0]
+        recommended_qty = first_day['recommended_stock'] - product.current_stock
         
         if recommended_qty > 0:
             priority = 'URGENT' if product.current_stock < 5 else 'HIGH'
@@ -403,7 +405,7 @@ for product in Product.objects.filter(current_stock__lte=models.F('reorder_level
                 current_stock=product.current_stock,
                 recommended_order_quantity=recommended_qty,
                 reason=f'Stock level ({product.current_stock}) below reorder point ({product.reorder_level}). '
-                       f'Forecasted demand: {latest_forecast.predicted_demand} units.',
+                       f'Forecasted demand: {first_day["predicted_demand"]} units.',
                 priority=priority,
                 status='PENDING'
             )
@@ -478,11 +480,13 @@ print(f"  - {Supplier.objects.count()} suppliers")
 print(f"  - {Product.objects.count()} products")
 print(f"  - {SalesTransaction.objects.count()} sales transactions")
 print(f"  - {TransactionItem.objects.count()} transaction items")
+print(f"  - {ProductSalesDaily.objects.count()} daily sales rollup rows")
+print(f"  - {SalesHourly.objects.count()} hourly sales rollup rows")
 print(f"  - {InventoryMovement.objects.count()} inventory movements")
 print(f"  - {LowStockAlert.objects.count()} low stock alerts")
 print(f"  - {SeasonalPattern.objects.count()} seasonal patterns")
 print(f"  - {ForecastModel.objects.count()} forecast models")
-print(f"  - {ProductForecast.objects.count()} product forecasts")
+print(f"  - {ForecastRun.objects.count()} forecast runs")
 print(f"  - {StockRecommendation.objects.count()} stock recommendations")
 print(f"  - {ReportSchedule.objects.count()} report schedules")
 print(f"  - {DashboardMetric.objects.count()} dashboard metrics")
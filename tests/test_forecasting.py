@@ -0,0 +1,941 @@
+"""
+Tests for the forecasting pipeline
+"""
+
+import numpy as np
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from inventory.models import Category, Product
+from pos.models import ProductSalesDaily, SalesHourly, SalesTransaction, TransactionItem
+from forecasting.backtesting import run_backtest
+from forecasting.benchmarks import compare_to_baseline, run_benchmarks
+from forecasting.inventory_policy import (
+    apply_reorder_proposals, propose_reorder_levels, simulate_reorder_levels
+)
+from forecasting.models import (
+    BacktestResult, CategoryForecast, ForecastJob, ForecastModel, ForecastRun, ProductForecast,
+    ReorderLevelProposal, SeasonalPattern, StockRecommendation
+)
+from forecasting.recommendations import generate_recommendations
+from forecasting.registry import get_serving_model, get_serving_models
+from forecasting.retraining import retrain_drifted_models
+from forecasting.seasonal_detection import detect_category_seasonality
+from forecasting.smoothing import (
+    croston_forecast, fit_croston, fit_holt_winters, holt_winters_forecast, integer_forecast
+)
+from forecasting.accuracy import backfill_actual_demand
+from forecasting.jobs import fail_stale_jobs, run_forecast_job
+from forecasting.ml_utils import (
+    build_feature_matrix, fit_linear_regression, fold_scaler,
+    forecast_horizon, lag_feature_matrix, predict_demand, recommend_stock
+)
+from forecasting.online import (
+    RLS_RIDGE, rls_initialize, rls_update, update_models_online, with_intercept
+)
+from forecasting.seasonality import get_seasonal_calendar
+
+User = get_user_model()
+
+
+def create_sales_history(products, days=60, base_quantity=3):
+    """Create one completed sale per product per day, back-dated over `days` days"""
+    now = timezone.now()
+    for day in range(days, 0, -1):
+        transaction = SalesTransaction.objects.create(
+            subtotal=100,
+            total_amount=100,
+            payment_method='CASH',
+            amount_paid=100,
+            status='COMPLETED'
+        )
+        for i, product in enumerate(products):
+            TransactionItem.objects.create(
+                transaction=transaction,
+                product=product,
+                quantity=base_quantity + i + (day % 7 == 0) * 2,
+                unit_price=100
+            )
+        # created_at is auto_now_add, back-date it after creation
+        SalesTransaction.objects.filter(pk=transaction.pk).update(
+            created_at=now - timedelta(days=day)
+        )
+
+    # Back-dating bypasses checkout, so rebuild the rollups from the transactions
+    ProductSalesDaily.rebuild()
+    SalesHourly.rebuild()
+
+
+@pytest.mark.django_db
+class TestBulkForecastJob:
+    """Bulk forecast jobs fan products out to workers and write in bulk"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.category = Category.objects.create(name='Roses')
+        self.products = [
+            Product.objects.create(
+                sku=f'ROSE-{i:03d}',
+                name=f'Rose {i}',
+                category=self.category,
+                unit_price=100,
+                cost_price=50,
+                current_stock=100,
+                reorder_level=10
+            )
+            for i in range(3)
+        ]
+        self.no_history = Product.objects.create(
+            sku='TULIP-001',
+            name='Tulip',
+            category=self.category,
+            unit_price=100,
+            cost_price=50,
+            current_stock=20
+        )
+        create_sales_history(self.products)
+
+    def create_job(self, **parameters):
+        return ForecastJob.objects.create(
+            parameters={'forecast_days': 7, 'training_days': 30, **parameters},
+            created_by=self.owner
+        )
+
+    def test_job_forecasts_every_selected_product(self):
+        job = run_forecast_job(self.create_job().id, workers=1)
+
+        assert job.status == 'COMPLETED'
+        assert job.total_products == 4
+        assert job.processed_products == 4
+        assert job.progress == 100
+        assert job.forecasts_generated == 21
+        assert [e['product'] for e in job.errors] == ['Tulip']
+
+        for product in self.products:
+            assert ForecastRun.objects.get(product=product).days == 7
+        assert ForecastModel.objects.filter(is_active=True).count() == 3
+        # Upcoming days are packed into runs, rows are only written once a day is realized
+        assert not ProductForecast.objects.exists()
+
+    def test_job_generates_recommendations(self):
+        # Rose 2 sells ~5 a day, 15 in stock lasts under a week
+        Product.objects.filter(pk=self.products[2].pk).update(current_stock=15)
+        job = run_forecast_job(self.create_job(generate_recommendations=True).id, workers=1)
+
+        assert job.recommendations_generated == 1
+        recommendation = StockRecommendation.objects.get()
+        assert recommendation.product == self.products[2]
+        assert recommendation.priority == 'URGENT'
+        assert recommendation.recommended_order_quantity > 0
+
+        # Nothing changed, nothing rewritten
+        assert generate_recommendations() == 0
+
+        Product.objects.filter(pk=self.products[2].pk).update(current_stock=10)
+        assert generate_recommendations() == 1
+        assert StockRecommendation.objects.get().current_stock == 10
+
+    def test_auto_job_uses_croston_for_intermittent_sellers(self):
+        sparse = Product.objects.create(
+            sku='BOUQUET-001',
+            name='Wedding Bouquet',
+            category=self.category,
+            unit_price=100,
+            cost_price=50,
+            current_stock=5
+        )
+        # One sale every fourth day
+        for day in range(4, 60, 4):
+            transaction = SalesTransaction.objects.create(
+                subtotal=100, total_amount=100, payment_method='CASH', amount_paid=100, status='COMPLETED'
+            )
+            TransactionItem.objects.create(transaction=transaction, product=sparse, quantity=2, unit_price=100)
+            SalesTransaction.objects.filter(pk=transaction.pk).update(
+                created_at=timezone.now() - timedelta(days=day)
+            )
+        ProductSalesDaily.rebuild()
+
+        job = run_forecast_job(self.create_job(model_type='AUTO', forecast_days=28).id, workers=1)
+
+        assert job.status == 'COMPLETED'
+        assert job.forecasts_generated == 4 * 28
+        croston = ForecastModel.objects.get(model_type='CROSTON')
+        assert croston.product_id == sparse.id
+        assert ForecastModel.objects.filter(model_type='LINEAR_REGRESSION').count() == 3
+
+        # Half a unit a day adds up over the horizon instead of rounding to zero every day
+        total = ForecastRun.objects.get(product=sparse).predicted_demand.sum()
+        assert 10 <= total <= 18
+
+    def test_job_reuses_active_models(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        job = run_forecast_job(self.create_job().id, workers=1)
+
+        assert job.status == 'COMPLETED'
+        assert ForecastModel.objects.count() == 3
+        assert ForecastRun.objects.count() == 3
+        assert job.forecasts_generated == 21
+
+    def test_newer_run_takes_over_and_days_are_listed(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        rose = self.products[0]
+        first = ForecastRun.objects.get(product=rose)
+        # Pretend the first run was made three days ago
+        ForecastRun.objects.filter(pk=first.pk).update(
+            start_date=first.start_date - timedelta(days=3),
+            end_date=first.end_date - timedelta(days=3)
+        )
+
+        run_forecast_job(self.create_job(product_ids=[rose.id]).id, workers=1)
+        first.refresh_from_db()
+        second = ForecastRun.objects.exclude(pk=first.pk).get(product=rose)
+        assert first.end_date == second.start_date - timedelta(days=1)
+        assert first.days == 3
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/api/forecasting/forecasts/?product_id={rose.id}&days=7')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Today from the older run, the week ahead from the newer one
+        assert [row['run'] for row in response.data] == [first.id] + [second.id] * 7
+        assert [row['predicted_demand'] for row in response.data[1:]] == second.predicted_demand.tolist()
+        assert response.data[0]['forecast_date'] == timezone.now().date().isoformat()
+
+    def test_job_replaces_only_champions_of_another_type(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        rose, other = self.products[0], self.products[1]
+        kept = get_serving_model(other.id)
+
+        job = run_forecast_job(self.create_job(product_ids=[rose.id], model_type='HOLT_WINTERS').id, workers=1)
+
+        assert job.status == 'COMPLETED'
+        assert get_serving_model(rose.id).model_type == 'HOLT_WINTERS'
+        assert ForecastModel.objects.get(product=rose, model_type='LINEAR_REGRESSION').status == 'DEPRECATED'
+        # The new champion's run replaces the old one starting the same day
+        assert ForecastRun.objects.get(product=rose).forecast_model.model_type == 'HOLT_WINTERS'
+        assert get_serving_model(other.id).pk == kept.pk
+        assert ForecastModel.objects.filter(is_active=True).count() == 3
+
+    def test_challenger_promotion_is_per_product(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        run_forecast_job(self.create_job().id, workers=1)
+        rose = self.products[0]
+        champion = get_serving_model(rose.id)
+
+        response = client.post('/api/forecasting/train/', {
+            'product_id': rose.id, 'training_days': 30, 'slot': 'CHALLENGER'
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        challenger = get_serving_model(rose.id, 'CHALLENGER')
+        assert challenger.pk == response.data['model']['id']
+        # Training a challenger leaves every champion serving
+        assert get_serving_model(rose.id).pk == champion.pk
+
+        response = client.post(f'/api/forecasting/models/{challenger.id}/promote/')
+        assert response.status_code == status.HTTP_200_OK
+        assert get_serving_model(rose.id).pk == challenger.pk
+        assert get_serving_model(rose.id, 'CHALLENGER') is None
+        assert ForecastModel.objects.get(pk=champion.pk).status == 'DEPRECATED'
+        assert len(get_serving_models([p.id for p in self.products])) == 3
+
+        # Promoting twice is refused
+        response = client.post(f'/api/forecasting/models/{challenger.id}/promote/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_serving_lookup_is_one_query(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        product_ids = [p.id for p in self.products]
+
+        with CaptureQueriesContext(connection) as queries:
+            assert len(get_serving_models(product_ids)) == 3
+        assert len(queries) == 1
+
+    def test_job_runs_chunks_on_process_pool(self, settings):
+        settings.FORECAST_JOB_CHUNK_SIZE = 2
+        job = run_forecast_job(
+            self.create_job(product_ids=[p.id for p in self.products]).id,
+            workers=2
+        )
+
+        assert job.status == 'COMPLETED'
+        assert job.total_products == 3
+        assert job.forecasts_generated == 21
+
+    def test_bulk_endpoint_returns_job_immediately(self, django_capture_on_commit_callbacks):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            response = client.post('/api/forecasting/generate/bulk/', {
+                'category_id': self.category.id,
+                'forecast_days': 7
+            }, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'PENDING'
+        assert len(callbacks) == 1
+
+        response = client.get(f"/api/forecasting/generate/bulk/{response.data['id']}/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['progress'] == 0
+
+    def test_stale_jobs_are_failed(self):
+        stale = timezone.now() - timedelta(hours=1)
+        never_started = self.create_job()
+        ForecastJob.objects.filter(pk=never_started.pk).update(created_at=stale)
+        died = self.create_job()
+        ForecastJob.objects.filter(pk=died.pk).update(status='RUNNING', started_at=stale, heartbeat_at=stale)
+        running = self.create_job()
+        ForecastJob.objects.filter(pk=running.pk).update(
+            status='RUNNING', started_at=stale, heartbeat_at=timezone.now()
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/api/forecasting/generate/bulk/{died.id}/')
+        assert response.data['status'] == 'FAILED'
+
+        # Polling fails only the polled job
+        statuses = dict(ForecastJob.objects.values_list('id', 'status'))
+        assert statuses == {never_started.id: 'PENDING', died.id: 'FAILED', running.id: 'RUNNING'}
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(f'/api/forecasting/generate/bulk/{running.id}/')
+        assert not any(query['sql'].startswith('UPDATE') for query in queries)
+
+        assert fail_stale_jobs() == 1
+        statuses = dict(ForecastJob.objects.values_list('id', 'status'))
+        assert statuses == {never_started.id: 'FAILED', died.id: 'FAILED', running.id: 'RUNNING'}
+        assert fail_stale_jobs(minutes=0) == 1
+        assert ForecastJob.objects.get(pk=running.pk).status == 'FAILED'
+
+    def test_summary_batch_endpoint_is_columnar(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/forecasting/forecasts/summary/?category_id={self.category.id}')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Summaries were refreshed by the job, nothing is recomputed on read
+        assert len(queries) == 2
+        assert response.data['count'] == 4
+        columns = response.data['columns']
+        assert columns['product_id'] == [p.id for p in self.products] + [self.no_history.id]
+        assert all(total > 0 for total in columns['forecast_7_days'][:3])
+        assert columns['trend'][3] == 'unknown'
+        assert columns['days_until_stockout'][3] == 999
+
+        # The single product summary reads the same row
+        response = client.get(f'/api/forecasting/forecasts/summary/{self.products[0].id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['forecast_7_days'] == columns['forecast_7_days'][0]
+        assert response.data['days_until_stockout'] == columns['days_until_stockout'][0]
+
+    def test_forecast_batch_endpoint_is_columnar(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/forecasting/forecasts/batch/?category_id={self.category.id}&days=7')
+
+        assert response.status_code == status.HTTP_200_OK
+        # Category products, then their runs
+        assert len(queries) == 2
+        data = response.data
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        assert len(data['dates']) == 8 and data['dates'][1] == tomorrow
+        # The tulip has no history and no run
+        assert data['count'] == 3
+        assert data['product_id'] == [p.id for p in self.products]
+
+        for i, product in enumerate(self.products):
+            run = ForecastRun.objects.get(product=product)
+            # The job forecasts from tomorrow, today is not covered
+            assert data['predicted_demand'][i] == [None] + run.predicted_demand.tolist()
+            assert data['confidence_lower'][i][1:] == run.confidence_lower.tolist()
+            assert data['confidence_upper'][i][1:] == run.confidence_upper.tolist()
+
+        response = client.get('/api/forecasting/forecasts/batch/?product_ids=a')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_hourly_forecast_follows_weekday_profile(self):
+        cache.clear()
+        run_forecast_job(self.create_job().id, workers=1)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        response = client.get('/api/forecasting/forecasts/hourly/')
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert data['date'] == timezone.now().date() + timedelta(days=1)
+        # One sale a day, all rung up at this hour
+        hour = timezone.localtime().hour
+        assert data['peak_hour'] == hour
+        assert data['scale'] >= 1
+        assert len(data['hours']) == 24
+        assert data['hours'][hour]['expected_transactions'] == pytest.approx(data['scale'], abs=0.01)
+        assert sum(row['expected_quantity'] for row in data['hours']) == pytest.approx(data['expected_quantity'], abs=0.1)
+        assert all(row['expected_transactions'] == 0 for row in data['hours'] if row['hour'] != hour)
+
+        # Served from the cache until the next refresh
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get('/api/forecasting/forecasts/hourly/').data == data
+        assert not [q for q in queries if 'sales_hourly' in q['sql']]
+
+        response = client.get('/api/forecasting/forecasts/hourly/?date=tomorrow')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_job_aggregates_category_forecasts(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        # Re-running rewrites the same rows instead of adding more
+        run_forecast_job(self.create_job().id, workers=1)
+
+        category_forecasts = list(CategoryForecast.objects.order_by('forecast_date'))
+        assert len(category_forecasts) == 7
+        runs = list(ForecastRun.objects.all())
+
+        for day, category_forecast in enumerate(category_forecasts):
+            product_forecasts = [run.daily()[day] for run in runs]
+            assert category_forecast.product_count == 3
+            assert category_forecast.predicted_demand == sum(f['predicted_demand'] for f in product_forecasts)
+
+            # Independent errors add in quadrature, tighter than summing the product intervals
+            lower_spread = category_forecast.predicted_demand - category_forecast.confidence_lower
+            upper_spread = category_forecast.confidence_upper - category_forecast.predicted_demand
+            assert 0 <= lower_spread <= sum(f['predicted_demand'] - f['confidence_lower'] for f in product_forecasts)
+            assert 0 <= upper_spread <= sum(f['confidence_upper'] - f['predicted_demand'] for f in product_forecasts)
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'/api/forecasting/forecasts/categories/?category_id={self.category.id}')
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['predicted_demand'] for row in response.data] == [
+            f.predicted_demand for f in category_forecasts
+        ]
+
+    def test_only_drifted_models_are_retrained(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        models = {m.product_id: m for m in ForecastModel.objects.filter(is_active=True)}
+        drifting, steady = self.products[0], self.products[1]
+
+        # Past forecasts: Rose 0 forecast 40 a day against ~3 sold, Rose 1 forecast what it sold
+        today = timezone.now().date()
+        ProductForecast.bulk_upsert([
+            ProductForecast(
+                product=product,
+                forecast_model=models[product.id],
+                forecast_date=today - timedelta(days=day),
+                predicted_demand=predicted,
+                confidence_lower=predicted,
+                confidence_upper=predicted
+            )
+            for product, predicted in ((drifting, 40), (steady, 4))
+            for day in range(1, 11)
+            if day % 7
+        ])
+        backfill_actual_demand()
+
+        drifted, jobs = retrain_drifted_models(forecast_days=7, training_days=30)
+
+        assert [d['product_id'] for d in drifted] == [drifting.id]
+        assert jobs[0].status == 'COMPLETED'
+        assert jobs[0].total_products == 1
+
+        old = ForecastModel.objects.get(pk=models[drifting.id].pk)
+        assert not old.is_active
+        assert old.status == 'DEPRECATED'
+        new = ForecastModel.objects.get(is_active=True, product=drifting)
+        assert new.retrain_reason.startswith('Drift: MAE')
+        assert 'weights' in new.parameters
+
+        # The steady model keeps serving
+        assert ForecastModel.objects.get(pk=models[steady.id].pk).is_active
+        assert retrain_drifted_models()[0] == []
+
+    def test_online_update_folds_closed_days(self):
+        run_forecast_job(self.create_job().id, workers=1)
+        # Pretend the models were trained five days ago
+        ForecastModel.objects.update(training_end_date=timezone.now().date() - timedelta(days=5))
+        before = {m.id: m.parameters['weights'] for m in ForecastModel.objects.all()}
+
+        assert update_models_online() == 3
+
+        yesterday = (timezone.now().date() - timedelta(days=1)).isoformat()
+        for forecast_model in ForecastModel.objects.all():
+            state = forecast_model.parameters['rls']
+            assert state['last_update'] == yesterday
+            assert state['updates'] == 4
+            assert np.array(state['covariance']).shape == (9, 9)
+            assert forecast_model.parameters['weights'] != before[forecast_model.id]
+
+        # Already current, nothing to fold
+        assert update_models_online() == 0
+
+        # A refit starts over from least squares
+        run_forecast_job(self.create_job().id, workers=1)
+        assert not any('rls' in m.parameters for m in ForecastModel.objects.all())
+
+    def test_backtest_scores_every_model_type(self):
+        run = run_backtest(origins=2, horizon=7, training_days=30, workers=1)
+
+        assert run.status == 'COMPLETED'
+        assert run.total_products == 4
+        assert BacktestResult.objects.filter(run=run).count() == 4 * 3
+        assert set(run.summary) == {'LINEAR_REGRESSION', 'HOLT_WINTERS', 'CROSTON'}
+
+        for result in BacktestResult.objects.filter(run=run, product__in=self.products):
+            assert result.mae is not None and result.rmse >= result.mae
+            assert result.observations == 2 * 7
+            assert result.fit_seconds >= 0 and result.predict_seconds >= 0
+        # Nothing sold for the tulip, scored but without a percentage error
+        tulip = BacktestResult.objects.filter(run=run, product=self.no_history)
+        assert all(r.mape is None for r in tulip)
+        for row in run.summary.values():
+            assert row['products'] == 4
+
+    def test_benchmarks_measure_every_stage_and_roll_back(self):
+        products = Product.objects.count()
+        results = run_benchmarks(scales=[(10, 60)], sample=2)
+
+        assert [row['stage'] for row in results] == [
+            'load_sales_histories', 'prepare_training_data', 'train_linear_regression_model',
+            'predict_demand', 'generate_forecast_view'
+        ]
+        for row in results:
+            assert (row['products'], row['days']) == (10, 60)
+            assert row['seconds'] > 0 and row['peak_kib'] > 0
+        assert results[0]['queries_per_call'] == 1
+        # The synthetic catalog is gone again
+        assert Product.objects.count() == products
+
+        assert compare_to_baseline(results, results) == []
+        faster = [{**row, 'ms_per_call': row['ms_per_call'] / 2} for row in results]
+        assert len(compare_to_baseline(results, faster)) == len(results)
+
+    def test_reorder_simulation_trades_stockouts_for_spoilage(self):
+        # Five a day on average, one keeps a month and the other a single day
+        mean_demand = np.full((2, 20), 5.0)
+        results = simulate_reorder_levels(
+            mean_demand, np.zeros((2, 1)), np.zeros(2, dtype=int),
+            initial_stock=np.array([0, 0]), initial_life=np.array([0, 0]),
+            shelf_life=np.array([30, 1]), levels=np.array([[0, 10, 40], [0, 10, 40]]),
+            order_quantity=np.array([15, 15]), paths=200, rng=np.random.default_rng(0)
+        )
+
+        assert results['stockout_rate'].shape == (2, 3)
+        assert results['stockout_rate'][0, 2] < results['stockout_rate'][0, 0]
+        assert results['fill_rate'][0, 2] > 0.9
+        assert results['spoilage_rate'][0].max() == 0
+        # Same-day flowers ordered in bulk mostly end up in the bin
+        assert results['spoilage_rate'][1, 2] > 0.5
+
+    def test_reorder_proposals_are_simulated_and_applied(self):
+        rose = self.products[0]
+        Product.objects.filter(pk=rose.pk).update(expiry_date=timezone.now().date() + timedelta(days=3))
+
+        proposals = propose_reorder_levels(paths=50, horizon=14, seed=1)
+
+        # Nothing sold for the tulip, there is no demand to simulate
+        assert {p.product_id for p in proposals} == {p.id for p in self.products}
+        by_product = {p.product_id: p for p in proposals}
+        assert by_product[rose.id].shelf_life_days is not None
+        assert by_product[self.products[1].id].shelf_life_days is None
+        for proposal in proposals:
+            assert proposal.current_reorder_level == 10
+            assert 0 <= proposal.stockout_rate <= 1 and 0 <= proposal.spoilage_rate <= 1
+
+        # A rerun replaces pending proposals rather than piling up
+        propose_reorder_levels(paths=50, horizon=14, seed=1)
+        assert ReorderLevelProposal.objects.filter(status='PENDING').count() == 3
+
+        assert apply_reorder_proposals(ReorderLevelProposal.objects.all()) == 3
+        for proposal in ReorderLevelProposal.objects.select_related('product'):
+            assert proposal.status == 'APPLIED'
+            assert proposal.product.reorder_level == proposal.proposed_reorder_level
+
+
+@pytest.mark.django_db
+class TestSeasonalCalendar:
+    """Seasonal multipliers come from a cached day-of-year x category calendar"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.roses = Category.objects.create(name='Roses')
+        self.tulips = Category.objects.create(name='Tulips')
+        self.product = Product.objects.create(
+            sku='ROSE-001',
+            name='Rose',
+            category=self.roses,
+            unit_price=100,
+            cost_price=50,
+            current_stock=100
+        )
+        create_sales_history([self.product])
+
+    def create_pattern(self, start, end, multiplier, categories):
+        pattern = SeasonalPattern.objects.create(
+            name='Peak',
+            season_type='HOLIDAY',
+            start_month=start.month,
+            start_day=start.day,
+            end_month=end.month,
+            end_day=end.day,
+            demand_multiplier=multiplier
+        )
+        pattern.categories.set(categories)
+        return pattern
+
+    def test_calendar_matches_pattern_dates(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.create_pattern(tomorrow, tomorrow + timedelta(days=2), 2.5, [self.roses])
+
+        is_peak, factors = get_seasonal_calendar().lookup(self.roses.id, tomorrow, 5)
+        assert list(is_peak) == [True, True, True, False, False]
+        assert list(factors) == [2.5, 2.5, 2.5, 1.0, 1.0]
+
+        is_peak, factors = get_seasonal_calendar().lookup(self.tulips.id, tomorrow, 5)
+        assert not is_peak.any()
+
+    def test_calendar_rebuilt_when_pattern_categories_change(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        pattern = self.create_pattern(tomorrow, tomorrow, 3.0, [self.roses])
+        assert get_seasonal_calendar().lookup(self.tulips.id, tomorrow, 1)[1][0] == 1.0
+
+        pattern.categories.add(self.tulips)
+        assert get_seasonal_calendar().lookup(self.tulips.id, tomorrow, 1)[1][0] == 3.0
+
+    def test_detection_proposes_patterns_for_category_peaks(self):
+        lilies = Category.objects.create(name='Lilies')
+        lily = Product.objects.create(
+            sku='LILY-001', name='Lily', category=lilies,
+            unit_price=100, cost_price=50, current_stock=100
+        )
+        today = timezone.now().date()
+        peak = [today - timedelta(days=day) for day in range(104, 99, -1)]
+
+        for day in range(400, 0, -1):
+            date = today - timedelta(days=day)
+            transaction = SalesTransaction.objects.create(
+                subtotal=100, total_amount=100, payment_method='CASH', amount_paid=100, status='COMPLETED'
+            )
+            TransactionItem.objects.create(
+                transaction=transaction, product=lily, unit_price=100,
+                quantity=12 if date in peak else 3
+            )
+            SalesTransaction.objects.filter(pk=transaction.pk).update(
+                created_at=timezone.now() - timedelta(days=day)
+            )
+        ProductSalesDaily.rebuild()
+
+        report = detect_category_seasonality(days=450)
+        detect_category_seasonality(days=450)
+
+        by_category = {row['category']: row for row in report}
+        assert by_category['Lilies']['patterns_proposed'] == 1
+        # Roses only have 60 days of history, too short to call anything seasonal
+        assert by_category['Roses']['patterns_proposed'] == 0
+
+        pattern = SeasonalPattern.objects.get(is_detected=True)
+        assert not pattern.is_active
+        assert list(pattern.categories.all()) == [lilies]
+        assert (pattern.start_month, pattern.start_day) == (peak[0].month, peak[0].day)
+        assert (pattern.end_month, pattern.end_day) == (peak[-1].month, peak[-1].day)
+        # Measured against the mean including the peak itself
+        assert pattern.demand_multiplier == pytest.approx(3.85, abs=0.1)
+
+    def test_forecast_horizon_costs_constant_queries(self):
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.create_pattern(tomorrow, tomorrow + timedelta(days=30), 2.0, [self.roses])
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        def generate(days):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post('/api/forecasting/generate/', {
+                    'product_id': self.product.id,
+                    'forecast_days': days
+                }, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+            return len(queries)
+
+        # The first call trains the model, the second caches it as the serving model
+        generate(7)
+        generate(7)
+        assert generate(7) == generate(60)
+
+        run = ForecastRun.objects.get(product=self.product)
+        assert run.days == 60
+        assert (run.is_peak_season & (run.seasonal_factor == 2.0)).sum() == 31
+
+
+class TestForecastHorizon:
+    """The vectorized horizon matches the per-day predict_demand loop"""
+
+    def fit(self, start_date, quantities):
+        X, y, _ = build_feature_matrix(start_date, quantities)
+        model, scaler, _, _ = fit_linear_regression(X, y)
+        return model, scaler
+
+    def predict_loop(self, model, scaler, history, start_date, days, factors):
+        history = list(history)
+        predictions = []
+        for i in range(days):
+            prediction, _ = predict_demand(
+                model, scaler, None, start_date + timedelta(days=i), history
+            )
+            prediction = int(prediction * factors[i])
+            predictions.append(prediction)
+            history.append(prediction)
+        return predictions
+
+    def test_matches_per_day_predictions(self):
+        rng = np.random.default_rng(7)
+        history_start = timezone.now().date() - timedelta(days=60)
+        quantities = rng.integers(0, 20, size=(3, 61)).astype(float)
+        forecast_start = history_start + timedelta(days=61)
+        factors = np.ones(30)
+        factors[10:15] = 1.5
+
+        fits = [self.fit(history_start, row) for row in quantities]
+        for (model, scaler), history in zip(fits, quantities):
+            weights, bias = fold_scaler(model, scaler)
+            expected = self.predict_loop(model, scaler, history, forecast_start, 30, factors)
+
+            predictions, _, _ = forecast_horizon(
+                weights, bias, history[None, :], forecast_start, 30, factors
+            )
+            assert list(predictions[0]) == expected
+
+        # A short history falls back to zero lags exactly like predict_demand
+        model, scaler = fits[0]
+        weights, bias = fold_scaler(model, scaler)
+        short = quantities[0, -5:]
+        predictions, lower, upper = forecast_horizon(
+            weights, bias, short[None, :], forecast_start, 30, factors
+        )
+        assert list(predictions[0]) == self.predict_loop(
+            model, scaler, short, forecast_start, 30, factors
+        )
+        assert (lower <= predictions).all() and (predictions <= upper).all()
+
+    def test_holt_winters_recovers_weekly_pattern(self):
+        weekly = np.array([3, 4, 5, 6, 9, 12, 8])
+        quantities = np.tile(weekly, (2, 13)).astype(float)
+
+        state, _ = fit_holt_winters(quantities)
+        forecast = holt_winters_forecast(state, 14)
+
+        np.testing.assert_allclose(forecast, np.tile(weekly, (2, 2)), atol=0.5)
+
+    def test_croston_forecasts_intermittent_rate(self):
+        quantities = np.zeros((1, 90))
+        quantities[0, ::5] = 5
+
+        state, _ = fit_croston(quantities, sba=False)
+        predictions, lower, upper = integer_forecast(croston_forecast(state, 30))
+
+        assert state['rate'][0] == pytest.approx(1.0)
+        assert predictions.sum() == 30
+        assert (lower <= predictions).all() and (predictions <= upper).all()
+
+    def test_recommend_stock_priorities(self):
+        days, priority, order = recommend_stock(
+            current_stock=[10, 50, 5, 100],
+            reorder_level=[0, 0, 10, 10],
+            daily_demand=[2, 5, 0, 1]
+        )
+
+        assert list(priority) == ['URGENT', 'HIGH', 'MEDIUM', 'LOW']
+        assert days[0] == 5 and np.isinf(days[2])
+        # 30 days of demand plus a week of safety stock, less what is on hand
+        assert list(order) == [64, 135, 0, 0]
+
+    def test_lag_feature_matrix_matches_build_feature_matrix(self):
+        quantities = np.random.default_rng(3).poisson(4, (3, 40)).astype(float)
+        start_date = timezone.now().date() - timedelta(days=40)
+
+        features = lag_feature_matrix(start_date, quantities)
+
+        for i in range(3):
+            X, _, _ = build_feature_matrix(start_date, quantities[i])
+            assert np.allclose(features[i], X)
+
+    def test_rls_update_reproduces_batch_fit(self):
+        rng = np.random.default_rng(4)
+        X = with_intercept(rng.normal(size=(2, 60, 3)))
+        y = X @ np.array([1.5, -2.0, 0.5, 3.0]) + rng.normal(scale=0.1, size=(2, 60))
+
+        def ridge(rows):
+            gram = np.einsum('nti,ntj->nij', X[:, :rows], X[:, :rows]) + RLS_RIDGE * np.eye(4)
+            return np.linalg.solve(gram, np.einsum('nti,nt->ni', X[:, :rows], y[:, :rows])[..., None])[..., 0]
+
+        theta = ridge(50)
+        covariance = rls_initialize(X, np.tile(np.arange(60) < 50, (2, 1)))
+        for t in range(50, 60):
+            theta, covariance = rls_update(theta, covariance, X[:, t], y[:, t], forgetting=1.0)
+
+        # Without forgetting, ten online steps land exactly on the refit over all 60 days
+        assert np.allclose(theta, ridge(60))
+
+
+@pytest.mark.django_db
+class TestAccuracyBackfill:
+    """Actual demand and errors are backfilled in bulk from realized sales"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.category = Category.objects.create(name='Roses')
+        self.products = [
+            Product.objects.create(
+                sku=f'ROSE-{i:03d}',
+                name=f'Rose {i}',
+                category=self.category,
+                unit_price=100,
+                cost_price=50,
+                current_stock=100
+            )
+            for i in range(2)
+        ]
+        self.model = ForecastModel.objects.create(
+            name='Rose Forecast Model',
+            model_type='LINEAR_REGRESSION',
+            version='v1',
+            training_start_date=timezone.now().date() - timedelta(days=30),
+            training_end_date=timezone.now().date()
+        )
+        # Rose 0 sells 3 a day, Rose 1 sells 4 (5 on multiples of 7 days ago)
+        create_sales_history(self.products, days=10)
+
+    def create_forecasts(self, days_ago, predicted):
+        today = timezone.now().date()
+        return ProductForecast.bulk_upsert([
+            ProductForecast(
+                product=product,
+                forecast_model=self.model,
+                forecast_date=today - timedelta(days=day),
+                predicted_demand=predicted,
+                confidence_lower=predicted,
+                confidence_upper=predicted
+            )
+            for product in self.products
+            for day in days_ago
+        ])
+
+    def test_backfill_fills_past_forecasts(self):
+        self.create_forecasts([1, 2, 20], predicted=4)
+        self.create_forecasts([-1], predicted=4)
+
+        assert backfill_actual_demand(batch_size=2) == 6
+
+        rose, other = self.products
+        forecast = ProductForecast.objects.get(product=rose, forecast_date=timezone.now().date() - timedelta(days=1))
+        assert forecast.actual_demand == 3
+        assert forecast.forecast_error == -1
+        assert forecast.absolute_percentage_error == pytest.approx(100 / 3)
+
+        forecast = ProductForecast.objects.get(product=other, forecast_date=timezone.now().date() - timedelta(days=2))
+        assert forecast.actual_demand == 4
+        assert forecast.absolute_percentage_error == 0
+
+        # No sales that day: error is known, percentage error is undefined
+        forecast = ProductForecast.objects.get(product=rose, forecast_date=timezone.now().date() - timedelta(days=20))
+        assert forecast.actual_demand == 0
+        assert forecast.forecast_error == -4
+        assert forecast.absolute_percentage_error is None
+
+        assert ProductForecast.objects.filter(actual_demand__isnull=True).count() == 2
+        assert backfill_actual_demand() == 0
+        assert backfill_actual_demand(recompute=True) == 6
+
+    def test_backfill_writes_out_realized_run_days(self):
+        today = timezone.now().date()
+        rose, other = self.products
+        current, finished = ForecastRun.bulk_upsert([
+            ForecastRun.pack(
+                [4, 4, 4, 4, 4], [2] * 5, [6] * 5, [False] * 5, [1.0] * 5,
+                product=rose, forecast_model=self.model, start_date=today - timedelta(days=3)
+            ),
+            ForecastRun.pack(
+                [5, 5], [3] * 2, [7] * 2, [True] * 2, [1.2] * 2,
+                product=other, forecast_model=self.model, start_date=today - timedelta(days=2)
+            ),
+        ])
+
+        assert backfill_actual_demand() == 5
+
+        realized = ProductForecast.objects.filter(product=rose).order_by('forecast_date')
+        assert [f.forecast_date for f in realized] == [today - timedelta(days=d) for d in (3, 2, 1)]
+        assert all(f.actual_demand == 3 and f.forecast_error == -1 for f in realized)
+        assert ProductForecast.objects.get(product=other, forecast_date=today - timedelta(days=1)).is_peak_season
+
+        # The run still covering today waits for the rest of its days, the finished one is gone
+        current.refresh_from_db()
+        assert current.materialized_through == today - timedelta(days=1)
+        assert not ForecastRun.objects.filter(pk=finished.pk).exists()
+        assert backfill_actual_demand() == 0
+
+    def test_backfill_queries_do_not_grow_with_forecasts(self):
+        self.create_forecasts([1, 2], predicted=4)
+        with CaptureQueriesContext(connection) as few:
+            backfill_actual_demand()
+
+        self.create_forecasts(range(3, 10), predicted=4)
+        with CaptureQueriesContext(connection) as many:
+            backfill_actual_demand()
+
+        assert len(few) == len(many)
+
+    def test_accuracy_view_reads_summaries(self):
+        owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.model.is_active = True
+        self.model.save()
+        self.create_forecasts([1, 2], predicted=4)
+        backfill_actual_demand()
+
+        client = APIClient()
+        client.force_authenticate(owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/forecasting/models/accuracy/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) <= 3
+        result = response.data[0]
+        assert result['total_forecasts'] == 4
+        # Rose 0 sold 3 (25% off), Rose 1 sold 4 (exact)
+        assert result['accurate_forecasts'] == 2
+        assert result['accuracy_rate'] == 50
+        assert result['average_error'] == pytest.approx(-0.5)
+        assert result['average_percentage_error'] == pytest.approx(100 / 6)
+        assert result['category_accuracy'] == [
+            {'category': 'Roses', 'total': 4, 'accurate': 2, 'accuracy_rate': 50.0}
+        ]
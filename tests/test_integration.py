@@ -6,12 +6,16 @@ import pytest
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from datetime import timedelta
 from django.utils import timezone
 
-from inventory.models import Category, Supplier, Product, InventoryMovement
-from pos.models import SalesTransaction, TransactionItem, Cart, CartItem
+from inventory.alerts import evaluate_stock_alerts
+from inventory.ledger import InsufficientStock, change_stock, set_stock
+from inventory.models import Category, Supplier, Product, InventoryMovement, LowStockAlert
+from pos.models import SalesTransaction, TransactionItem, ProductSalesDaily, SalesHourly, Cart, CartItem
 from forecasting.models import ForecastModel, ProductForecast, SeasonalPattern
 
 User = get_user_model()
@@ -411,6 +415,518 @@ class TestDataValidation:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+class TestSalesRollup:
+    """Test the per-day product sales rollup kept at checkout and void"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+        
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        
+        response = self.client.post('/api/auth/login/', {
+            'username': 'owner',
+            'password': 'testpass123'
+        })
+        token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(
+            sku='TEST-001',
+            name='Test Product',
+            category=self.category,
+            unit_price=500,
+            cost_price=300,
+            current_stock=50,
+            reorder_level=5,
+            created_by=self.owner
+        )
+    
+    def sell(self, quantity):
+        response = self.client.post('/api/pos/transactions/', {
+            'items': [{
+                'product': self.product.id,
+                'quantity': quantity,
+                'unit_price': 500,
+                'discount': 0
+            }],
+            'payment_method': 'CASH',
+            'amount_paid': 500 * quantity
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        return SalesTransaction.objects.latest('id').id
+    
+    def test_checkout_and_void_update_rollup(self):
+        """Test sales add to the day's row and voids take them back out"""
+        
+        self.sell(2)
+        voided_id = self.sell(3)
+        
+        rollup = ProductSalesDaily.objects.get(product=self.product)
+        assert rollup.business_date == timezone.localdate()
+        assert rollup.quantity == 5
+        assert rollup.revenue == 2500
+        assert rollup.cost == 1500
+        
+        hourly = SalesHourly.objects.get()
+        assert hourly.hour == timezone.localtime().hour
+        assert hourly.transactions == 2
+        assert hourly.quantity == 5
+        
+        response = self.client.post(f'/api/pos/transactions/{voided_id}/void/', {
+            'reason': 'Customer changed mind'
+        })
+        assert response.status_code == status.HTTP_200_OK
+        
+        rollup.refresh_from_db()
+        assert rollup.quantity == 2
+        assert rollup.revenue == 1000
+        hourly.refresh_from_db()
+        assert (hourly.transactions, hourly.quantity) == (1, 2)
+        
+        # A rebuild from the transactions agrees with the incremental rollup
+        ProductSalesDaily.rebuild()
+        assert ProductSalesDaily.objects.get(product=self.product).quantity == 2
+        SalesHourly.rebuild()
+        assert SalesHourly.objects.get().quantity == 2
+    
+    def test_sales_report_totals_share_one_range(self):
+        """Test report totals and top products cover the same business days"""
+        
+        self.sell(2)
+        yesterday = self.sell(3)
+        SalesTransaction.objects.filter(pk=yesterday).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        ProductSalesDaily.rebuild()
+        
+        # A date-only end date covers that whole day
+        today = timezone.localdate().isoformat()
+        for params in ({}, {'start_date': today, 'end_date': today}):
+            response = self.client.get('/api/pos/reports/sales/', params)
+            assert response.status_code == status.HTTP_200_OK
+            top_quantity = sum(p['total_quantity'] for p in response.data['top_products'])
+            assert top_quantity == response.data['total_items_sold']
+        assert response.data['total_items_sold'] == 2
+
+
+@pytest.mark.django_db
+class TestStockReceiving:
+    """Test receiving a supplier delivery in one request"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+        
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.client.force_authenticate(self.owner)
+        
+        self.category = Category.objects.create(name='Test Category')
+        self.supplier = Supplier.objects.create(name='Flower Farm', phone='09171234567')
+        self.products = [
+            Product.objects.create(
+                sku=f'TEST-{i:03d}',
+                name=f'Test Product {i}',
+                category=self.category,
+                unit_price=500,
+                cost_price=300,
+                current_stock=10,
+                reorder_level=20
+            )
+            for i in range(20)
+        ]
+    
+    def receive(self, lines):
+        return self.client.post('/api/inventory/movements/receive/', {
+            'supplier': self.supplier.id,
+            'reference_number': 'DR-001',
+            'lines': lines
+        }, format='json')
+    
+    def test_delivery_is_received_in_bulk(self):
+        """Test every line becomes a STOCK_IN movement with exact before and after stock"""
+        
+        first, second = self.products[:2]
+        response = self.receive([
+            {'product': first.id, 'quantity': 5},
+            {'product': second.id, 'quantity': 50},
+            {'product': first.id, 'quantity': 3, 'notes': 'Second box'}
+        ])
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['lines'] == 3
+        assert response.data['total_quantity'] == 58
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.current_stock == 18
+        assert second.current_stock == 60
+        
+        movements = list(InventoryMovement.objects.filter(reference_number='DR-001').order_by('id'))
+        assert [(m.stock_before, m.stock_after) for m in movements] == [(10, 15), (10, 60), (15, 18)]
+        assert all(m.movement_type == 'STOCK_IN' and m.created_by == self.owner for m in movements)
+        assert movements[2].notes == 'Second box'
+        assert 'Flower Farm' in movements[0].reason
+        
+        # Still under its reorder level, so the first product is alerted
+        assert list(LowStockAlert.objects.values_list('product_id', flat=True)) == [first.id]
+    
+    def test_query_count_does_not_grow_with_lines(self):
+        """Test a delivery of many lines costs the same queries as a small one"""
+        
+        with CaptureQueriesContext(connection) as small:
+            self.receive([{'product': p.id, 'quantity': 1} for p in self.products[:2]])
+        with CaptureQueriesContext(connection) as large:
+            self.receive([{'product': p.id, 'quantity': 1} for p in self.products])
+        
+        assert len(large) == len(small)
+        assert InventoryMovement.objects.count() == 22
+    
+    def test_unknown_products_are_rejected(self):
+        """Test nothing is received when a line names a missing product"""
+        
+        response = self.receive([
+            {'product': self.products[0].id, 'quantity': 5},
+            {'product': 99999, 'quantity': 5}
+        ])
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert '99999' in str(response.data['lines'])
+        assert not InventoryMovement.objects.exists()
+
+
+@pytest.mark.django_db
+class TestStockLedger:
+    """Test stock changes report exact before and after values in one statement"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.category = Category.objects.create(name='Test Category')
+        self.product = Product.objects.create(
+            sku='TEST-001',
+            name='Test Product',
+            category=self.category,
+            unit_price=500,
+            cost_price=300,
+            current_stock=10,
+            reorder_level=2
+        )
+    
+    def test_changes_return_stock_before_and_after(self):
+        """Test deltas, guarded decrements and absolute levels"""
+        
+        with CaptureQueriesContext(connection) as queries:
+            assert change_stock(self.product.id, 5) == (10, 15)
+        assert len(queries) == 1
+        
+        assert change_stock(self.product.id, -15, allow_negative=False) == (15, 0)
+        with pytest.raises(InsufficientStock) as error:
+            change_stock(self.product.id, -1, allow_negative=False)
+        assert error.value.available == 0
+        
+        assert set_stock(self.product.id, 7) == (0, 7)
+        self.product.refresh_from_db()
+        assert self.product.current_stock == 7
+        
+        with pytest.raises(Product.DoesNotExist):
+            change_stock(99999, 1)
+    
+    def test_movement_reads_stock_from_the_update(self):
+        """Test a stale product instance does not leak into stock_before"""
+        
+        stale = Product.objects.get(pk=self.product.pk)
+        Product.objects.filter(pk=self.product.pk).update(current_stock=20)
+        
+        with CaptureQueriesContext(connection) as queries:
+            movement = InventoryMovement.objects.create(
+                product=stale,
+                movement_type='STOCK_IN',
+                quantity=5,
+                reason='Delivery'
+            )
+        
+        # The update, the insert and the alert check
+        assert len(queries) == 3
+        assert (movement.stock_before, movement.stock_after) == (20, 25)
+        assert stale.current_stock == 25
+
+
+@pytest.mark.django_db
+class TestStockAlerts:
+    """Test low stock alerts are raised once and resolved when stock recovers"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.category = Category.objects.create(name='Test Category')
+        self.products = [
+            Product.objects.create(
+                sku=f'TEST-{i:03d}',
+                name=f'Test Product {i}',
+                category=self.category,
+                unit_price=500,
+                cost_price=300,
+                current_stock=10,
+                reorder_level=5
+            )
+            for i in range(3)
+        ]
+    
+    def stock_out(self, product, quantity):
+        return InventoryMovement.objects.create(
+            product=product,
+            movement_type='STOCK_OUT',
+            quantity=quantity,
+            reason='Wastage',
+            created_by=self.owner
+        )
+    
+    def test_alerts_are_raised_once_and_resolved(self):
+        """Test repeated stock-outs keep one pending alert and a restock resolves it"""
+        
+        product = self.products[0]
+        self.stock_out(product, 6)
+        self.stock_out(product, 1)
+        
+        alert = LowStockAlert.objects.get(product=product)
+        assert (alert.status, alert.current_stock) == ('PENDING', 4)
+        
+        InventoryMovement.objects.create(
+            product=product, movement_type='STOCK_IN', quantity=20, reason='Delivery'
+        )
+        alert.refresh_from_db()
+        assert alert.status == 'RESOLVED' and alert.resolved_at is not None
+        
+        # Going low again starts a new alert
+        self.stock_out(product, 25)
+        assert LowStockAlert.objects.filter(product=product, status='PENDING').count() == 1
+    
+    def test_batch_is_evaluated_in_one_query(self):
+        """Test a batch of touched products costs one read and one insert"""
+        
+        Product.objects.filter(pk__in=[p.pk for p in self.products[:2]]).update(current_stock=1)
+        
+        with CaptureQueriesContext(connection) as queries:
+            assert evaluate_stock_alerts([p.pk for p in self.products]) == (2, 0)
+        assert len(queries) == 2
+        
+        # Nothing changed, nothing to write
+        with CaptureQueriesContext(connection) as queries:
+            assert evaluate_stock_alerts([p.pk for p in self.products]) == (0, 0)
+        assert len(queries) == 1
+    
+    def test_only_one_pending_alert_per_product(self):
+        """Test the partial unique index rejects a second pending alert"""
+        
+        product = self.products[0]
+        LowStockAlert.objects.create(product=product, current_stock=1, reorder_level=5)
+        LowStockAlert.objects.create(product=product, current_stock=1, reorder_level=5, status='RESOLVED')
+        
+        with pytest.raises(IntegrityError), transaction.atomic():
+            LowStockAlert.objects.create(product=product, current_stock=1, reorder_level=5)
+
+
+@pytest.mark.django_db
+class TestCategoryProductCounts:
+    """Test the denormalized active product count per category"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.client.force_authenticate(self.owner)
+        
+        self.roses = Category.objects.create(name='Roses')
+        self.tulips = Category.objects.create(name='Tulips')
+    
+    def create_product(self, sku, category):
+        return Product.objects.create(
+            sku=sku,
+            name=sku,
+            category=category,
+            unit_price=100,
+            cost_price=50,
+            current_stock=10
+        )
+    
+    def counts(self):
+        return dict(Category.objects.values_list('name', 'active_product_count'))
+    
+    def test_count_follows_create_deactivate_move_and_delete(self):
+        """Test every change to a product's category or status moves the count"""
+        
+        rose = self.create_product('ROSE-001', self.roses)
+        self.create_product('ROSE-002', self.roses)
+        assert self.counts() == {'Roses': 2, 'Tulips': 0}
+        
+        rose.category = self.tulips
+        rose.save()
+        assert self.counts() == {'Roses': 1, 'Tulips': 1}
+        
+        rose.is_active = False
+        rose.save()
+        assert self.counts() == {'Roses': 1, 'Tulips': 0}
+        
+        # Loaded fresh, reactivated and moved back in one save
+        rose = Product.objects.get(pk=rose.pk)
+        rose.is_active = True
+        rose.category = self.roses
+        rose.save()
+        assert self.counts() == {'Roses': 2, 'Tulips': 0}
+        
+        rose.delete()
+        assert self.counts() == {'Roses': 1, 'Tulips': 0}
+        
+        # Queryset updates bypass signals until recounted
+        Product.objects.update(category=self.tulips)
+        Category.refresh_product_counts()
+        assert self.counts() == {'Roses': 0, 'Tulips': 1}
+    
+    def test_count_survives_deferred_fields(self):
+        """Test saves of products loaded without is_active or category keep the count right"""
+        
+        rose = self.create_product('ROSE-001', self.roses)
+        self.create_product('ROSE-002', self.roses)
+        
+        partial = Product.objects.only('id', 'name').get(pk=rose.pk)
+        partial.name = 'Renamed'
+        partial.save()
+        assert self.counts() == {'Roses': 2, 'Tulips': 0}
+        
+        partial = Product.objects.only('id', 'name').get(pk=rose.pk)
+        partial.is_active = False
+        partial.save()
+        assert self.counts() == {'Roses': 1, 'Tulips': 0}
+        
+        partial = Product.objects.only('id', 'name').get(pk=rose.pk)
+        partial.is_active = True
+        partial.category = self.tulips
+        partial.save()
+        assert self.counts() == {'Roses': 1, 'Tulips': 1}
+        
+        Product.objects.only('id', 'name').get(pk=rose.pk).delete()
+        assert self.counts() == {'Roses': 1, 'Tulips': 0}
+    
+    def test_category_list_is_one_query(self):
+        """Test listing categories does not count products per category"""
+        
+        for i in range(5):
+            self.create_product(f'ROSE-{i:03d}', self.roses)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/inventory/categories/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 1
+        assert {row['name']: row['product_count'] for row in response.data} == {'Roses': 5, 'Tulips': 0}
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    """Test ranked, typo-tolerant product search"""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            username='owner',
+            email='owner@test.com',
+            password='testpass123',
+            role='OWNER'
+        )
+        self.client.force_authenticate(self.owner)
+        
+        self.roses = Category.objects.create(name='Roses')
+        self.fillers = Category.objects.create(name='Fillers')
+        for sku, name, category in [
+            ('ROSE-RED', 'Red Rose', self.roses),
+            ('ROSE-WHT', 'White Rose', self.roses),
+            ('PRIM-001', 'Primrose Bunch', self.fillers),
+            ('GYP-001', "Baby's Breath", self.fillers),
+        ]:
+            Product.objects.create(
+                sku=sku,
+                name=name,
+                category=category,
+                unit_price=100,
+                cost_price=50,
+                current_stock=10
+            )
+    
+    def search(self, term, **params):
+        response = self.client.get('/api/inventory/products/', {'search': term, **params})
+        assert response.status_code == 200
+        return [product['name'] for product in response.data]
+    
+    def test_prefix_typo_and_ranking(self):
+        """Test word prefixes rank first and misspellings still match"""
+        
+        # Word prefixes before the substring match in Primrose
+        assert self.search('ros')[-1] == 'Primrose Bunch'
+        assert set(self.search('ros')[:2]) == {'Red Rose', 'White Rose'}
+        assert self.search('ba') == ["Baby's Breath"]
+        assert self.search('gyp-001') == ["Baby's Breath"]
+        assert self.search('primrsoe') == ['Primrose Bunch']
+        assert self.search('zzzz') == []
+        
+        # Mid-word fragments still match, as the old LIKE search did
+        assert set(self.search('ose')) == {'Red Rose', 'White Rose', 'Primrose Bunch'}
+        
+        # Explicit ordering still applies to searched results
+        assert self.search('ros', ordering='name') == ['Primrose Bunch', 'Red Rose', 'White Rose']
+    
+    def test_search_is_not_capped(self):
+        """Test the unpaginated list returns every match, bulk inserts included once reindexed"""
+        
+        Product.objects.bulk_create([
+            Product(
+                sku=f'ROSE-{i:03d}',
+                name=f'Garden Rose {i}',
+                category=self.roses,
+                unit_price=100,
+                cost_price=50,
+                current_stock=10
+            )
+            for i in range(60)
+        ])
+        Product.refresh_search_text()
+        
+        assert len(self.search('garden')) == 60
+        assert len(self.search('rose')) == 63
+    
+    def test_category_rename_reindexes_products(self):
+        """Test renaming a category makes its products searchable by the new name"""
+        
+        assert set(self.search('filler')) == {'Primrose Bunch', "Baby's Breath"}
+        
+        self.fillers.name = 'Accents'
+        self.fillers.save()
+        assert self.search('filler') == []
+        assert set(self.search('accent')) == {'Primrose Bunch', "Baby's Breath"}
+
+
 @pytest.mark.django_db
 class TestPerformance:
     """Test system performance with larger datasets"""